@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端提取吞吐量基准测试（离线）
+
+功能：
+    1. 在本地启动模拟笔记站点（mock_note_site.py），无需真实站点和账号
+    2. 用无头浏览器打开站点，调用与正式导出相同的 export_note_list 提取全部笔记
+    3. 将导出结果与站点的期望内容逐篇核对，报告缺失/不一致的笔记
+    4. 输出 笔记数/秒，可多轮运行取中位数，便于比较提取器的优化效果
+       （默认点击间隔为0，测的是提取器本身而不是限速；导出写到临时目录，不影响 笔记导出/）
+
+用法：
+    python bench_extract.py --notes 200 --paragraphs 20 --latency 50 [--rounds 3] [--json 结果.json]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from playwright.async_api import async_playwright
+
+from click_and_extract_diary import export_note_list
+from mock_note_site import MockNoteSite
+from note_assets import AssetDownloader, AssetStore
+from note_collection import open_collection
+from page_recycler import PageRecycler
+from rate_controller import RateController
+from split_notes_by_title import iter_notes
+
+
+def verify_export(output_file, site):
+    """
+    将导出文件与模拟站点的期望内容核对
+
+    Returns:
+        dict: 提取篇数、正确篇数、缺失标题和内容不一致的标题
+    """
+    extracted = {}
+    with open_collection(output_file) as f:
+        for brackets, body in iter_notes(f):
+            if brackets:
+                extracted[brackets[0]] = body
+    missing = []
+    mismatched = []
+    for note in site.notes:
+        body = extracted.get(note['title'])
+        if body is None:
+            missing.append(note['title'])
+        elif body != '\n\n'.join(note['paragraphs']):
+            mismatched.append(note['title'])
+    return {
+        'extracted': len(extracted),
+        'correct': len(site.notes) - len(missing) - len(mismatched),
+        'missing': missing,
+        'mismatched': mismatched,
+    }
+
+
+async def run_round(playwright, url, site, args):
+    """
+    运行一轮提取，返回耗时与核对结果
+    """
+    export_dir = None
+    if args.output_dir:
+        export_dir = Path(args.output_dir)
+        export_dir.mkdir(parents=True, exist_ok=True)
+    browser = await playwright.chromium.launch(headless=not args.headed)
+    try:
+        context = await browser.new_context(viewport={'width': 1920, 'height': 880})
+        page = await context.new_page()
+        await page.goto(url, wait_until='domcontentloaded')
+        with tempfile.TemporaryDirectory() as work_dir:
+            downloader = None
+            if args.images:
+                downloader = AssetDownloader(context.request, AssetStore(Path(work_dir) / '附件'))
+            # 定期回收页面，用于测试回收后能否无缝接着导出
+            recycler = None
+            if args.recycle_every:
+                recycler = PageRecycler(page, latency_factor=0, min_notes=0, max_notes=args.recycle_every)
+            # 点击间隔固定为 --interval，不让默认限速（最小0.2秒）掩盖提取器本身的吞吐量
+            rate = RateController(initial_interval=args.interval, min_interval=args.interval)
+            start = time.perf_counter()
+            output_file = await export_note_list(page, '基准测试', rate=rate, downloader=downloader,
+                                                 compress=args.compress, scroll_iterations=1,
+                                                 recycler=recycler, in_page=args.in_page,
+                                                 export_dir=export_dir or Path(work_dir))
+            elapsed = time.perf_counter() - start
+            if output_file is None:
+                result = {'extracted': 0, 'correct': 0, 'missing': [n['title'] for n in site.notes],
+                          'mismatched': []}
+            else:
+                result = verify_export(output_file, site)
+        await context.close()
+    finally:
+        await browser.close()
+
+    result['seconds'] = elapsed
+    result['recycles'] = len(recycler.recycles) if recycler else 0
+    result['notes_per_sec'] = result['extracted'] / elapsed if elapsed > 0 else 0.0
+    return result
+
+
+async def run_benchmark(args):
+    site = MockNoteSite(args.notes, args.paragraphs, args.paragraph_chars, args.latency, args.images,
+                        virtual_rows=args.virtual_rows, repeat_every=args.repeat_every)
+    url = site.start()
+    rounds = []
+    try:
+        async with async_playwright() as playwright:
+            for round_index in range(args.rounds):
+                result = await run_round(playwright, url, site, args)
+                rounds.append(result)
+                print(f"[基准] 第 {round_index + 1}/{args.rounds} 轮: {result['extracted']} 篇，"
+                      f"{result['seconds']:.2f} 秒，{result['notes_per_sec']:.2f} 篇/秒")
+    finally:
+        site.stop()
+    return rounds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="在本地模拟站点上测试笔记提取的吞吐量")
+    parser.add_argument("--notes", type=int, default=100, help="笔记篇数")
+    parser.add_argument("--paragraphs", type=int, default=10, help="每篇笔记的段落数")
+    parser.add_argument("--paragraph-chars", type=int, default=60, help="每个段落的字符数")
+    parser.add_argument("--latency", type=int, default=0, help="打开笔记正文的人为延迟（毫秒）")
+    parser.add_argument("--images", type=int, default=0, help="每篇笔记的图片数，大于0时同时测试图片下载")
+    parser.add_argument("--virtual-rows", type=int, default=0, help="正文只渲染这么多行（模拟虚拟列表），0表示全部渲染")
+    parser.add_argument("--repeat-every", type=int, default=0, help="每隔这么多段重复一次上一段的文字，核对重复行是否保留")
+    parser.add_argument("--compress", action="store_true", help="导出为.ncz压缩合集")
+    parser.add_argument("--in-page", action="store_true", help="使用页面内批量抓取")
+    parser.add_argument("--recycle-every", type=int, default=0, help="每导出该篇数回收一次页面，0表示不回收")
+    parser.add_argument("--interval", type=float, default=0.0, help="点击笔记的间隔（秒），默认0即不限速")
+    parser.add_argument("--rounds", type=int, default=1, help="运行轮数，报告取中位数")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    parser.add_argument("--output-dir", help="导出到该目录并保留导出文件（默认导出到临时目录，核对后删除）")
+    parser.add_argument("--json", help="将结果写入该JSON文件")
+    args = parser.parse_args()
+
+    rounds = asyncio.run(run_benchmark(args))
+    median_rate = statistics.median(r['notes_per_sec'] for r in rounds)
+    last = rounds[-1]
+    print("=" * 60)
+    print(f"笔记 {args.notes} 篇 × {args.paragraphs} 段 × {args.paragraph_chars} 字，延迟 {args.latency} ms")
+    print(f"吞吐量（{args.rounds} 轮中位数）: {median_rate:.2f} 篇/秒")
+    print(f"核对: 正确 {last['correct']} 篇，缺失 {len(last['missing'])} 篇，不一致 {len(last['mismatched'])} 篇")
+    for title in last['missing'][:10]:
+        print(f"  缺失: {title}")
+    for title in last['mismatched'][:10]:
+        print(f"  不一致: {title}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'config': vars(args), 'median_notes_per_sec': median_rate, 'rounds': rounds},
+                      f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json}")
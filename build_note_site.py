@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+由分割后的笔记生成可浏览的静态网站（增量、并行）
+
+功能：
+    1. 每篇笔记渲染为一个HTML页面，另外生成各分类索引页、按月索引页和总索引页
+    2. 输入可以是 split_notes_by_title 的任一种输出（目录、分片目录、zip、tar.gz），
+       也可以直接是合集文件（.txt/.ncz，此时分类为合集名，如 日记）
+    3. 网站目录下的 .manifest.json 记录每篇笔记的内容哈希和各索引页的成员签名，
+       重建时只渲染内容有变化的笔记和受影响的索引页，并删除已不存在的页面
+    4. 需要渲染的笔记较多时交给进程池并行渲染
+
+用法：
+    python build_note_site.py [输入 ...] [--output 笔记导出/网站] [--workers 4] [--force]
+    输入可写为 分类名=路径；不指定输入时使用 笔记导出/ 下的分割结果，没有分割结果时使用所有合集
+"""
+
+import argparse
+import contextlib
+import hashlib
+import html
+import json
+import os
+import re
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+
+from note_collection import collection_name, list_collection_files, open_collection
+from split_notes_by_title import build_note_file_name, iter_notes, iter_split_notes, resolve_note_date
+
+# 页面模板或渲染规则变化时加1，使已有网站全量重建
+SITE_VERSION = 1
+MANIFEST_NAME = '.manifest.json'
+# 待渲染笔记少于该数量时直接在当前进程渲染，省去启动进程池的开销
+POOL_MIN_JOBS = 64
+UNKNOWN_MONTH = '未知日期'
+# 正文中由 note_assets.format_asset_references 生成的本地资源引用行
+ASSET_LINE_PATTERN = re.compile(r'^\[(图片|附件): (.+)\]$')
+# 分割结果文件名：日期-标题.txt
+NOTE_FILE_PATTERN = re.compile(r'^(\d{8})-(.*)\.txt$')
+
+STYLE_CSS = '''body { font-family: -apple-system, "PingFang SC", "Microsoft YaHei", sans-serif;
+       max-width: 860px; margin: 2em auto; padding: 0 1em; line-height: 1.7; color: #222; }
+nav { font-size: 0.9em; margin-bottom: 1.5em; }
+nav a { margin-right: 1em; }
+.meta { color: #888; font-size: 0.9em; }
+ul.notes li { margin: 0.2em 0; }
+ul.notes .date { color: #888; margin-right: 0.8em; font-family: monospace; }
+img { max-width: 100%; }
+'''
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="zh-CN"><head><meta charset="utf-8">
+<title>{title}</title>
+<link rel="stylesheet" href="{root}style.css">
+</head><body>
+<nav>{nav}</nav>
+{content}
+</body></html>
+'''
+
+
+def _href(path):
+    return quote(path.replace(os.sep, '/'))
+
+
+def month_of(date_str):
+    return f'{date_str[:4]}-{date_str[4:6]}' if date_str else UNKNOWN_MONTH
+
+
+def folder_page(folder):
+    return f'folders/{folder}.html'
+
+
+def month_page(month):
+    return f'dates/{month}.html'
+
+
+def _note(folder, name, date_str, title, text):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return {
+        'id': f'{folder}/{name}',
+        'folder': folder,
+        'date': date_str,
+        'title': title,
+        'page': f'notes/{folder}/{stem}.html',
+        'text': text,
+    }
+
+
+def iter_source_notes(source, folder):
+    """
+    读取一个输入源中的所有笔记
+
+    Yields:
+        dict: id / folder / date / title / page / text
+    """
+    if os.path.isdir(source) or zipfile.is_zipfile(source) or tarfile.is_tarfile(source):
+        for name, text in iter_split_notes(source):
+            match = NOTE_FILE_PATTERN.match(os.path.basename(name))
+            if match:
+                yield _note(folder, name, match.group(1), match.group(2), text)
+            else:
+                yield _note(folder, name, '', os.path.splitext(os.path.basename(name))[0], text)
+        return
+    with open_collection(source) as f:
+        for brackets, body in iter_notes(f):
+            # 日期和文件名规则与分割脚本一致，不打印其逐步日志
+            date_str, title = resolve_note_date(brackets, verbose=False)
+            name = build_note_file_name(date_str or '', title, verbose=False)
+            yield _note(folder, name, date_str or '', title, body)
+
+
+def note_hash(note, assets_prefix):
+    data = '\0'.join((str(SITE_VERSION), assets_prefix, note['folder'], note['date'], note['title'], note['text']))
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _render_body(text, assets_prefix):
+    blocks = []
+    for paragraph in re.split(r'\n\s*\n', text.strip()):
+        if not paragraph.strip():
+            continue
+        lines = []
+        for line in paragraph.strip().split('\n'):
+            match = ASSET_LINE_PATTERN.match(line.strip())
+            if match and match.group(1) == '图片':
+                lines.append(f'<img src="{_href(assets_prefix + match.group(2))}" alt="图片">')
+            elif match:
+                path = match.group(2)
+                lines.append(f'<a href="{_href(assets_prefix + path)}">附件: {html.escape(os.path.basename(path))}</a>')
+            else:
+                lines.append(html.escape(line))
+        blocks.append('<p>' + '<br>\n'.join(lines) + '</p>')
+    return '\n'.join(blocks)
+
+
+def render_note_page(job):
+    """
+    渲染并写出一篇笔记页面（在进程池中执行，只接收可序列化的参数）
+    """
+    site_dir, note, assets_prefix = job
+    month = month_of(note['date'])
+    date_label = f"{note['date'][:4]}-{note['date'][4:6]}-{note['date'][6:]}" if note['date'] else UNKNOWN_MONTH
+    nav = (f'<a href="../../index.html">首页</a>'
+           f'<a href="../../{_href(folder_page(note["folder"]))}">{html.escape(note["folder"])}</a>'
+           f'<a href="../../{_href(month_page(month))}">{month}</a>')
+    content = (f'<h1>{html.escape(note["title"])}</h1>\n'
+               f'<p class="meta">{date_label} · {html.escape(note["folder"])} · {len(note["text"])} 字</p>\n'
+               + _render_body(note['text'], assets_prefix))
+    page_path = os.path.join(site_dir, note['page'])
+    os.makedirs(os.path.dirname(page_path), exist_ok=True)
+    with open(page_path, 'w', encoding='utf-8') as f:
+        f.write(PAGE_TEMPLATE.format(title=html.escape(note['title']), root='../../', nav=nav, content=content))
+    return note['page']
+
+
+def _note_list(entries, root):
+    items = []
+    for entry in entries:
+        date_label = f"{entry['date'][:4]}-{entry['date'][4:6]}-{entry['date'][6:]}" if entry['date'] else '--------'
+        items.append(f'<li><span class="date">{date_label}</span>'
+                     f'<a href="{root}{_href(entry["page"])}">{html.escape(entry["title"])}</a></li>')
+    return '<ul class="notes">\n' + '\n'.join(items) + '\n</ul>'
+
+
+def _write_page(site_dir, page, title, root, content):
+    page_path = os.path.join(site_dir, page)
+    os.makedirs(os.path.dirname(page_path) or site_dir, exist_ok=True)
+    nav = f'<a href="{root}index.html">首页</a>'
+    with open(page_path, 'w', encoding='utf-8') as f:
+        f.write(PAGE_TEMPLATE.format(title=html.escape(title), root=root, nav=nav, content=content))
+
+
+def _signature(data):
+    return hashlib.blake2b(json.dumps(data, ensure_ascii=False).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def build_index_pages(entries):
+    """
+    根据所有笔记的清单计算每个索引页的内容和签名
+
+    Returns:
+        dict: 页面路径 -> (标题, 相对根目录前缀, 成员, 签名)
+    """
+    by_folder = {}
+    by_month = {}
+    for entry in entries:
+        by_folder.setdefault(entry['folder'], []).append(entry)
+        by_month.setdefault(month_of(entry['date']), []).append(entry)
+
+    pages = {}
+    for folder, members in by_folder.items():
+        members.sort(key=lambda e: (e['date'], e['title']), reverse=True)
+        listing = [(e['date'], e['title'], e['page']) for e in members]
+        pages[folder_page(folder)] = (f'{folder}（{len(members)} 篇）', '../', members, _signature(listing))
+    for month, members in by_month.items():
+        members.sort(key=lambda e: (e['date'], e['folder'], e['title']))
+        listing = [(e['date'], e['title'], e['page']) for e in members]
+        pages[month_page(month)] = (f'{month}（{len(members)} 篇）', '../', members, _signature(listing))
+
+    folder_counts = sorted((folder, len(members)) for folder, members in by_folder.items())
+    month_counts = sorted(((month, len(members)) for month, members in by_month.items()), reverse=True)
+    pages['index.html'] = ('笔记', '', (folder_counts, month_counts), _signature([folder_counts, month_counts]))
+    return pages
+
+
+def _render_index(site_dir, page, title, root, members):
+    if page == 'index.html':
+        folder_counts, month_counts = members
+        content = '<h1>笔记</h1>\n<h2>分类</h2>\n<ul>\n' + '\n'.join(
+            f'<li><a href="{_href(folder_page(folder))}">{html.escape(folder)}</a> {count} 篇</li>'
+            for folder, count in folder_counts) + '\n</ul>\n<h2>按月</h2>\n<ul>\n' + '\n'.join(
+            f'<li><a href="{_href(month_page(month))}">{month}</a> {count} 篇</li>'
+            for month, count in month_counts) + '\n</ul>'
+    else:
+        content = f'<h1>{html.escape(title)}</h1>\n' + _note_list(members, root)
+    _write_page(site_dir, page, title, root, content)
+
+
+def load_manifest(site_dir):
+    path = os.path.join(site_dir, MANIFEST_NAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(site_dir, manifest):
+    path = os.path.join(site_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    # json.dumps走C实现，比逐块写文件的json.dump快得多
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(manifest, ensure_ascii=False))
+    os.replace(tmp_path, path)
+
+
+def build_site(sources, site_dir, assets_dir=None, workers=None, force=False):
+    """
+    增量构建静态网站
+
+    Args:
+        sources: [(分类名, 输入路径), ...]
+        site_dir: 网站输出目录
+        assets_dir: 资源引用（附件/...）所相对的目录，默认为网站目录的上一级（即 笔记导出/）
+        workers: 渲染进程数，默认CPU核数
+        force: 忽略清单，全部重新渲染
+
+    Returns:
+        dict: 笔记总数、渲染/删除的笔记页数、渲染/删除的索引页数
+    """
+    os.makedirs(site_dir, exist_ok=True)
+    if assets_dir is None:
+        assets_dir = os.path.dirname(os.path.abspath(site_dir))
+    # 笔记页位于 notes/<分类>/ 下，资源路径相对于它计算
+    assets_prefix = os.path.relpath(assets_dir, os.path.join(os.path.abspath(site_dir), 'notes', '_')).replace(os.sep, '/') + '/'
+
+    manifest = {} if force else load_manifest(site_dir)
+    if manifest.get('version') != SITE_VERSION or manifest.get('assets_prefix') != assets_prefix:
+        manifest = {}
+    old_notes = manifest.get('notes', {})
+    old_indexes = manifest.get('indexes', {})
+
+    # 1. 读取所有笔记，按内容哈希找出需要渲染的笔记
+    # 未变化的笔记不保留正文；同名笔记以后出现者为准，与分割脚本一致
+    notes = {}
+    pending = {}
+    for folder, source in sources:
+        for note in iter_source_notes(source, folder):
+            digest = note_hash(note, assets_prefix)
+            entry = {key: note[key] for key in ('folder', 'date', 'title', 'page')}
+            entry['hash'] = digest
+            notes[note['id']] = entry
+            pending.pop(note['id'], None)
+            old = old_notes.get(note['id'])
+            if old is None or old['hash'] != digest or not os.path.exists(os.path.join(site_dir, note['page'])):
+                pending[note['id']] = (site_dir, note, assets_prefix)
+    jobs = list(pending.values())
+
+    # 2. 渲染有变化的笔记：数量多时使用进程池
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if len(jobs) >= POOL_MIN_JOBS and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for _ in pool.map(render_note_page, jobs, chunksize=max(1, len(jobs) // (workers * 4))):
+                pass
+    else:
+        for job in jobs:
+            render_note_page(job)
+
+    # 3. 删除已不存在的笔记页面（页面路径改变时旧页面也在此删除）
+    live_pages = {entry['page'] for entry in notes.values()}
+    removed_notes = 0
+    for note_id, old in old_notes.items():
+        if old['page'] not in live_pages:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(site_dir, old['page']))
+            removed_notes += 1
+
+    # 4. 只重写成员签名发生变化的索引页
+    index_pages = build_index_pages(notes.values())
+    rendered_indexes = 0
+    for page, (title, root, members, signature) in index_pages.items():
+        if old_indexes.get(page) != signature or not os.path.exists(os.path.join(site_dir, page)):
+            _render_index(site_dir, page, title, root, members)
+            rendered_indexes += 1
+    removed_indexes = 0
+    for page in old_indexes:
+        if page not in index_pages:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(site_dir, page))
+            removed_indexes += 1
+
+    style_path = os.path.join(site_dir, 'style.css')
+    if not os.path.exists(style_path) or not manifest:
+        with open(style_path, 'w', encoding='utf-8') as f:
+            f.write(STYLE_CSS)
+
+    save_manifest(site_dir, {
+        'version': SITE_VERSION,
+        'assets_prefix': assets_prefix,
+        'notes': notes,
+        'indexes': {page: value[3] for page, value in index_pages.items()},
+    })
+    return {
+        'notes': len(notes),
+        'rendered_notes': len(jobs),
+        'removed_notes': removed_notes,
+        'rendered_indexes': rendered_indexes,
+        'removed_indexes': removed_indexes,
+    }
+
+
+def parse_source(arg):
+    """
+    解析命令行输入：分类名=路径 或 路径（分类名取合集名或目录/归档名）
+    """
+    if '=' in arg and not os.path.exists(arg):
+        folder, path = arg.split('=', 1)
+        return folder, path
+    if os.path.isdir(arg) or zipfile.is_zipfile(arg) or tarfile.is_tarfile(arg):
+        name = os.path.basename(os.path.normpath(arg))
+        for suffix in ('.tar.gz', '.zip'):
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+        return name, arg
+    return collection_name(arg), arg
+
+
+def default_sources(notes_dir):
+    for name in ("分割后的笔记", "分割后的笔记.zip", "分割后的笔记.tar.gz"):
+        path = os.path.join(notes_dir, name)
+        if os.path.exists(path):
+            return [parse_source(path)]
+    return [(collection_name(path), path) for path in list_collection_files(notes_dir)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="由分割后的笔记或合集增量生成静态网站")
+    parser.add_argument("sources", nargs="*", help="分割结果（目录/zip/tar.gz）或合集文件，可写为 分类名=路径")
+    parser.add_argument("--output", default=os.path.join("笔记导出", "网站"), help="网站输出目录")
+    parser.add_argument("--assets-dir", help="笔记中 附件/... 引用所相对的目录，默认为网站目录的上一级")
+    parser.add_argument("--workers", type=int, help="渲染进程数，默认CPU核数")
+    parser.add_argument("--force", action="store_true", help="忽略清单全部重新渲染")
+    args = parser.parse_args()
+
+    if args.sources:
+        sources = [parse_source(arg) for arg in args.sources]
+    else:
+        notes_dir = os.path.join(os.getcwd(), "笔记导出")
+        sources = default_sources(notes_dir) if os.path.isdir(notes_dir) else []
+    if not sources:
+        print("[警告] 未找到任何输入")
+        exit(0)
+
+    start = time.perf_counter()
+    stats = build_site(sources, args.output, args.assets_dir, args.workers, args.force)
+    elapsed = time.perf_counter() - start
+    print(f"输入: {', '.join(f'{folder}={path}' for folder, path in sources)}")
+    print(f"笔记 {stats['notes']} 篇，渲染 {stats['rendered_notes']} 篇，删除 {stats['removed_notes']} 篇；"
+          f"索引页渲染 {stats['rendered_indexes']} 个，删除 {stats['removed_indexes']} 个")
+    print(f"网站已生成: {os.path.join(args.output, 'index.html')}（耗时 {elapsed:.2f} 秒）")
@@ -1,14 +1,25 @@
+import argparse
 import asyncio
 import json
 import os
+import shutil
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 # 导入Playwright库
 from playwright.async_api import async_playwright, Playwright, Browser, BrowserContext, Page, Frame
 
+from note_cleaner import DROP_EMPTY, NoteCleaner
+from note_collection import COLLECTION_SUFFIX, CollectionWriter
+from note_http_cache import HttpCache
+from in_page_crawler import build_crawler_script, crawl_in_page
+from note_assets import ASSET_URLS_JS, COLLECT_ASSET_URLS_JS, AssetDownloader, AssetStore, format_asset_references
+from page_recycler import DEFAULT_LATENCY_FACTOR, DEFAULT_MEMORY_LIMIT_MB, MemoryWatermark, PageRecycler
+from rate_controller import RateController
+
 # 自定义日志类 - 重定向打印输出到文件
 class Logger:
     _instance = None
@@ -92,19 +103,930 @@ def ensure_export_dir() -> Path:
     return export_dir
 
 # 生成带时间戳的文件名
-def generate_file_name(prefix: str = '日记') -> Path:
-    export_dir = ensure_export_dir()
+def generate_file_name(prefix: str = '日记', export_dir: Optional[Path] = None) -> Path:
+    export_dir = export_dir or ensure_export_dir()
     timestamp = datetime.now().isoformat().replace(':', '-').replace('.', '-')
     return export_dir / f'有道云笔记_{prefix}_{timestamp}.txt'
 
+# 流水线队列容量：限制浏览器阶段领先于清洗/写盘的笔记数量，磁盘变慢时形成背压，避免内存无限增长
+RAW_QUEUE_SIZE = 16
+WRITE_QUEUE_SIZE = 16
+# 并发清洗任务数
+CLEAN_WORKERS = 2
+# 单条笔记的最多读取次数（含首次）
+NOTE_ATTEMPTS = 3
+# 点击后等待编辑器切换到新笔记的超时时间（毫秒）
+NOTE_SWITCH_TIMEOUT = 10000
+# 点击的正是当前已打开的笔记时，编辑器内容不会变化：只短暂等待（可能是同名笔记），超时即按当前内容读取
+ACTIVE_NOTE_SWITCH_TIMEOUT = 2000
+# 判断列表条目是否为编辑器中当前已打开的笔记：条目带选中样式，或条目名称与当前标题相同
+ACTIVE_NOTE_ITEM_JS = '''item => {
+    if (/(^|\\s)(active|selected|current)(\\s|$)/.test(item.className)) return true;
+    const pre = document.querySelector('pre.top-title-placeholder');
+    const nameEl = item.querySelector('.file-name, .title, [class*="name"]');
+    const name = ((nameEl || item).innerText || '').split('\\n')[0].trim();
+    return !!pre && name.length > 0 && pre.textContent.trim() === name;
+}'''
+# 编辑器当前内容的签名：标题 + 正文第一个节点ID，用于判断点击后是否已切换到新笔记
+EDITOR_SIGNATURE_JS = '''() => {
+    const pre = document.querySelector('pre.top-title-placeholder');
+    let nodeId = '';
+    try {
+        const iframe = document.querySelector('#bulb-editor');
+        const span = iframe && iframe.contentDocument
+            && iframe.contentDocument.querySelector('span[data-bulb-node-id]');
+        nodeId = span ? span.getAttribute('data-bulb-node-id') : '';
+    } catch (e) {}
+    return (pre ? pre.textContent : '') + '|' + nodeId;
+}'''
+# 长笔记正文的滚动读取参数：每步滚动后DOM安静 settleMs 毫秒（最多等 maxWaitMs）再读取，
+# 连续 idleSteps 步没有出现新节点ID或已到底部即停止，最多滚动 maxSteps 步
+BODY_CAPTURE_OPTIONS = {'settleMs': 80, 'maxWaitMs': 1000, 'idleSteps': 2, 'maxSteps': 500}
+# 读取正文节点：编辑器可能只渲染可见部分（虚拟列表），因此逐屏向下滚动，
+# 按 data-bulb-node-id 收集节点并保持文档顺序（新节点插在它前面最近一个已读节点之后，
+# 前面没有已读节点时接在末尾），已读过的节点不再重复读取；一屏能放下的笔记不滚动。结束后恢复原滚动位置。
+# 节点会嵌套（如链接span内还有带ID的span，文字相同），只收集最外层的节点
+CAPTURE_BODY_JS = '''async (document, options) => {
+    const selector = 'span[data-bulb-node-id]';
+    const view = document.defaultView;
+    const texts = new Map();
+    const next = new Map();
+    let head = null;
+    let tail = null;
+
+    // 将当前已渲染的节点并入链表，返回新增节点数
+    const merge = () => {
+        let anchor = tail;
+        let added = 0;
+        for (const span of document.querySelectorAll(selector)) {
+            if (span.parentElement && span.parentElement.closest(selector)) continue;
+            const id = span.getAttribute('data-bulb-node-id');
+            if (!texts.has(id)) {
+                texts.set(id, span.textContent);
+                if (anchor === null) {
+                    head = tail = id;
+                    next.set(id, null);
+                } else {
+                    next.set(id, next.get(anchor));
+                    next.set(anchor, id);
+                    if (anchor === tail) tail = id;
+                }
+                added++;
+            }
+            anchor = id;
+        }
+        return added;
+    };
+
+    // 等待DOM连续 settleMs 毫秒没有变化
+    const settle = () => new Promise(resolve => {
+        let timer = null;
+        const finish = () => {
+            observer.disconnect();
+            clearTimeout(timer);
+            clearTimeout(limit);
+            resolve();
+        };
+        const observer = new view.MutationObserver(() => {
+            clearTimeout(timer);
+            timer = setTimeout(finish, options.settleMs);
+        });
+        observer.observe(document.body || document.documentElement,
+                         {childList: true, subtree: true, characterData: true});
+        timer = setTimeout(finish, options.settleMs);
+        const limit = setTimeout(finish, options.maxWaitMs);
+    });
+
+    // 滚动容器：正文节点最近的可滚动祖先，没有时为整个文档
+    const first = document.querySelector(selector);
+    let scroller = document.scrollingElement || document.documentElement;
+    for (let el = first && first.parentElement; el && el !== document.body && el !== document.documentElement;
+         el = el.parentElement) {
+        if (el.scrollHeight > el.clientHeight + 1 && /(auto|scroll)/.test(view.getComputedStyle(el).overflowY)) {
+            scroller = el;
+            break;
+        }
+    }
+
+    const origin = scroller.scrollTop;
+    if (origin > 0) {
+        scroller.scrollTop = 0;
+        await settle();
+    }
+    merge();
+    const stride = Math.max(1, Math.floor(scroller.clientHeight * 0.8));
+    let scrolls = 0;
+    let idle = 0;
+    while (scrolls < options.maxSteps && scroller.scrollTop + scroller.clientHeight < scroller.scrollHeight - 1) {
+        const before = scroller.scrollTop;
+        scroller.scrollTop = before + stride;
+        if (scroller.scrollTop === before) break;
+        scrolls++;
+        await settle();
+        if (merge() > 0) {
+            idle = 0;
+        } else if (++idle >= options.idleSteps) {
+            break;
+        }
+    }
+    if (scroller.scrollTop !== origin) scroller.scrollTop = origin;
+
+    const ids = [];
+    for (let id = head; id !== null; id = next.get(id)) ids.push(id);
+    return {ids: ids, texts: ids.map(id => texts.get(id)), scrolls: scrolls};
+}'''
+# 在编辑器 iframe 中执行的正文读取
+READ_BODY_JS = f'options => ({CAPTURE_BODY_JS})(document, options)'
+
+# 笔记列表条目的选择器（按优先级排序）
+NOTE_ITEM_SELECTORS = [
+    '.list-bd.topNameTag li.list-li.file-item',
+    '.abstract-mode li'
+]
+# 页面内抓取时每次注入脚本处理的笔记数（启用页面回收时改为回收检查的间隔篇数）
+IN_PAGE_CHUNK = 50
+
+# 将列表中的日期文本（如 "2025.10.25"）转换为 "20251025"，无法识别时返回空字符串
+def parse_file_date(date_text: str) -> str:
+    cleaned_date = date_text.strip() if date_text else ''
+    if '.' in cleaned_date:
+        parts = cleaned_date.split('.')
+        if len(parts) == 3:
+            year, month, day = parts
+            # 确保月和日是两位数
+            return f'{year}{month.zfill(2)}{day.zfill(2)}'
+    return ''
+
+# 浏览器阶段：点击一个笔记条目并读取原始标题和段落文本，不做任何后处理
+# 编辑器内容未发生变化时记为失败（避免把上一篇笔记当作本篇写出），由重试和补漏阶段处理；
+# 点击的正是当前已打开的笔记时除外
+async def read_raw_note(page: Page, item, index: int, rate: RateController,
+                        collect_assets: bool = False) -> Dict[str, Any]:
+    raw: Dict[str, Any] = {
+        'index': index,
+        'file_date': '',
+        'title': None,
+        'spans': None,
+        'node_ids': None,
+        'label': None,
+        'error': None,
+        'latency': None,
+        'captured_at': None,
+    }
+    print('---')
+    print('🔸 准备点击一个 li 元素')
+    # 先获取li中的file-date元素的日期
+    try:
+        date_text = await item.locator('span.file-date').first.inner_text(timeout=2000)
+        raw['file_date'] = parse_file_date(date_text)
+    except Exception:
+        # 静默失败，不打印大量错误信息
+        pass
+
+    # 1. 点击这个 li（由速率控制器决定点击节奏）
+    signature_before = await page.evaluate(EDITOR_SIGNATURE_JS)
+    try:
+        already_open = await item.evaluate(ACTIVE_NOTE_ITEM_JS, timeout=2000)
+    except Exception:
+        already_open = False
+    await rate.acquire()
+    click_started = time.monotonic()
+    try:
+        await item.click(timeout=10000)
+        print('✅ 点击成功')
+    except Exception as e:
+        print(f'❌ 发生错误: {e}')
+        raw['error'] = '点击失败'
+        return raw
+    # 等待编辑器切换到新笔记，取代固定等待，同时得到本次点击的延迟
+    try:
+        await page.wait_for_function(f'before => ({EDITOR_SIGNATURE_JS})() !== before', arg=signature_before,
+                                     timeout=ACTIVE_NOTE_SWITCH_TIMEOUT if already_open else NOTE_SWITCH_TIMEOUT)
+    except Exception:
+        if already_open:
+            print('ℹ️  点击的是当前已打开的笔记，按当前内容读取')
+        else:
+            print('⚠️  笔记内容未切换')
+            raw['error'] = '笔记内容未切换'
+            return raw
+    raw['latency'] = time.monotonic() - click_started
+
+    # 2. 等待 iframe 加载
+    iframe_el = await page.query_selector('#bulb-editor')
+    if not iframe_el:
+        print('❌ 未找到 iframe（#bulb-editor）')
+        raw['label'] = '未找到 iframe'
+        raw['error'] = raw['label']
+        return raw
+
+    # 3. 获取 iframe 的 frame 对象
+    frame = await iframe_el.content_frame()
+    if not frame:
+        print('❌ 无法获取 iframe 的 contentFrame')
+        raw['label'] = '未获取到 iframe 上下文'
+        raw['error'] = raw['label']
+        return raw
+
+    try:
+        # 4. 等待 iframe 内的输入框出现
+        await page.wait_for_selector('pre.top-title-placeholder', timeout=5000)
+
+        # 5. 获取标题
+        pre_el = await page.query_selector('pre.top-title-placeholder')
+        if pre_el:
+            raw['title'] = await pre_el.text_content()
+        else:
+            print('❌ 在 iframe 中未找到 input 元素')
+            raw['label'] = '未找到输入框（iframe内未找到）'
+            raw['error'] = raw['label']
+
+        # 6. 读取正文所有带节点ID的span文本（保持文档顺序，长笔记滚动读取），清洗交给后续阶段
+        body = await frame.evaluate(READ_BODY_JS, BODY_CAPTURE_OPTIONS)
+        raw['spans'] = body['texts']
+        raw['node_ids'] = body['ids']
+        if body['scrolls']:
+            print(f'📜 长笔记滚动读取 {body["scrolls"]} 次，共 {len(body["ids"])} 个节点')
+        raw['captured_at'] = time.monotonic()
+        if collect_assets:
+            # 只收集资源地址，下载由后续阶段完成
+            raw['assets'] = await frame.evaluate(ASSET_URLS_JS)
+    except Exception as err:
+        print(f'❌ 在 iframe 中等待输入框超时或出错：{err}')
+        raw['label'] = '未找到输入框（iframe内等待超时）'
+        raw['error'] = raw['label']
+    return raw
+
+# 读取一条笔记，失败时按退避时间重试，成功与否都反馈给速率控制器
+async def read_note_with_retry(page: Page, item, index: int, rate: RateController,
+                              collect_assets: bool = False) -> Dict[str, Any]:
+    for attempt in range(1, NOTE_ATTEMPTS + 1):
+        raw = await read_raw_note(page, item, index, rate, collect_assets=collect_assets)
+        if raw['error'] is None:
+            rate.record_success(raw['latency'])
+            return raw
+        rate.record_failure()
+        if attempt < NOTE_ATTEMPTS:
+            delay = rate.backoff(attempt)
+            print(f'🔁 笔记读取失败（{raw["error"]}），{delay:.1f} 秒后重试（{attempt}/{NOTE_ATTEMPTS - 1}）')
+            await asyncio.sleep(delay)
+    return raw
+
+# 将页面内抓取脚本送回的记录转换为与 read_raw_note 相同结构的原始笔记
+def in_page_raw_note(record: Dict[str, Any], index: int) -> Dict[str, Any]:
+    raw: Dict[str, Any] = {
+        'index': index,
+        'file_date': parse_file_date(record['file_date']),
+        'title': record['title'],
+        'spans': record['spans'],
+        'node_ids': record['node_ids'],
+        'label': record['label'],
+        'error': record['error'],
+        'latency': record['latency'],
+        'captured_at': time.monotonic() if record['error'] is None else None,
+    }
+    if 'assets' in record:
+        raw['assets'] = record['assets']
+    return raw
+
+# 占位笔记：让写入任务跳过留待补漏的序号
+def skipped_note(index: int) -> Dict[str, Any]:
+    return {'index': index, 'file_date': '', 'title': None, 'spans': None, 'label': None}
+
+# 清洗阶段：将原始笔记整理为导出文本块（标题行 + 清洗后的正文）
+# 读取阶段已按节点ID去重（只收集最外层节点），正文中文字相同的行是笔记本身的内容，不再按文本去重
+def clean_note(raw: Dict[str, Any]) -> Dict[str, Any]:
+    block = ''
+    body = ''
+    label = raw['label']
+    counted = False
+    val = raw['title']
+    file_date = raw['file_date']
+    if file_date:
+        print(f'📅 获取到的文件日期: {file_date}')
+    if val is not None:
+        print(f'📝 获取到的输入框值: {val}')
+        # 如果有日期信息，添加到标题中
+        if file_date:
+            block += f'###标题###[{val}] [最后修改时间{file_date}] \n\n'
+            print(f'📝 标题已添加日期信息: {val} [最后修改时间{file_date}]')
+        else:
+            block += f'###标题###[{val}] \n\n'
+        counted = True
+        label = val
+
+    spans = raw['spans']
+    if spans is not None:
+        bulb_spans_selector = 'span[data-bulb-node-id]'
+        if len(spans) > 0:
+            print(f'✅ 使用选择器 "{bulb_spans_selector}" 找到 {len(spans)} 个带data-bulb-node-id属性的span元素')
+        else:
+            print(f'❌ 使用选择器 "{bulb_spans_selector}" 未找到任何元素')
+
+        all_text_parts = []
+        # 单遍清洗：只丢弃整段恰为界面文字的段落（脚本残留规则会误伤技术笔记，不用于编辑器正文）
+        cleaner = NoteCleaner(dedupe=False)
+        for span_text in spans:
+            trimmed, reason = cleaner.clean_paragraph(span_text)
+            if trimmed is None:
+                if reason != DROP_EMPTY:
+                    print(f'🧹 过滤段落（{reason}）: {span_text.strip()[:50]}')
+                continue
+            all_text_parts.append(trimmed)
+            print(f'📝 添加文本片段: {trimmed[:50]}...' if len(trimmed) > 50 else f'📝 添加文本片段: {trimmed}')
+
+        combined_text = '\n\n'.join(all_text_parts)
+        print(f'🔗 拼接后的全文内容:\n {combined_text}')
+        block += combined_text + '\n\n'
+        body = combined_text
+
+    # 除导出文本块外，同时保留结构化字段，供流式处理（见 pipeline_runner.py）直接使用
+    return {'index': raw['index'], 'block': block, 'counted': counted, 'label': label,
+            'title': val, 'file_date': file_date, 'body': body, 'captured_at': raw.get('captured_at')}
+
+# 笔记后处理流水线
+class NotePipeline:
+    """
+    浏览器阶段只通过 put() 投递原始笔记，清洗/去重/日志由多个清洗任务并发完成，
+    写盘由单独的写入任务按原始顺序追加到正文临时文件。
+    两级队列均有界：磁盘或清洗变慢时 put() 会等待，浏览器不会无限领先。
+    传入downloader时，清洗任务同时下载笔记中的图片/附件，并在正文末尾引用本地文件。
+    传入sink时，写入任务每写完一条笔记就按顺序将其交给sink；body_path为None时不写正文文件。
+    """
+
+    def __init__(self, body_path: Optional[Path], clean_workers: int = CLEAN_WORKERS,
+                 downloader: Optional[AssetDownloader] = None,
+                 sink: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None):
+        self.body_path = body_path
+        # 资源引用路径相对于导出目录
+        self.export_dir = body_path.parent if body_path else ensure_export_dir()
+        self.sink = sink
+        self.clean_workers = clean_workers
+        self.downloader = downloader
+        self.raw_queue: asyncio.Queue = asyncio.Queue(maxsize=RAW_QUEUE_SIZE)
+        self.write_queue: asyncio.Queue = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self.output_values: List[str] = []
+        self.processed_count = 0
+        self.total_content_length = 0
+        self.line_count = 1
+        self._body_file = None
+        self._cleaners: List[asyncio.Task] = []
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self) -> 'NotePipeline':
+        if self.body_path:
+            self._body_file = open(self.body_path, 'w', encoding='utf-8')
+        self._cleaners = [asyncio.create_task(self._clean_worker()) for _ in range(self.clean_workers)]
+        self._writer = asyncio.create_task(self._write_worker())
+        return self
+
+    async def put(self, raw: Dict[str, Any]):
+        # 写入任务异常退出时立即抛出，避免浏览器阶段在已满的队列上永久等待
+        put_task = asyncio.ensure_future(self.raw_queue.put(raw))
+        done, _ = await asyncio.wait({put_task, self._writer}, return_when=asyncio.FIRST_COMPLETED)
+        if put_task not in done:
+            put_task.cancel()
+            self._writer.result()
+            raise RuntimeError('写入任务已提前结束')
+
+    async def _clean_worker(self):
+        while True:
+            raw = await self.raw_queue.get()
+            if raw is None:
+                return
+            try:
+                # 在线程中清洗，事件循环可继续处理浏览器消息
+                note = await asyncio.to_thread(clean_note, raw)
+            except Exception as err:
+                print(f'⚠️  清洗笔记时出错: {err}')
+                note = {'index': raw['index'], 'block': '', 'counted': False, 'label': raw['label'],
+                        'title': None, 'file_date': '', 'body': '', 'captured_at': None}
+            assets = raw.get('assets')
+            if self.downloader and assets and note['block']:
+                # 附件出错只丢弃引用，不影响已清洗的正文
+                try:
+                    paths = await self.downloader.fetch_all([asset['url'] for asset in assets])
+                    references = format_asset_references(assets, paths, self.export_dir)
+                except Exception as err:
+                    print(f'⚠️  下载附件时出错，保留正文: {err}')
+                else:
+                    note['block'] += references
+                    note['body'] = f"{note['body']}\n\n{references.strip()}" if note['body'] else references.strip()
+            await self.write_queue.put(note)
+
+    def _append(self, note: Dict[str, Any]):
+        if note['label'] is not None:
+            self.output_values.append(note['label'])
+        if note['counted']:
+            self.processed_count += 1
+        block = note['block']
+        if block:
+            if self._body_file:
+                self._body_file.write(block)
+            self.total_content_length += len(block)
+            self.line_count += block.count('\n')
+
+    async def _write_worker(self):
+        # 清洗并发完成的顺序不确定，按index重排后再写入，保证导出顺序与列表一致
+        pending: Dict[int, Dict[str, Any]] = {}
+        next_index = 0
+        while True:
+            note = await self.write_queue.get()
+            if note is None:
+                break
+            pending[note['index']] = note
+            while next_index in pending:
+                await self._emit(pending.pop(next_index))
+                next_index += 1
+        # 收尾：写出剩余（index不连续时）的笔记
+        for index in sorted(pending):
+            await self._emit(pending[index])
+
+    async def _emit(self, note: Dict[str, Any]):
+        await asyncio.to_thread(self._append, note)
+        if self.sink and note['counted']:
+            await self.sink(note)
+
+    async def _unless_writer_died(self, awaitable) -> bool:
+        # 等待awaitable完成；写入任务先结束时取消它并返回False
+        task = asyncio.ensure_future(awaitable)
+        await asyncio.wait({task, self._writer}, return_when=asyncio.FIRST_COMPLETED)
+        if task.done():
+            task.result()
+            return True
+        task.cancel()
+        return False
+
+    async def _stop_cleaners(self):
+        for _ in self._cleaners:
+            await self.raw_queue.put(None)
+        await asyncio.gather(*self._cleaners)
+
+    async def close(self):
+        try:
+            # 写入任务已异常退出时，两级队列可能都已满、清洗任务卡在写入队列上，发送结束标记会永久等待
+            if (not self._writer.done() and await self._unless_writer_died(self._stop_cleaners())
+                    and await self._unless_writer_died(self.write_queue.put(None))):
+                await self._writer
+                return
+            for task in self._cleaners:
+                task.cancel()
+            await asyncio.gather(*self._cleaners, return_exceptions=True)
+            self._writer.result()
+            raise RuntimeError('写入任务已提前结束')
+        finally:
+            if self._body_file:
+                self._body_file.close()
+
+# 生成导出文件的汇总头部
+def build_export_header(prefix: str, processed_count: int) -> str:
+    header = f'# 有道云笔记 - {prefix}内容汇总\n\n'
+    header += f'导出时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}\n\n'
+    header += f'导出条目数: {processed_count}\n\n'
+    header += '==================================\n\n'
+    return header
+
+# 将汇总头部与流水线写出的正文拼接为最终导出文件，.ncz后缀时写为分帧压缩合集
+def assemble_export_file(output_file: Path, body_path: Path, header: str):
+    if output_file.suffix == COLLECTION_SUFFIX:
+        with CollectionWriter(output_file) as writer, open(body_path, 'r', encoding='utf-8') as body:
+            writer.write(header)
+            for chunk in iter(lambda: body.read(1 << 16), ''):
+                writer.write(chunk)
+            writer.write('\n\n')
+        return
+    with open(output_file, 'w', encoding='utf-8') as out:
+        out.write(header)
+        with open(body_path, 'r', encoding='utf-8') as body:
+            shutil.copyfileobj(body, out)
+        out.write('\n\n')
+
+# 滚动笔记列表，确保所有条目都已加载
+async def scroll_note_list(page: Page, scroll_iterations: int = 10):
+    print('\n🔄 正在滚动页面加载更多内容...')
+    for i in range(scroll_iterations):
+        # 改进的滚动策略：先到底部，再回到顶部，再到底部
+        result = await page.evaluate('''() => {
+            const scrollableContainer = document.querySelector('.list-bd.topNameTag');
+            if (scrollableContainer) {
+                scrollableContainer.scrollTop = scrollableContainer.scrollHeight;
+                return '⏳ topNameTag 成功获取可滚动容器并滚动';
+            } else {
+                return '❌ topNameTag 未找到可滚动容器';
+            }
+        }''')
+        print(result)
+
+        result = await page.evaluate('''() => {
+            const scrollableContainer = document.querySelector('.list-bd.noItemNum');
+            if (scrollableContainer) {
+                scrollableContainer.scrollTop = scrollableContainer.scrollHeight;
+                return '⏳ noItemNum 成功获取可滚动容器并滚动';
+            } else {
+                return '❌ noItemNum 未找到可滚动容器';
+            }
+        }''')
+        print(result)
+
+        # 增加等待时间，确保内容充分加载
+        await page.wait_for_timeout(1000)
+    print('✅ 页面滚动完成')
+
+# 查找当前页面中所有笔记条目
+async def find_note_items(page: Page) -> list:
+    list_items = []
+    for selector in NOTE_ITEM_SELECTORS:
+        print(f' 使用选择器 "{selector}" 找 li 元素')
+        list_items = await page.locator(selector).all()
+        if len(list_items) > 0:
+            print(f'✅ 使用选择器 "{selector}" 找到 {len(list_items)} 个 li 元素')
+            break
+        print(f'❌ 使用选择器 "{selector}" 未找到 li 元素')
+
+    if len(list_items) == 0:
+        print('❌ 所有选择器均未找到 li 元素')
+    print(f'✅ 找到 {len(list_items)} 个符合条件的 li 元素')
+    return list_items
+
+# 一次读取列表中所有条目的文本（与 find_note_items 使用相同的选择器），用于回收页面或补漏时找回笔记
+async def read_note_item_texts(page: Page) -> List[str]:
+    for selector in NOTE_ITEM_SELECTORS:
+        texts = await page.locator(selector).evaluate_all('els => els.map(el => el.innerText)')
+        if texts:
+            return texts
+    return []
+
+# 按列表文本在当前列表中找回笔记的位置；claimed 为已被占用的位置（文本相同的条目依次对应），找不到时返回None
+def locate_note_item(texts: List[str], expected: Optional[str], claimed: Optional[set] = None) -> Optional[int]:
+    if expected is None:
+        return None
+    for position, text in enumerate(texts):
+        if text == expected and (claimed is None or position not in claimed):
+            return position
+    return None
+
+# 回收页面并回到笔记列表，返回 (新页面, 新列表条目, 下一篇笔记在新列表中的位置)
+# 按下一篇笔记的列表文本 expected 找回位置（回收期间列表顺序可能变化）；回收失败时继续使用原页面。
+# 新列表中找不到下一篇笔记时（restore 可能没有回到同一个列表）位置为None，调用方不应再按位置继续导出
+async def recycle_note_list(recycler: PageRecycler, reason: str, restore: Callable[[Page], Awaitable[Any]],
+                            list_items: list, next_position: int, expected: Optional[str],
+                            scroll_iterations: int = 10):
+    try:
+        page = await recycler.recycle(reason, restore)
+    except Exception as err:
+        print(f'⚠️  回收页面失败，继续使用原页面: {err}')
+        return recycler.page, list_items, next_position
+    await scroll_note_list(page, scroll_iterations)
+    new_items = await find_note_items(page)
+    texts = await read_note_item_texts(page)
+    if next_position < len(texts) and expected is not None and texts[next_position] == expected:
+        return page, new_items, next_position
+    position = locate_note_item(texts, expected)
+    if position is None:
+        print('❌ 新列表中未找到下一篇笔记，可能未回到同一个列表，剩余笔记留待补漏阶段按列表文本查找')
+        return page, new_items, None
+    print(f'🔎 列表顺序有变化，从新列表第 {position + 1} 条继续')
+    return page, new_items, position
+
+# 导出当前页面笔记列表中的所有笔记，返回输出文件路径（未提取到有效内容时返回None）
+# rate可由多个页面共享，使整个站点的点击节奏统一受控
+# downloader不为空时同时导出笔记中的图片和附件
+# scroll_iterations为加载列表时的滚动次数，每次约等待1秒
+# sink不为空时，每条笔记写出后立即以 {..., 'folder': prefix} 的形式交给sink；
+# write_export为False时不生成合集导出文件（笔记只经由sink流出）
+# recycler不为空时，内存或延迟超过水位线后回收页面：新页面经restore回到本列表（默认重新打开当前URL）后
+# 从下一篇笔记继续，调用方应在导出结束后改用recycler.page
+# in_page为True时整个列表循环在页面内执行（见 in_page_crawler.py），只有失败的笔记在补漏阶段逐条重试
+async def export_note_list(page: Page, prefix: str = '日记',
+                           rate: Optional[RateController] = None,
+                           downloader: Optional[AssetDownloader] = None,
+                           compress: bool = False,
+                           scroll_iterations: int = 10,
+                           sink: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                           write_export: bool = True,
+                           recycler: Optional[PageRecycler] = None,
+                           restore: Optional[Callable[[Page], Awaitable[Any]]] = None,
+                           in_page: bool = False,
+                           export_dir: Optional[Path] = None) -> Optional[Path]:
+    await scroll_note_list(page, scroll_iterations)
+
+    # 逐一点击页面中所有笔记：浏览器阶段与清洗/写盘阶段重叠执行
+    list_items = await find_note_items(page)
+    if recycler is not None and restore is None:
+        list_url = page.url
+
+        async def restore(new_page: Page):
+            await new_page.goto(list_url, timeout=60000, wait_until='domcontentloaded')
+            await new_page.wait_for_timeout(3000)
+    output_file = generate_file_name(prefix, export_dir)
+    if compress:
+        output_file = output_file.with_suffix(COLLECTION_SUFFIX)
+    body_path = output_file.with_name(output_file.name + '.part') if write_export else None
+    note_sink = None
+    if sink is not None:
+        async def note_sink(note: Dict[str, Any]):
+            await sink(dict(note, folder=prefix))
+    pipeline = NotePipeline(body_path, downloader=downloader, sink=note_sink).start()
+    collect_assets = downloader is not None
+    rate = rate or RateController()
+    list_count = len(list_items)
+    # 原列表中每篇笔记的文本：回收页面和补漏阶段都按文本找回笔记，不依赖位置
+    list_texts = await read_note_item_texts(page)
+    if len(list_texts) != list_count:
+        list_texts = [None] * list_count
+    still_failed: List[int] = []
+    start_time = time.time()
+    try:
+        deferred: List[int] = []
+        # 回收页面后新列表相对原列表的偏移
+        offset = 0
+
+        async def defer(index: int, message: str):
+            print(f'⏭️  第 {index + 1} 条笔记{message}，留待补漏阶段处理')
+            deferred.append(index)
+            await pipeline.put(skipped_note(index))
+
+        # 已处理的笔记数：页面内抓取会处理完整个列表，之后的逐条循环不再执行
+        done = 0
+        if in_page:
+            script = build_crawler_script(EDITOR_SIGNATURE_JS, CAPTURE_BODY_JS, COLLECT_ASSET_URLS_JS,
+                                          ACTIVE_NOTE_ITEM_JS)
+            chunk = recycler.check_every if recycler is not None else IN_PAGE_CHUNK
+            print(f'🧩 页面内抓取：每批 {chunk} 篇注入页面执行')
+            while done < list_count:
+                end = min(list_count, done + chunk)
+                received = set()
+
+                async def on_batch(batch: List[Dict[str, Any]], offset: int = offset, received: set = received):
+                    for record in batch:
+                        raw = in_page_raw_note(record, record['position'] - offset)
+                        received.add(raw['index'])
+                        if raw['error'] is None:
+                            rate.record_success(raw['latency'])
+                            await pipeline.put(raw)
+                        else:
+                            rate.record_failure()
+                            await defer(raw['index'], f'页面内读取失败（{raw["error"]}）')
+                        if recycler is not None:
+                            recycler.record(raw['latency'])
+                    print(f'📦 页面内抓取收到 {len(batch)} 篇笔记（{rate.summary()}）')
+                    return rate.interval
+
+                await crawl_in_page(page, script, NOTE_ITEM_SELECTORS, max(done + offset, 0), end + offset,
+                                    on_batch, rate.interval, NOTE_SWITCH_TIMEOUT, collect_assets,
+                                    body_options=BODY_CAPTURE_OPTIONS,
+                                    active_switch_timeout=ACTIVE_NOTE_SWITCH_TIMEOUT)
+                for index in range(done, end):
+                    if index not in received:
+                        await defer(index, '未在页面列表中找到')
+                done = end
+                if recycler is not None and done < list_count:
+                    reason = await recycler.check()
+                    if reason:
+                        page, list_items, next_position = await recycle_note_list(
+                            recycler, reason, restore, list_items, done + offset, list_texts[done],
+                            scroll_iterations)
+                        if next_position is None:
+                            for index in range(done, list_count):
+                                await defer(index, '在回收页面后的列表中找不到')
+                            done = list_count
+                        else:
+                            offset = next_position - done
+
+        for index in range(done, list_count):
+            position = index + offset
+            if not 0 <= position < len(list_items):
+                await defer(index, '在回收页面后的列表中找不到')
+                continue
+            raw = await read_note_with_retry(page, list_items[position], index, rate, collect_assets)
+            if raw['error'] is None:
+                await pipeline.put(raw)
+            else:
+                await defer(index, '多次读取失败')
+            if recycler is None or index + 1 >= list_count:
+                continue
+            recycler.record(raw['latency'])
+            reason = await recycler.check()
+            if reason:
+                page, list_items, next_position = await recycle_note_list(
+                    recycler, reason, restore, list_items, position + 1, list_texts[index + 1], scroll_iterations)
+                if next_position is None:
+                    for remaining in range(index + 1, list_count):
+                        await defer(remaining, '在回收页面后的列表中找不到')
+                    break
+                offset = next_position - (index + 1)
+
+        # 补漏阶段：按原列表文本重新定位列表条目（回收页面后偏移可能已变化），再次重试失败的笔记，结果追加在导出末尾
+        next_index = list_count
+        if deferred:
+            print(f'\n🩹 补漏阶段：重试 {len(deferred)} 条失败的笔记（{rate.summary()}）')
+            list_items = await find_note_items(page)
+            texts = await read_note_item_texts(page)
+            claimed = set()
+            for index in deferred:
+                position = locate_note_item(texts, list_texts[index], claimed)
+                if position is None or position >= len(list_items):
+                    print(f'❌ 列表中已找不到第 {index + 1} 条笔记')
+                    still_failed.append(index)
+                    continue
+                claimed.add(position)
+                raw = await read_note_with_retry(page, list_items[position], next_index, rate, collect_assets)
+                if raw['error'] is not None:
+                    still_failed.append(index)
+                await pipeline.put(raw)
+                next_index += 1
+    finally:
+        await pipeline.close()
+    end_time = time.time()
+
+    processed_count = pipeline.processed_count
+    total_content_length = pipeline.total_content_length
+    print(f'🎉 所有操作完成，获取的输入框值列表: {pipeline.output_values}')
+    print(f'⏱️  速率控制: {rate.summary()}')
+    if recycler is not None:
+        print(f'♻️  {recycler.summary()}')
+    if downloader:
+        print(f'🖼️  图片/附件: {downloader.summary()}')
+    print(f'页面文本获取耗时: {end_time - start_time:.2f} 秒')
+    print(f'📊 页面文本长度: {total_content_length:,} 字符')
+    # 核对提取条数与列表条数
+    if processed_count == list_count and not still_failed:
+        print(f'✅ 条数核对一致：列表 {list_count} 条，成功提取 {processed_count} 条')
+    else:
+        print(f'⚠️  条数核对不一致：列表 {list_count} 条，成功提取 {processed_count} 条')
+        if still_failed:
+            print(f'⚠️  补漏后仍失败的列表序号: {[index + 1 for index in still_failed]}')
+    # 统计信息
+    print(f'   - 原始文本行数: {pipeline.line_count}')
+    if body_path is None:
+        return None
+
+    try:
+        # 保存提取的内容（头部+正文不足100字符视为未提取到有效内容）
+        header = build_export_header(prefix, processed_count)
+        if len(header) + total_content_length + 2 > 100:
+            assemble_export_file(output_file, body_path, header)
+
+            # 最终统计信息
+            print('\n🎉 提取完成！')
+            print('==================================')
+            print(f'✅ 成功提取 {processed_count} 个{prefix}条目')
+            if processed_count > 0:
+                print(f'📊 平均每个条目内容长度: {total_content_length // processed_count} 字符')
+            print(f'📄 输出文件大小: {output_file.stat().st_size // 1024} KB')
+            print(f'📂 内容已保存到: {output_file}')
+            print('==================================')
+            return output_file
+
+        print('\n❌ 未能提取到有效内容')
+
+        # 当没有提取到内容时，尝试替代方法
+        print('\n🔄 尝试替代提取方法...')
+        try:
+            page_text = body_path.read_text(encoding='utf-8')
+            print(f'获取到页面文本内容 (长度: {len(page_text)})')
+            alt_file = generate_file_name(f'{prefix}_替代方法', export_dir)
+            with open(alt_file, 'w', encoding='utf-8') as f:
+                f.write(f'# 页面文本内容\n\n{page_text[:10000]}')
+            print(f'📄 替代内容已保存到: {alt_file}')
+        except Exception as e:
+            print(f'❌ 替代方法也失败: {e}')
+        return None
+    finally:
+        body_path.unlink(missing_ok=True)
+
+# 有道云笔记网页版入口
+NOTEBOOK_URL = 'https://note.youdao.com/web/'
+# 整本抓取时默认同时使用的页面数
+CRAWL_PAGES = 3
+# 笔记列表中文件夹条目的选择器（按优先级排序）
+FOLDER_SELECTORS = [
+    '.list-bd.topNameTag li.list-li.folder-item',
+    '.list-bd.topNameTag li.list-li.dir-item',
+]
+
+# 读取当前列表中的子文件夹名称
+async def list_subfolders(page: Page) -> List[str]:
+    for selector in FOLDER_SELECTORS:
+        names = await page.locator(selector).evaluate_all('''els => els.map(el => {
+            const nameEl = el.querySelector('.file-name, .title, [class*="name"]');
+            return ((nameEl || el).innerText || '').split('\\n')[0].trim();
+        }).filter(name => name.length > 0)''')
+        if names:
+            return names
+    return []
+
+# 从根目录逐级点击进入指定文件夹，folder_path为空元组时停留在根目录
+async def open_folder(page: Page, folder_path: tuple) -> bool:
+    await page.goto(NOTEBOOK_URL, timeout=60000, wait_until='domcontentloaded')
+    await page.wait_for_timeout(3000)
+    for name in folder_path:
+        opened = False
+        for selector in FOLDER_SELECTORS:
+            entry = page.locator(selector).filter(has=page.get_by_text(name, exact=True)).first
+            if await entry.count() > 0:
+                await entry.click(timeout=10000)
+                await page.wait_for_timeout(2000)
+                opened = True
+                break
+        if not opened:
+            print(f'❌ 未找到文件夹: {"/".join(folder_path)}（缺少 "{name}"）')
+            return False
+    return True
+
+# 整本笔记抓取：遍历文件夹树，在有界的页面池中调度各文件夹的导出
+# recycle_options不为空时每个页面各有一个PageRecycler（参数即为这些选项，内存水位线由所有页面共享），
+# 页面回收后经open_folder回到正在导出的文件夹
+async def crawl_notebook(context: BrowserContext, first_page: Page, page_count: int = CRAWL_PAGES,
+                         root_folders: Optional[List[str]] = None,
+                         recycle_options: Optional[Dict[str, Any]] = None,
+                         **export_options) -> Dict[str, Optional[Path]]:
+    print(f'\n🗂️  开始整本笔记抓取（页面池大小: {page_count}）')
+    folder_queue: asyncio.Queue = asyncio.Queue()
+    results: Dict[str, Optional[Path]] = {}
+    # 所有页面共用一个速率控制器，按站点整体承受能力调节点击节奏
+    rate = RateController()
+
+    # 从根目录发现顶层文件夹
+    await open_folder(first_page, ())
+    top_folders = await list_subfolders(first_page)
+    print(f'📁 根目录下发现 {len(top_folders)} 个文件夹: {top_folders}')
+    for name in top_folders:
+        if root_folders is None or name in root_folders:
+            folder_queue.put_nowait((name,))
+    if root_folders:
+        missing = [name for name in root_folders if name not in top_folders]
+        if missing:
+            print(f'⚠️  以下文件夹未在根目录找到: {missing}')
+
+    async def worker(worker_id: int):
+        recycler = PageRecycler(pages[worker_id - 1], **recycle_options) if recycle_options is not None else None
+        while True:
+            folder_path = await folder_queue.get()
+            page = pages[worker_id - 1]
+            # 导出文件沿用 有道云笔记_<文件夹>_<时间戳>.txt 命名，子文件夹以-连接路径
+            prefix = '-'.join(folder_path)
+            try:
+                print(f'\n[页面{worker_id}] 📂 开始导出文件夹: {"/".join(folder_path)}')
+                if not await open_folder(page, folder_path):
+                    results[prefix] = None
+                    continue
+                # 先登记子文件夹，让空闲页面尽早开始
+                for sub in await list_subfolders(page):
+                    folder_queue.put_nowait(folder_path + (sub,))
+
+                async def restore(new_page: Page, path: tuple = folder_path):
+                    if not await open_folder(new_page, path):
+                        raise RuntimeError(f'无法回到文件夹 {"/".join(path)}')
+
+                try:
+                    results[prefix] = await export_note_list(page, prefix, rate, recycler=recycler,
+                                                             restore=restore, **export_options)
+                finally:
+                    if recycler is not None:
+                        pages[worker_id - 1] = recycler.page
+                print(f'[页面{worker_id}] ✅ 文件夹导出完成: {"/".join(folder_path)}')
+            except Exception as err:
+                print(f'[页面{worker_id}] ❌ 导出文件夹 {"/".join(folder_path)} 出错: {err}')
+                results[prefix] = None
+            finally:
+                folder_queue.task_done()
+
+    pages = [first_page] + [await context.new_page() for _ in range(max(page_count, 1) - 1)]
+    workers = [asyncio.create_task(worker(i + 1)) for i in range(len(pages))]
+    try:
+        await folder_queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for extra_page in pages[1:]:
+            await extra_page.close()
+
+    print('\n🗂️  整本笔记抓取完成:')
+    for prefix, output_file in results.items():
+        print(f'  - {prefix}: {output_file if output_file else "未导出"}')
+    return results
+
 # 主提取函数
-async def extract_notes():
+# sink / write_export 原样传给 export_note_list，用于把笔记直接流入后续处理阶段
+# in_page为True时使用页面内批量抓取（见 export_note_list）
+# recycle为True时按内存水位线（MB，0表示不看内存）、延迟倍数（0表示不看延迟）和定期篇数（0表示不限）回收页面
+async def extract_notes(crawl: bool = False, crawl_pages: int = CRAWL_PAGES,
+                        folders: Optional[List[str]] = None, assets: bool = False,
+                        compress: bool = False,
+                        http_cache: bool = False,
+                        sink: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                        write_export: bool = True, recycle: bool = True,
+                        recycle_memory_mb: float = DEFAULT_MEMORY_LIMIT_MB,
+                        recycle_latency: float = DEFAULT_LATENCY_FACTOR, recycle_every: int = 0,
+                        in_page: bool = False):
     print('🚀 开始有道云笔记日记提取...')
     print('==================================')
 
     browser: Optional[Browser] = None
     context: Optional[BrowserContext] = None
     page: Optional[Page] = None
+    cache: Optional[HttpCache] = None
     cookie_path = Path(__file__).parent / 'cookies.json'
 
     try:
@@ -123,6 +1045,12 @@ async def extract_notes():
                 viewport={'width': 1920, 'height': 880},
                 user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36'
             )
+
+            # 笔记正文和静态资源走磁盘缓存，重复导出时只传输有变化的内容
+            if http_cache:
+                cache = HttpCache(Path(__file__).parent / '.http_cache')
+                await cache.attach(context)
+                print(f'🗄️  已启用HTTP响应缓存: {cache.cache_dir}（{len(cache.entries)} 条）')
             
             cookies = None
             # 尝试加载保存的cookies
@@ -144,7 +1072,7 @@ async def extract_notes():
             # 导航到有道云笔记网页版
             print('🌐 导航到有道云笔记...')
             # 增加超时时间到60秒，并使用wait_until='domcontentloaded'以更早加载
-            await page.goto('https://note.youdao.com/web/', timeout=60000, wait_until='domcontentloaded')
+            await page.goto(NOTEBOOK_URL, timeout=60000, wait_until='domcontentloaded')
             print('✅ 已打开有道云笔记网页版')
 
             # 等待一段时间让页面加载
@@ -154,8 +1082,9 @@ async def extract_notes():
                 # 等待用户登录和导航到日记文件夹
                 print('\n📝 请按照以下步骤操作:')
                 print('1. 在打开的浏览器窗口中完成登录')
-                print('2. 成功登录后，手动导航到"日记"文件夹')
-                print('3. 确保所有日记条目都显示在页面上')
+                if not crawl:
+                    print('2. 成功登录后，手动导航到"日记"文件夹')
+                    print('3. 确保所有日记条目都显示在页面上')
                 print('\n⏳ 请等待40秒完成上述操作...')
                 # 等待40秒让用户完成登录和导航
                 print('正在等待用户登录...')
@@ -173,6 +1102,33 @@ async def extract_notes():
                 # 给已登录的页面一些加载时间
                 await page.wait_for_timeout(10000)
 
+            # 图片/附件通过已登录上下文的 context.request 下载，按内容哈希存入 笔记导出/附件/
+            downloader = None
+            if assets:
+                downloader = AssetDownloader(context.request, AssetStore(ensure_export_dir() / '附件'))
+
+            # 每个文件夹导出时共用的选项
+            export_options = {
+                'downloader': downloader,
+                'compress': compress,
+                'sink': sink,
+                'write_export': write_export,
+                'in_page': in_page,
+            }
+
+            # 页面回收选项：浏览器内存水位线由所有页面共享
+            recycle_options = None
+            if recycle:
+                recycle_options = {
+                    'watermark': MemoryWatermark(recycle_memory_mb) if recycle_memory_mb else None,
+                    'latency_factor': recycle_latency,
+                    'max_notes': recycle_every,
+                }
+
+            if crawl:
+                await crawl_notebook(context, page, crawl_pages, folders, recycle_options, **export_options)
+                return
+
             # 检查当前页面状态
             current_url = page.url
             page_title = await page.title()
@@ -193,246 +1149,12 @@ async def extract_notes():
             else:
                 print('✅ 检测到笔记元素，继续提取...')
 
-            # 一、添加页面滚动逻辑以确保内容完全加载
-            print('\n🔄 正在滚动页面加载更多内容...')
-            scroll_iterations = 10
-            unique_contents = set()
-            no_update_count = 0
-            MAX_NO_UPDATES = 3
-
-            for i in range(scroll_iterations):
-                # 改进的滚动策略：先到底部，再回到顶部，再到底部
-                result = await page.evaluate('''() => {
-                    const scrollableContainer = document.querySelector('.list-bd.topNameTag');
-                    if (scrollableContainer) {
-                        scrollableContainer.scrollTop = scrollableContainer.scrollHeight;
-                        return '⏳ topNameTag 成功获取可滚动容器并滚动';
-                    } else {
-                        return '❌ topNameTag 未找到可滚动容器';
-                    }
-                }''')
-                print(result)
-                
-                result = await page.evaluate('''() => {
-                    const scrollableContainer = document.querySelector('.list-bd.noItemNum');
-                    if (scrollableContainer) {
-                        scrollableContainer.scrollTop = scrollableContainer.scrollHeight;
-                        return '⏳ noItemNum 成功获取可滚动容器并滚动';
-                    } else {
-                        return '❌ noItemNum 未找到可滚动容器';
-                    }
-                }''')
-                print(result)
-
-                # 增加等待时间，确保内容充分加载
-                await page.wait_for_timeout(1000)
-
-            print(f'✅ 页面滚动完成，已加载内容样本数: {len(unique_contents)}')
-
-            # 二、逐一点击页面中所有笔记
-            # 定义可能的选择器（按优先级排序）
-            SELECTORS = [
-                '.list-bd.topNameTag li.list-li.file-item',
-                '.abstract-mode li'
-            ]
-            
-            paragraphs = []
-            for selector in SELECTORS:
-                print(f' 使用选择器 "{selector}" 找 li 元素')
-                list_items = await page.locator(selector).all()
-                if len(list_items) > 0:
-                    print(f'✅ 使用选择器 "{selector}" 找到 {len(list_items)} 个 li 元素')
-                    break
-                print(f'❌ 使用选择器 "{selector}" 未找到 li 元素')
-            
-            if len(list_items) == 0:
-                print('❌ 所有选择器均未找到 li 元素')
-            # 不再重新查找，直接使用之前找到的元素列表
-            print(f'✅ 找到 {len(list_items)} 个符合条件的 li 元素')
-            output_values = []
-            content = ""
-            processed_count = 0
-            total_content_length = 0
-            
-            for item in list_items:
-                print('---')
-                print('🔸 准备点击一个 li 元素')
-                # 先获取li中的file-date元素的日期
-                file_date = ''
-                try:
-                    # 优化日期获取逻辑，使用更高效的方式
-                    # 尝试使用更直接的方式获取日期文本
-                    date_text = await item.locator('span.file-date').first.inner_text(timeout=2000)
-                    if date_text:
-                        # 清理日期文本并转换格式
-                        cleaned_date = date_text.strip()
-                        # 将 "2025.10.25" 格式转换为 "20251025"
-                        if '.' in cleaned_date:
-                            parts = cleaned_date.split('.')
-                            if len(parts) == 3:
-                                year, month, day = parts
-                                # 确保月和日是两位数
-                                month = month.zfill(2)
-                                day = day.zfill(2)
-                                file_date = f'{year}{month}{day}'
-                        if file_date:
-                            print(f'📅 获取到的文件日期: {file_date}')
-                except Exception:
-                    # 简化错误处理，只在遇到问题时简要记录
-                    pass  # 静默失败，不打印大量错误信息
-                
-                # 1. 点击这个 li
-                try:
-                    # 设置较短的超时时间，并添加错误处理
-                    await item.click(timeout=10000)
-                    print('✅ 点击成功')
-                    # 增加等待时间，确保内容充分加载
-                    await page.wait_for_timeout(1000)
-                except Exception as e:
-                    print(f'❌ 发生错误: {e}')
-                    # 记录错误但仍然继续执行，不会跳过这个文件
-                    print('ℹ️  点击失败但将继续尝试后续操作')
-                    # 即使点击失败，也等待一段时间再继续
-                    await page.wait_for_timeout(500)
-
-                # 2. 等待 iframe 加载
-                iframe_el = await page.query_selector('#bulb-editor')
-                if not iframe_el:
-                    print('❌ 未找到 iframe（#bulb-editor）')
-                    output_values.append('未找到 iframe')
-                    continue
-                
-                # 3. 获取 iframe 的 frame 对象
-                frame = await iframe_el.content_frame()
-                if not frame:
-                    print('❌ 无法获取 iframe 的 contentFrame')
-                    output_values.append('未获取到 iframe 上下文')
-                    continue
-                
-                try:
-                    # 4. 等待 iframe 内的输入框出现
-                    await page.wait_for_selector('pre.top-title-placeholder', timeout=5000)
-
-                    # 5. 获取标题
-                    pre_el = await page.query_selector('pre.top-title-placeholder')
-                    if pre_el:
-                        val = await pre_el.text_content()
-                        print(f'📝 获取到的输入框值: {val}')
-                        # 如果有日期信息，添加到标题中
-                        if file_date:
-                            content += f'###标题###[{val}] [最后修改时间{file_date}] \n\n'
-                            print(f'📝 标题已添加日期信息: {val} [最后修改时间{file_date}]')
-                        else:
-                            content += f'###标题###[{val}] \n\n'
-                        processed_count += 1
-                        output_values.append(val)
-                    else:
-                        print('❌ 在 iframe 中未找到 input 元素')
-                        output_values.append('未找到输入框（iframe内未找到）')
-                    
-                    # 6. 找到正文所有段落
-                    # 首先尝试使用复合选择器同时获取两种段落元素并保持DOM顺序
-                    # 复合选择器会匹配所有符合任一条件的元素，并按它们在DOM中的出现顺序返回
-                    all_paragraphs = []
-                    
-                    # 使用span[data-bulb-node-id]选择器获取所有带节点ID的span元素
-                    bulb_spans_selector = 'span[data-bulb-node-id]'
-                    all_spans = await frame.locator(bulb_spans_selector).all()
-                    
-                    if len(all_spans) > 0:
-                        print(f'✅ 使用选择器 "{bulb_spans_selector}" 找到 {len(all_spans)} 个带data-bulb-node-id属性的span元素')
-                    else:
-                        print(f'❌ 使用选择器 "{bulb_spans_selector}" 未找到任何元素')
-                    
-                    all_text_parts = []
-                    # 用于去重的集合
-                    seen_texts = set()
-                    
-                    for span in all_spans:
-                        try:
-                            # 获取span元素的文本内容
-                            span_text = await span.text_content()
-                            trimmed = span_text.strip() if span_text else ''
-                            
-                            # 确保文本不为空、不是只有点号，并且没有重复
-                            if trimmed and trimmed != '.' and trimmed not in seen_texts:
-                                all_text_parts.append(trimmed)
-                                seen_texts.add(trimmed)
-                                print(f'📝 添加文本片段: {trimmed[:50]}...' if len(trimmed) > 50 else f'📝 添加文本片段: {trimmed}')
-                        except Exception as e:
-                            print(f'⚠️  处理span元素时出错: {e}')
-                            # 出错时的最终后备方案
-                            try:
-                                span_text = await span.text_content()
-                                trimmed = span_text.strip() if span_text else ''
-                                if trimmed and trimmed != '.' and trimmed not in seen_texts:
-                                    all_text_parts.append(trimmed)
-                                    seen_texts.add(trimmed)
-                            except:
-                                pass
-                    
-                    combined_text = '\n\n'.join(all_text_parts)
-                    print(f'🔗 拼接后的全文内容:\n {combined_text}')
-                    content += combined_text + '\n\n'
-                    
-                except Exception as err:
-                    print(f'❌ 在 iframe 中等待输入框超时或出错：{err}')
-                    output_values.append('未找到输入框（iframe内等待超时）')
-            
-            print(f'🎉 所有操作完成，获取的输入框值列表: {output_values}')
-
-            page_text = content
-            # 获取页面文本内容
-            print('\n📋 获取页面文本...')
-            import time
-            start_time = time.time()
-
-            end_time = time.time()
-            print(f'页面文本获取耗时: {end_time - start_time:.2f} 秒')
-            total_content_length = len(page_text)
-            print(f'📊 页面文本长度: {total_content_length:,} 字符')
-
-            # 给内容提取一个预热过程，确保所有内容都已加载
-            await page.wait_for_timeout(5000)
-
-            # 统计信息
-            print(f'   - 原始文本行数: {len(page_text.split("\n"))}')
-
-            # 准备输出内容
-            all_notes_content = '# 有道云笔记 - 日记内容汇总\n\n'
-            all_notes_content += f'导出时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}\n\n'
-            all_notes_content += f'导出条目数: {processed_count}\n\n'
-            all_notes_content += '==================================\n\n'
-            all_notes_content += page_text + '\n\n'
-
-            # 保存提取的内容
-            if len(all_notes_content) > 100:
-                output_file = generate_file_name('日记')
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(all_notes_content)
-
-                # 最终统计信息
-                print('\n🎉 提取完成！')
-                print('==================================')
-                print(f'✅ 成功提取 {processed_count} 个日记条目')
-                if processed_count > 0:
-                    print(f'📊 平均每个条目内容长度: {total_content_length // processed_count} 字符')
-                print(f'📄 输出文件大小: {len(all_notes_content) // 1024} KB')
-                print(f'📂 内容已保存到: {output_file}')
-                print('==================================')
-            else:
-                print('\n❌ 未能提取到有效内容')
-
-                # 当没有提取到内容时，尝试替代方法
-                print('\n🔄 尝试替代提取方法...')
-                try:
-                    print(f'获取到页面文本内容 (长度: {len(page_text)})')
-                    output_file = generate_file_name('日记_替代方法')
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        f.write(f'# 页面文本内容\n\n{page_text[:10000]}')
-                    print(f'📄 替代内容已保存到: {output_file}')
-                except Exception as e:
-                    print(f'❌ 替代方法也失败: {e}')
+            recycler = PageRecycler(page, **recycle_options) if recycle_options is not None else None
+            try:
+                await export_note_list(page, '日记', recycler=recycler, **export_options)
+            finally:
+                if recycler is not None:
+                    page = recycler.page
 
     except Exception as error:
         print(f'\n❌ 发生错误: {error}')
@@ -449,8 +1171,17 @@ async def extract_notes():
         except Exception as alt_error:
             print(f'❌ 保存备选文本失败: {alt_error}')
     finally:
+        if cache:
+            try:
+                cache.save()
+                print(f'🗄️  HTTP缓存: {cache.summary()}')
+            except Exception as cache_error:
+                print(f'⚠️  保存HTTP缓存索引失败: {cache_error}')
         # 等待用户查看结果 - 改进版：减少等待时间并增加健壮性
         try:
+            # 页面可能已被回收，改用上下文中仍打开的页面
+            if page and page.is_closed():
+                page = context.pages[0] if context and context.pages else None
             if browser and browser.is_connected():
                 print('\n🔄 浏览器将在10秒后自动关闭...')
                 try:
@@ -470,8 +1201,27 @@ async def extract_notes():
 
 # 运行主函数
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='有道云笔记提取')
+    parser.add_argument('--crawl', action='store_true', help='整本抓取：遍历所有文件夹，每个文件夹导出一个合集')
+    parser.add_argument('--pages', type=int, default=CRAWL_PAGES, help='整本抓取时同时使用的页面数')
+    parser.add_argument('--folders', nargs='*', help='整本抓取时只导出这些顶层文件夹（默认全部）')
+    parser.add_argument('--assets', action='store_true', help='同时下载笔记中的图片和附件到 笔记导出/附件/')
+    parser.add_argument('--compress', action='store_true', help='导出为可随机访问的分帧压缩合集（.ncz）')
+    parser.add_argument('--http-cache', action='store_true', help='启用磁盘HTTP响应缓存（.http_cache/），重复导出时复用未变化的内容')
+    parser.add_argument('--in-page', action='store_true', help='页面内批量抓取：在浏览器中完成点击、等待和读取，成批送回')
+    parser.add_argument('--no-recycle', action='store_true', help='不回收页面（默认在内存或延迟超过水位线时回收）')
+    parser.add_argument('--recycle-memory', type=float, default=DEFAULT_MEMORY_LIMIT_MB,
+                        help='浏览器内存水位线（MB），0表示不按内存回收')
+    parser.add_argument('--recycle-latency', type=float, default=DEFAULT_LATENCY_FACTOR,
+                        help='近期延迟超过基线的该倍数时回收页面，0表示不按延迟回收')
+    parser.add_argument('--recycle-every', type=int, default=0, help='每个页面导出该篇数后定期回收，0表示不限')
+    args = parser.parse_args()
     try:
-        asyncio.run(extract_notes())
+        asyncio.run(extract_notes(crawl=args.crawl, crawl_pages=args.pages, folders=args.folders,
+                                  assets=args.assets, compress=args.compress, http_cache=args.http_cache,
+                                  recycle=not args.no_recycle, recycle_memory_mb=args.recycle_memory,
+                                  recycle_latency=args.recycle_latency, recycle_every=args.recycle_every,
+                                  in_page=args.in_page))
     except Exception as err:
         print(f'程序执行出错: {err}')
         sys.exit(1)
\ No newline at end of file
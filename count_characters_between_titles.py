@@ -1,5 +1,9 @@
+import argparse
 import re
 
+from note_collection import open_collection
+from note_profiler import add_profile_arguments, phase, profiled_run
+
 def count_characters_between_titles(file_path):
     """
     扫描文件，计算标题之间的字符数，并标注空笔记
@@ -8,7 +12,7 @@ def count_characters_between_titles(file_path):
     title_info = []  # 存储标题信息：(行号, 标题文本)
     
     # 第一遍扫描：找到所有标题行
-    with open(file_path, 'r', encoding='utf-8') as f:
+    with phase('扫描标题'), open_collection(file_path) as f:
         for i, line in enumerate(f, 1):
             stripped_line = line.strip()
             if re.match(title_pattern, stripped_line):
@@ -23,7 +27,7 @@ def count_characters_between_titles(file_path):
     empty_notes = []  # 存储空笔记信息
     
     # 计算每个标题之间的字符数
-    with open(file_path, 'r', encoding='utf-8') as f:
+    with phase('读取全文'), open_collection(file_path) as f:
         all_lines = f.readlines()
     
     for i in range(len(title_info) - 1):
@@ -38,13 +42,14 @@ def count_characters_between_titles(file_path):
         total_characters = 0
         
         # 遍历两个标题之间的所有行
-        for j in range(current_line, next_line - 1):
-            if j < len(all_lines):
-                # 获取行内容，去除前后空白
-                line_content = all_lines[j].strip()
-                # 只计算非空行的字符数
-                if line_content:
-                    total_characters += len(line_content)
+        with phase('统计字数'):
+            for j in range(current_line, next_line - 1):
+                if j < len(all_lines):
+                    # 获取行内容，去除前后空白
+                    line_content = all_lines[j].strip()
+                    # 只计算非空行的字符数
+                    if line_content:
+                        total_characters += len(line_content)
         
         # 判断是否为空笔记
         is_empty = total_characters == 0
@@ -79,8 +84,13 @@ def count_characters_between_titles(file_path):
     }
 
 if __name__ == "__main__":
-    file_path = "d:/AiProject/traeWorkspace/playWright/笔记导出/工作笔记合集.txt"
-    stats = count_characters_between_titles(file_path)
+    parser = argparse.ArgumentParser(description="统计标题之间的字符数，并标注空笔记")
+    parser.add_argument("file_path", nargs="?", default="d:/AiProject/traeWorkspace/playWright/笔记导出/工作笔记合集.txt",
+                        help="合集文件（.txt 或 .ncz）")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    with profiled_run(args, "count_characters_between_titles"):
+        stats = count_characters_between_titles(args.file_path)
     
     print(f"\n统计总结:")
     print(f"- 标题总数: {stats['total_titles']}")
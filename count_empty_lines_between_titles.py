@@ -1,5 +1,9 @@
+import argparse
 import re
 
+from note_collection import open_collection
+from note_profiler import add_profile_arguments, phase, profiled_run
+
 def count_empty_lines_between_titles(file_path):
     """
     扫描文件，找到所有标题之间为空的行数
@@ -9,7 +13,7 @@ def count_empty_lines_between_titles(file_path):
     titles = []  # 存储标题文本
     
     # 一遍扫描：找到所有标题行的位置和文本
-    with open(file_path, 'r', encoding='utf-8') as f:
+    with phase('扫描标题'), open_collection(file_path) as f:
         for i, line in enumerate(f, 1):
             stripped_line = line.strip()
             if re.match(title_pattern, stripped_line):
@@ -31,9 +35,10 @@ def count_empty_lines_between_titles(file_path):
         next_title = titles[i + 1]
         
         empty_line_count = 0
-        with open(file_path, 'r', encoding='utf-8') as f:
+        with phase('读取全文'), open_collection(file_path) as f:
             lines = f.readlines()
-            # 只检查两个标题之间的行
+        # 只检查两个标题之间的行
+        with phase('统计空行'):
             for j in range(current_title_line, next_title_line):
                 if j < len(lines) and lines[j].strip() == '':
                     empty_line_count += 1
@@ -54,5 +59,11 @@ def count_empty_lines_between_titles(file_path):
     return results
 
 if __name__ == "__main__":
-    file_path = "d:/AiProject/traeWorkspace/playWright/笔记导出/有道云笔记_日记_2025-10-25T20-52-22-972116.txt"
-    count_empty_lines_between_titles(file_path)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="统计标题之间的空行数")
+    parser.add_argument("file_path", nargs="?",
+                        default="d:/AiProject/traeWorkspace/playWright/笔记导出/有道云笔记_日记_2025-10-25T20-52-22-972116.txt",
+                        help="合集文件（.txt 或 .ncz）")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    with profiled_run(args, "count_empty_lines_between_titles"):
+        count_empty_lines_between_titles(args.file_path)
\ No newline at end of file
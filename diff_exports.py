@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按笔记比较两次导出文件的差异
+
+功能：
+    1. 流式解析两次导出（如 有道云笔记_日记_<时间戳>.txt，也支持.ncz压缩合集），为每篇笔记计算 标题 + 正文哈希 指纹
+    2. 用哈希表在线性时间内匹配两边的笔记
+    3. 报告新增、删除、改名（正文相同标题不同）和修改（标题相同正文不同）的笔记
+    4. 只对修改过的笔记做逐行差异比较
+
+用法：
+    python diff_exports.py 旧导出.txt 新导出.txt [--summary] [--json 报告.json]
+"""
+
+import argparse
+import difflib
+import hashlib
+import json
+import time
+
+from note_collection import open_collection
+from split_notes_by_title import iter_notes
+
+
+def fingerprint_export(file_path):
+    """
+    读取一次导出，返回按出现顺序排列的笔记指纹列表
+
+    同名笔记以 (标题, 第几次出现) 区分，避免互相覆盖
+
+    Returns:
+        list: [{'key': (标题, 序号), 'title': 标题, 'hash': 正文哈希, 'body': 正文}, ...]
+    """
+    notes = []
+    occurrences = {}
+    with open_collection(file_path) as f:
+        for brackets, body in iter_notes(f):
+            title = brackets[0].strip() if brackets else ''
+            occurrence = occurrences.get(title, 0)
+            occurrences[title] = occurrence + 1
+            notes.append({
+                'key': (title, occurrence),
+                'title': title,
+                'hash': hashlib.blake2b(body.encode('utf-8'), digest_size=16).hexdigest(),
+                'body': body,
+            })
+    return notes
+
+
+def diff_exports(old_path, new_path):
+    """
+    比较两次导出
+
+    Returns:
+        dict: added / removed / renamed / modified 四类笔记列表及未变化的笔记数
+    """
+    old_notes = fingerprint_export(old_path)
+    new_notes = fingerprint_export(new_path)
+    old_by_key = {note['key']: note for note in old_notes}
+    new_keys = {note['key'] for note in new_notes}
+
+    modified = []
+    unchanged = 0
+    added_candidates = []
+    for note in new_notes:
+        old_note = old_by_key.get(note['key'])
+        if old_note is None:
+            added_candidates.append(note)
+        elif old_note['hash'] == note['hash']:
+            unchanged += 1
+        else:
+            modified.append((old_note, note))
+    removed_candidates = [note for note in old_notes if note['key'] not in new_keys]
+
+    # 标题变化但正文相同的视为改名：按正文哈希配对剩余的删除/新增笔记
+    removed_by_hash = {}
+    for note in removed_candidates:
+        removed_by_hash.setdefault(note['hash'], []).append(note)
+    renamed = []
+    added = []
+    for note in added_candidates:
+        same_body = removed_by_hash.get(note['hash'])
+        if same_body:
+            renamed.append((same_body.pop(0), note))
+        else:
+            added.append(note)
+    renamed_old = {id(old_note) for old_note, _ in renamed}
+    removed = [note for note in removed_candidates if id(note) not in renamed_old]
+
+    return {
+        'old_count': len(old_notes),
+        'new_count': len(new_notes),
+        'unchanged': unchanged,
+        'added': added,
+        'removed': removed,
+        'renamed': renamed,
+        'modified': modified,
+    }
+
+
+def line_diff(old_note, new_note):
+    """
+    对一篇修改过的笔记做逐行差异比较
+    """
+    return difflib.unified_diff(
+        old_note['body'].splitlines(), new_note['body'].splitlines(),
+        fromfile=f"旧: {old_note['title']}", tofile=f"新: {new_note['title']}", lineterm='')
+
+
+def print_report(result, show_diff=True):
+    print(f"旧导出 {result['old_count']} 篇，新导出 {result['new_count']} 篇，未变化 {result['unchanged']} 篇")
+    print("-" * 80)
+    print(f"新增 {len(result['added'])} 篇:")
+    for note in result['added']:
+        print(f"  + {note['title']}")
+    print(f"删除 {len(result['removed'])} 篇:")
+    for note in result['removed']:
+        print(f"  - {note['title']}")
+    print(f"改名 {len(result['renamed'])} 篇:")
+    for old_note, new_note in result['renamed']:
+        print(f"  ~ {old_note['title']} -> {new_note['title']}")
+    print(f"修改 {len(result['modified'])} 篇:")
+    for old_note, new_note in result['modified']:
+        print(f"  * {new_note['title']}")
+        if show_diff:
+            for line in line_diff(old_note, new_note):
+                print(f"    {line}")
+    print("-" * 80)
+
+
+def report_to_json(result):
+    return {
+        'old_count': result['old_count'],
+        'new_count': result['new_count'],
+        'unchanged': result['unchanged'],
+        'added': [note['title'] for note in result['added']],
+        'removed': [note['title'] for note in result['removed']],
+        'renamed': [[old_note['title'], new_note['title']] for old_note, new_note in result['renamed']],
+        'modified': [
+            {'title': new_note['title'], 'diff': list(line_diff(old_note, new_note))}
+            for old_note, new_note in result['modified']
+        ],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="按笔记比较两次导出文件的差异")
+    parser.add_argument("old_file", help="较早的导出文件")
+    parser.add_argument("new_file", help="较新的导出文件")
+    parser.add_argument("--summary", action="store_true", help="只列出变化的笔记，不输出逐行差异")
+    parser.add_argument("--json", help="同时将报告写入该JSON文件")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = diff_exports(args.old_file, args.new_file)
+    elapsed = time.perf_counter() - start
+    print_report(result, show_diff=not args.summary)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report_to_json(result), f, ensure_ascii=False, indent=2)
+        print(f"报告已保存到: {args.json}")
+    print(f"比较耗时: {elapsed:.3f} 秒")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+笔记内段落的模糊去重
+
+功能：
+    1. 用位并行的Levenshtein编辑距离算法（Myers/Hyyrö）计算段落相似度，
+       Python大整数充当任意长度的位向量，每个字符只需常数次位运算
+    2. 计算编辑距离前先做长度过滤和二元组（bigram）计数过滤，
+       绝大多数不可能相似的段落对不会进入距离计算
+    3. 相似度定义与JS脚本中的calculateSimilarity一致：(较长长度 - 编辑距离) / 较长长度
+
+用法：
+    python fuzzy_dedup.py 合集.txt [--threshold 0.9]
+"""
+
+import argparse
+import bisect
+import math
+import time
+from collections import Counter
+
+# 默认相似度阈值：相似度大于该值的段落视为重复（与JS版removeDuplicateParagraphs一致）
+DEFAULT_THRESHOLD = 0.9
+
+
+def levenshtein(a, b):
+    """
+    位并行计算两个字符串的编辑距离（Hyyrö对Myers算法的全局距离版本）
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if m == 0:
+        return len(a)
+    # 以较短的串作为模式串，为每个字符建立出现位置的位掩码
+    peq = {}
+    for i, ch in enumerate(b):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    full = (1 << m) - 1
+    high_bit = 1 << (m - 1)
+    pv = full
+    mv = 0
+    score = m
+    for ch in a:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & full) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & high_bit:
+            score += 1
+        elif mh & high_bit:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return score
+
+
+def _ratio(longer, distance):
+    # 相似度公式，similarity() 与 FuzzyDeduper 的距离上限共用，保证两者的判断完全一致
+    return (longer - distance) / longer
+
+
+def similarity(a, b):
+    """
+    计算两个字符串的相似度，取值0~1
+    """
+    if a == b:
+        return 1.0
+    longer = max(len(a), len(b))
+    if min(len(a), len(b)) == 0:
+        return 0.0
+    return _ratio(longer, levenshtein(a, b))
+
+
+def _bigrams(text):
+    return Counter(text[i:i + 2] for i in range(len(text) - 1))
+
+
+class FuzzyDeduper:
+    """
+    按出现顺序保留段落，丢弃与已保留段落相似度超过阈值的段落
+
+    Args:
+        threshold: 相似度阈值，相似度严格大于该值才视为重复
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        # 已保留段落按长度排序，便于只取长度可能相似的候选
+        self._lengths = []
+        self._kept = []
+        self._exact = set()
+        self.compared_pairs = 0
+        self.distance_calls = 0
+
+    def _max_distance(self, longer):
+        """
+        相似度严格大于阈值时允许的最大编辑距离（整数，没有时为-1）
+
+        先按 (1 - threshold) * 较长长度 估计，再用与 similarity() 相同的公式校正，
+        避免浮点误差把相似度恰好等于阈值的段落也判为重复
+        """
+        distance = min(longer, math.floor((1 - self.threshold) * longer))
+        while distance >= 0 and not _ratio(longer, distance) > self.threshold:
+            distance -= 1
+        while distance < longer and _ratio(longer, distance + 1) > self.threshold:
+            distance += 1
+        return distance
+
+    def is_duplicate(self, paragraph):
+        """
+        判断段落是否与已保留的段落重复，不重复时将其加入已保留集合
+        """
+        if paragraph in self._exact:
+            return True
+        if self.threshold <= 0:
+            # 只做精确去重时不需要长度索引和二元组
+            self._exact.add(paragraph)
+            return False
+        length = len(paragraph)
+        grams = None
+        if length > 0 and self.threshold > 0:
+            # 长度过滤：距离至少为长度差，只有长度落在 [L*t, L/t] 内的段落才可能相似（取整放宽，精确判断在后面）
+            low = bisect.bisect_left(self._lengths, math.floor(length * self.threshold))
+            high = bisect.bisect_right(self._lengths, math.ceil(length / self.threshold))
+            for other_length, other, other_grams in self._kept[low:high]:
+                self.compared_pairs += 1
+                longer = max(length, other_length)
+                max_distance = self._max_distance(longer)
+                if abs(length - other_length) > max_distance:
+                    continue
+                # 二元组过滤：每次编辑最多破坏2个二元组
+                if grams is None:
+                    grams = _bigrams(paragraph)
+                common = sum((grams & other_grams).values())
+                if common < (longer - 1) - 2 * max_distance:
+                    continue
+                self.distance_calls += 1
+                if levenshtein(paragraph, other) <= max_distance:
+                    return True
+        if grams is None:
+            grams = _bigrams(paragraph)
+        index = bisect.bisect_left(self._lengths, length)
+        self._lengths.insert(index, length)
+        self._kept.insert(index, (length, paragraph, grams))
+        self._exact.add(paragraph)
+        return False
+
+
+def dedupe_paragraphs(paragraphs, threshold=DEFAULT_THRESHOLD):
+    """
+    模糊去重一组段落，保持原有顺序
+
+    Args:
+        paragraphs: 段落列表
+        threshold: 相似度阈值，0表示只做精确去重
+
+    Returns:
+        list: 去重后的段落
+    """
+    deduper = FuzzyDeduper(threshold)
+    return [p for p in paragraphs if not deduper.is_duplicate(p)]
+
+
+if __name__ == "__main__":
+    from split_notes_by_title import iter_notes
+
+    parser = argparse.ArgumentParser(description="对合集中每篇笔记的段落做模糊去重并统计耗时")
+    parser.add_argument("file", help="合集或导出文件")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="相似度阈值")
+    args = parser.parse_args()
+
+    note_count = paragraph_count = removed_count = pairs = distance_calls = 0
+    start = time.perf_counter()
+    with open(args.file, 'r', encoding='utf-8') as f:
+        for brackets, body in iter_notes(f):
+            paragraphs = [p.strip() for p in body.split('\n') if p.strip()]
+            deduper = FuzzyDeduper(args.threshold)
+            kept = [p for p in paragraphs if not deduper.is_duplicate(p)]
+            note_count += 1
+            paragraph_count += len(paragraphs)
+            removed_count += len(paragraphs) - len(kept)
+            pairs += deduper.compared_pairs
+            distance_calls += deduper.distance_calls
+            if len(kept) < len(paragraphs):
+                print(f"{brackets[0][:30]:<32} 段落 {len(paragraphs)}，去除 {len(paragraphs) - len(kept)}")
+    elapsed = time.perf_counter() - start
+    print("-" * 60)
+    print(f"笔记 {note_count} 篇，段落 {paragraph_count} 个，去除近似重复 {removed_count} 个")
+    print(f"候选段落对 {pairs} 个，实际计算编辑距离 {distance_calls} 次，耗时 {elapsed:.3f} 秒")
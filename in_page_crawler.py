@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面内批量抓取
+
+功能：
+    1. 逐条点击、等待、读标题、读正文时，每篇笔记都要在 Python 与浏览器之间往返几十次
+    2. 本模块把整个列表循环注入页面执行：脚本自己点击列表条目，用 MutationObserver 等待
+       编辑器 iframe 切换到新笔记并稳定下来，再一次性读取标题、列表日期、正文段落（及图片/附件地址）
+    3. 正文用与逐条点击方式相同的滚动读取（按最外层的 data-bulb-node-id 节点收集，长笔记逐屏滚动）
+    4. 读取结果攒成小批，经 page.expose_function 注册的回调送回 Python，
+       Python 只收到完整的原始笔记记录；回调的返回值是下一批的点击间隔，速率控制仍由 Python 决定
+    5. 回调 await 期间脚本暂停，下游队列满时浏览器自然等待（背压）
+"""
+
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# 每批送回的笔记数
+IN_PAGE_BATCH = 5
+# 编辑器切换后，连续这么久（毫秒）没有DOM变化即视为内容已稳定
+IN_PAGE_SETTLE_MS = 50
+# 送回批次的页面绑定名
+BINDING_NAME = '__noteCrawlerBatch'
+
+# __SIGNATURE__ / __CAPTURE_BODY__ / __COLLECT_ASSETS__ / __ACTIVE_ITEM__ 在使用时替换为编辑器签名函数、
+# 正文读取函数、资源地址收集函数和判断条目是否为当前已打开笔记的函数
+IN_PAGE_CRAWLER_JS = '''async (options) => {
+    const signature = __SIGNATURE__;
+    const captureBody = __CAPTURE_BODY__;
+    const collectAssetUrls = __COLLECT_ASSETS__;
+    const isActiveItem = __ACTIVE_ITEM__;
+    const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+    const editor = () => document.querySelector('#bulb-editor');
+
+    let items = [];
+    for (const selector of options.selectors) {
+        items = Array.from(document.querySelectorAll(selector));
+        if (items.length > 0) break;
+    }
+
+    // 点击后等待签名变化，再等DOM安静 settleMs 毫秒；超时时返回是否已切换
+    const waitForSwitch = (before, timeout) => new Promise(resolve => {
+        const observers = [];
+        let switched = false;
+        let done = false;
+        let settleTimer = null;
+        const frame = editor();
+        const finish = ok => {
+            if (done) return;
+            done = true;
+            observers.forEach(observer => observer.disconnect());
+            clearTimeout(settleTimer);
+            clearTimeout(timeoutTimer);
+            if (frame) frame.removeEventListener('load', onLoad);
+            resolve(ok);
+        };
+        const onMutation = () => {
+            if (!switched && signature() !== before) switched = true;
+            if (switched) {
+                clearTimeout(settleTimer);
+                settleTimer = setTimeout(() => finish(true), options.settleMs);
+            }
+        };
+        const observe = target => {
+            if (!target) return;
+            const observer = new MutationObserver(onMutation);
+            observer.observe(target, {childList: true, subtree: true, characterData: true});
+            observers.push(observer);
+        };
+        // iframe 每次加载都是新文档，需要重新观察
+        const observeFrame = () => {
+            try {
+                const doc = frame && frame.contentDocument;
+                observe(doc && doc.documentElement);
+            } catch (e) {}
+        };
+        const onLoad = () => { observeFrame(); onMutation(); };
+        const timeoutTimer = setTimeout(() => finish(switched), timeout);
+        observe(document.body);
+        if (frame) {
+            frame.addEventListener('load', onLoad);
+            observeFrame();
+        }
+        onMutation();
+    });
+
+    let interval = options.interval;
+    let batch = [];
+    const flush = async () => {
+        if (batch.length === 0) return;
+        const sent = batch;
+        batch = [];
+        const next = await window[options.binding](sent);
+        if (typeof next === 'number') interval = next;
+    };
+
+    let lastClick = -Infinity;
+    const end = Math.min(options.end, items.length);
+    for (let position = options.start; position < end; position++) {
+        const item = items[position];
+        const record = {position: position, file_date: '', title: null, spans: null, node_ids: null,
+                        label: null, error: null, latency: null};
+        const dateEl = item.querySelector('span.file-date');
+        if (dateEl) record.file_date = dateEl.textContent;
+
+        const wait = lastClick + interval - performance.now();
+        if (wait > 0) await sleep(wait);
+        const before = signature();
+        // 点击当前已打开的笔记时签名不会变化，短暂等待后按当前内容读取
+        const active = isActiveItem(item);
+        item.scrollIntoView({block: 'center'});
+        lastClick = performance.now();
+        for (const type of ['mousedown', 'mouseup', 'click']) {
+            item.dispatchEvent(new MouseEvent(type, {bubbles: true, cancelable: true, view: window}));
+        }
+        const switched = await waitForSwitch(before, active ? options.activeSwitchTimeout : options.switchTimeout)
+            || active;
+        record.latency = (performance.now() - lastClick) / 1000;
+
+        const frame = editor();
+        let doc = null;
+        try { doc = frame && frame.contentDocument; } catch (e) {}
+        const pre = document.querySelector('pre.top-title-placeholder');
+        if (!switched) {
+            record.error = '笔记内容未切换';
+        } else if (!frame) {
+            record.error = record.label = '未找到 iframe';
+        } else if (!doc) {
+            record.error = record.label = '未获取到 iframe 上下文';
+        } else if (!pre) {
+            record.error = record.label = '未找到输入框（iframe内未找到）';
+        } else {
+            record.title = pre.textContent;
+            const body = await captureBody(doc, options.body);
+            record.spans = body.texts;
+            record.node_ids = body.ids;
+            if (options.collectAssets) record.assets = collectAssetUrls(doc);
+        }
+        batch.push(record);
+        if (batch.length >= options.batchSize) await flush();
+    }
+    await flush();
+    return items.length;
+}'''
+
+# 已注册绑定的页面 -> 当前批次回调（expose_function 每个页面只能注册一次）
+_handlers: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+
+def build_crawler_script(signature_js: str, capture_body_js: str, collect_assets_js: str,
+                         active_item_js: str) -> str:
+    return (IN_PAGE_CRAWLER_JS.replace('__SIGNATURE__', signature_js)
+            .replace('__CAPTURE_BODY__', capture_body_js)
+            .replace('__COLLECT_ASSETS__', collect_assets_js)
+            .replace('__ACTIVE_ITEM__', active_item_js))
+
+
+async def crawl_in_page(page, script: str, selectors: List[str], start: int, end: int,
+                        on_batch: Callable[[List[Dict[str, Any]]], Awaitable[Optional[float]]],
+                        interval: float, switch_timeout: int, collect_assets: bool = False,
+                        batch_size: int = IN_PAGE_BATCH, settle_ms: int = IN_PAGE_SETTLE_MS,
+                        body_options: Optional[Dict[str, Any]] = None,
+                        active_switch_timeout: Optional[int] = None) -> int:
+    """
+    在页面内抓取列表中第 start 到 end-1 条笔记
+
+    Args:
+        script: build_crawler_script() 生成的脚本
+        selectors: 列表条目选择器（按优先级）
+        on_batch: 收到一批记录时调用，返回下一批的点击间隔（秒），None表示不变
+        interval: 初始点击间隔（秒）
+        switch_timeout: 等待编辑器切换的超时（毫秒）
+        active_switch_timeout: 点击当前已打开的笔记时等待切换的超时（毫秒），默认同 switch_timeout
+        body_options: 传给正文读取函数的参数
+
+    Returns:
+        int: 页面中列表条目的总数
+    """
+    if page not in _handlers:
+        _handlers[page] = None
+
+        async def receive(batch):
+            handler = _handlers.get(page)
+            if handler is None:
+                return None
+            return await handler(batch)
+
+        await page.expose_function(BINDING_NAME, receive)
+
+    async def handle(batch):
+        next_interval = await on_batch(batch)
+        return None if next_interval is None else next_interval * 1000
+
+    _handlers[page] = handle
+    try:
+        return await page.evaluate(script, {
+            'selectors': selectors,
+            'start': start,
+            'end': end,
+            'interval': interval * 1000,
+            'switchTimeout': switch_timeout,
+            'activeSwitchTimeout': switch_timeout if active_switch_timeout is None else active_switch_timeout,
+            'settleMs': settle_ms,
+            'batchSize': batch_size,
+            'collectAssets': collect_assets,
+            'body': body_options or {},
+            'binding': BINDING_NAME,
+        })
+    finally:
+        _handlers[page] = None
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按时间顺序合并所有合集（外部排序 + k路堆归并）
+
+功能：
+    1. 流式读取各合集（.txt/.ncz），按与时间线统计相同的规则（note_date_number）取每篇笔记的日期
+    2. 笔记攒到内存上限后按 (日期, 原始顺序) 排序，写成一个有序段文件；
+       一个合集可能产生多个有序段，内存中最多只保留约一个上限的笔记
+    3. 用堆对所有有序段做k路归并，逐篇写出一个按时间排序的合集；
+       有序段数超过归并路数时先分批归并成更长的有序段，打开的文件数和内存都有上限
+    4. 同一天的笔记保持原合集顺序和篇内顺序（合集按命令行顺序），笔记原文逐字保留；
+       无法确定日期的笔记默认放在末尾
+
+用法：
+    python merge_collections.py                                    # 合并 笔记导出/ 下所有合集
+    python merge_collections.py 笔记导出/日记合集.txt 笔记导出/杂事合集.txt -o 时间线.txt
+    python merge_collections.py --memory-mb 16 --fan-in 16 -o 笔记导出/全部笔记_时间线.ncz
+"""
+
+import argparse
+import heapq
+import os
+import struct
+import sys
+import tempfile
+import time
+
+from note_collection import COLLECTION_SUFFIX, CollectionWriter, open_collection
+from note_profiler import add_profile_arguments, phase, profiled_run
+from note_timeline import default_collection_files, note_date_number
+from split_notes_by_title import BRACKET_CONTENT_PATTERN, TITLE_BRACKETS_PATTERN, TITLE_MARK
+
+# 默认的排序内存上限（MB）和归并路数
+DEFAULT_MEMORY_MB = 64
+DEFAULT_FAN_IN = 32
+# 无法确定日期的笔记放在末尾时使用的排序键（放在开头时即为0）
+UNDATED_LAST = 99999999
+UNDATED_LABELS = {'last': '放在末尾', 'first': '放在开头', 'skip': '已丢弃'}
+# 有序段中每篇笔记的记录头：日期、全局序号、正文字节数
+RECORD_HEADER = struct.Struct('<IQI')
+# 有序段文件的读写缓冲
+RUN_BUFFER = 1 << 20
+DEFAULT_OUTPUT = os.path.join('笔记导出', '全部笔记_时间线.txt')
+
+
+def iter_note_texts(lines):
+    """
+    流式切分合集，逐篇产出 (方括号内容列表, 笔记原文)，原文包含标题行，切分规则与 iter_notes 一致
+    """
+    brackets = None
+    note_lines = []
+    for line in lines:
+        if line.startswith(TITLE_MARK):
+            match = TITLE_BRACKETS_PATTERN.match(line)
+            if match:
+                if brackets is not None:
+                    yield brackets, ''.join(note_lines)
+                brackets = BRACKET_CONTENT_PATTERN.findall(match.group(1))
+                note_lines = [line]
+                continue
+        if brackets is not None:
+            note_lines.append(line)
+    if brackets is not None:
+        yield brackets, ''.join(note_lines)
+
+
+def write_run(records, directory, run_index):
+    """
+    将已排序的 (日期, 序号, 原文) 记录写成有序段文件，返回路径
+    """
+    path = os.path.join(directory, f'run-{run_index:06d}.bin')
+    with open(path, 'wb', buffering=RUN_BUFFER) as f:
+        for date, seq, text in records:
+            data = text.encode('utf-8')
+            f.write(RECORD_HEADER.pack(date, seq, len(data)))
+            f.write(data)
+    return path
+
+
+def read_run(path):
+    """
+    按顺序读出有序段中的 (日期, 序号, 原文) 记录
+    """
+    with open(path, 'rb', buffering=RUN_BUFFER) as f:
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if not header:
+                return
+            date, seq, length = RECORD_HEADER.unpack(header)
+            yield date, seq, f.read(length).decode('utf-8')
+
+
+class ChronologicalMerger:
+    """
+    外部排序合并器
+
+    Args:
+        temp_dir: 存放有序段的临时目录
+        memory_bytes: 排序时内存中笔记的大小上限
+        fan_in: 一次归并的最多有序段数
+        undated: 无法确定日期的笔记放在 'last'（末尾）、'first'（开头）或 'skip'（丢弃）
+    """
+
+    def __init__(self, temp_dir, memory_bytes=DEFAULT_MEMORY_MB << 20, fan_in=DEFAULT_FAN_IN, undated='last'):
+        self.temp_dir = temp_dir
+        self.memory_bytes = memory_bytes
+        self.fan_in = max(2, fan_in)
+        self.undated = undated
+        self.runs = []
+        # 排序阶段写出的有序段数（不含中间归并产生的）
+        self.sorted_runs = 0
+        self.notes = 0
+        self.undated_notes = 0
+        self.run_count = 0
+        self.merge_passes = 0
+        self._buffer = []
+        self._buffer_bytes = 0
+
+    def add_collection(self, path):
+        """
+        读取一个合集，按内存上限切成有序段，返回该合集的笔记篇数
+        """
+        count = 0
+        with open_collection(path) as f:
+            for brackets, text in iter_note_texts(f):
+                if not text.endswith('\n'):
+                    text += '\n'
+                date = note_date_number(brackets)
+                if not date:
+                    self.undated_notes += 1
+                    if self.undated == 'skip':
+                        continue
+                    if self.undated == 'last':
+                        date = UNDATED_LAST
+                self._buffer.append((date, self.notes, text))
+                self.notes += 1
+                count += 1
+                self._buffer_bytes += sys.getsizeof(text) + 100
+                if self._buffer_bytes >= self.memory_bytes:
+                    self._spill()
+        return count
+
+    def _spill(self):
+        if not self._buffer:
+            return
+        with phase('排序有序段'):
+            self._buffer.sort()
+        with phase('写出有序段'):
+            self.runs.append(write_run(self._buffer, self.temp_dir, self.run_count))
+        self.run_count += 1
+        self.sorted_runs += 1
+        self._buffer = []
+        self._buffer_bytes = 0
+
+    def _reduce_runs(self):
+        # 有序段多于归并路数时，逐批归并为更长的有序段，直到一次归并即可完成
+        while len(self.runs) > self.fan_in:
+            self.merge_passes += 1
+            merged = []
+            for start in range(0, len(self.runs), self.fan_in):
+                group = self.runs[start:start + self.fan_in]
+                if len(group) == 1:
+                    merged.append(group[0])
+                    continue
+                with phase('中间归并'):
+                    merged.append(write_run(heapq.merge(*map(read_run, group)), self.temp_dir, self.run_count))
+                self.run_count += 1
+                for path in group:
+                    os.remove(path)
+            self.runs = merged
+
+    def merge(self):
+        """
+        k路归并所有有序段，按时间顺序逐篇产出 (日期, 原文)，日期为0表示无法确定
+        """
+        self._spill()
+        self._reduce_runs()
+        self.merge_passes += 1
+        for date, _, text in heapq.merge(*map(read_run, self.runs)):
+            yield (0 if date == UNDATED_LAST else date), text
+
+
+def merge_collections(file_paths, output_path, memory_mb=DEFAULT_MEMORY_MB, fan_in=DEFAULT_FAN_IN,
+                      undated='last', temp_dir=None):
+    """
+    将多个合集按时间顺序合并为一个合集（.ncz 后缀时写为压缩合集）
+
+    Returns:
+        dict: 篇数、有序段数、归并轮数、日期范围等统计
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    started = time.perf_counter()
+    # 临时目录默认与输出放在同一磁盘，有序段与输出的大小相当
+    with tempfile.TemporaryDirectory(prefix='.merge-', dir=temp_dir or output_dir) as work_dir:
+        merger = ChronologicalMerger(work_dir, memory_mb << 20, fan_in, undated)
+        for path in file_paths:
+            count = merger.add_collection(path)
+            print(f"📚 {os.path.basename(path)}: {count} 篇")
+        first = last = 0
+        written = 0
+        if output_path.endswith(COLLECTION_SUFFIX):
+            out = CollectionWriter(output_path)
+        else:
+            out = open(output_path, 'w', encoding='utf-8')
+        with out, phase('归并写出'):
+            for date, text in merger.merge():
+                out.write(text)
+                written += 1
+                if date:
+                    first = first or date
+                    last = date
+    return {
+        'notes': written,
+        'undated': merger.undated_notes,
+        'runs': merger.sorted_runs,
+        'merge_passes': merger.merge_passes,
+        'first_date': first,
+        'last_date': last,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="按笔记日期将多个合集归并为一个按时间排序的合集（内存占用有上限）")
+    parser.add_argument("files", nargs="*", help="合集文件（.txt 或 .ncz），默认 笔记导出/ 下所有合集")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="输出合集，.ncz 后缀时写为压缩合集")
+    parser.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_MB, help="排序时内存中笔记的大小上限（MB）")
+    parser.add_argument("--fan-in", type=int, default=DEFAULT_FAN_IN, help="一次归并的最多有序段数（同时打开的文件数）")
+    parser.add_argument("--undated", choices=("last", "first", "skip"), default="last",
+                        help="无法确定日期的笔记放在末尾、开头或丢弃")
+    parser.add_argument("--temp-dir", help="有序段的临时目录，默认与输出文件相同")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    files = [path for path in (args.files or default_collection_files()) if os.path.abspath(path) != output]
+    if not files:
+        print("[警告] 未找到任何合集文件")
+        sys.exit(0)
+
+    with profiled_run(args, "merge_collections"):
+        stats = merge_collections(files, args.output, args.memory_mb, args.fan_in, args.undated, args.temp_dir)
+
+    print("-" * 60)
+    print(f"✅ 已按时间顺序合并 {stats['notes']} 篇笔记到: {args.output}")
+    if stats['first_date']:
+        print(f"   日期范围 {stats['first_date']} ~ {stats['last_date']}，无法确定日期 {stats['undated']} 篇"
+              f"（{UNDATED_LABELS[args.undated]}）")
+    print(f"   有序段 {stats['runs']} 个，归并 {stats['merge_passes']} 轮，耗时 {stats['seconds']:.2f} 秒")
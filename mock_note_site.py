@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟有道云笔记站点
+
+功能：
+    1. 复现提取器依赖的页面结构：
+       .list-bd.topNameTag 下的 li.list-li.file-item（含 span.file-date）、
+       pre.top-title-placeholder 标题，以及正文由 span[data-bulb-node-id] 组成的 #bulb-editor iframe
+    2. 笔记数量、段落数、段落长度、图片数可配置，内容由随机种子确定，可复现
+    3. 笔记正文请求可加入人为延迟，模拟网络与服务器耗时
+    4. 提供每篇笔记的期望内容，便于校验提取结果
+    5. 可模拟虚拟列表式的编辑器（只渲染可见的若干行正文，滚动时替换节点）和正文中合法重复的行
+
+用法：
+    python mock_note_site.py --notes 200 --latency 50 --port 8000
+    然后在浏览器打开 http://127.0.0.1:8000/web/
+"""
+
+import argparse
+import html
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 生成正文用的常用汉字
+_CHARS = ('的一是了我不人在他有这个上们来到时大地为子中你说生国年着就那和要她出也得里后自以会家可下而过天去能对小多然于心学么之都好看起发当没成只如事把还用第样道想作种开美总从无情己面最女但现前些所同日手又行意动方期它头经长儿回位分爱老因很给名法间斯知世什两次使身者被高已亲其进此话常与活正感')
+# 1x1 PNG，图片资源按编号在末尾追加注释字节以得到不同内容
+_PNG = bytes.fromhex('89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+                     '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082')
+
+_INDEX_TEMPLATE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>有道云笔记（模拟）</title>
+<style>
+.list-bd {{ height: 600px; overflow-y: auto; width: 320px; float: left; }}
+.list-li {{ padding: 6px; cursor: pointer; border-bottom: 1px solid #eee; }}
+#editor-area {{ margin-left: 340px; }}
+#bulb-editor {{ width: 800px; height: 560px; border: 0; }}
+</style></head>
+<body>
+<div class="list-bd topNameTag"><ul>
+{items}
+</ul></div>
+<div id="editor-area">
+<pre class="top-title-placeholder"></pre>
+<iframe id="bulb-editor"></iframe>
+</div>
+<script>
+const editor = document.getElementById('bulb-editor');
+const titleEl = document.querySelector('pre.top-title-placeholder');
+let pendingTitle = null;
+editor.addEventListener('load', () => {{
+    if (pendingTitle !== null) {{ titleEl.textContent = pendingTitle; pendingTitle = null; }}
+}});
+document.querySelectorAll('li.file-item').forEach(li => li.addEventListener('click', () => {{
+    pendingTitle = li.dataset.title;
+    editor.src = '/note/' + li.dataset.index;
+}}));
+</script>
+</body></html>
+'''
+
+
+# 虚拟列表式正文：固定行高，只渲染可见区域附近的 window 行，上下用占位高度撑开
+_VIRTUAL_NOTE_TEMPLATE = '''<!DOCTYPE html><html><head><meta charset="utf-8">
+<style>.row {{ height: 24px; margin: 0; overflow: hidden; white-space: nowrap; }}</style></head>
+<body><div id="above"></div><div id="rows"></div><div id="below"></div>{images}
+<script>
+const rows = {rows};
+const rowHeight = 24;
+const container = document.getElementById('rows');
+let first = -1;
+function render() {{
+    const start = Math.max(0, Math.min(rows.length - {window}, Math.floor(window.scrollY / rowHeight) - 2));
+    if (start === first) return;
+    first = start;
+    const end = Math.min(rows.length, start + {window});
+    document.getElementById('above').style.height = (start * rowHeight) + 'px';
+    document.getElementById('below').style.height = ((rows.length - end) * rowHeight) + 'px';
+    container.replaceChildren(...rows.slice(start, end).map(([id, text]) => {{
+        const p = document.createElement('p');
+        p.className = 'row';
+        const span = document.createElement('span');
+        span.setAttribute('data-bulb-node-id', id);
+        span.textContent = text;
+        p.appendChild(span);
+        return p;
+    }}));
+}}
+window.addEventListener('scroll', render);
+render();
+</script></body></html>'''
+
+
+class MockNoteSite:
+    """
+    模拟站点及其期望数据
+
+    Args:
+        note_count: 笔记篇数
+        paragraphs: 每篇笔记的段落数
+        paragraph_chars: 每个段落的字符数
+        latency_ms: 每次打开笔记正文的人为延迟（毫秒）
+        images: 每篇笔记包含的图片数（图片在笔记间循环复用，用于测试内容去重）
+        seed: 随机种子
+        virtual_rows: 大于0时正文只渲染可见区域前后共这么多行，模拟虚拟列表
+        repeat_every: 大于0时每隔这么多段重复一次上一段的文字（节点ID不同）
+    """
+
+    def __init__(self, note_count=100, paragraphs=10, paragraph_chars=60, latency_ms=0, images=0, seed=1,
+                 virtual_rows=0, repeat_every=0):
+        self.note_count = note_count
+        self.latency_ms = latency_ms
+        self.images = images
+        self.virtual_rows = virtual_rows
+        rng = random.Random(seed)
+        start_date = date(2020, 1, 1)
+        self.notes = []
+        for i in range(note_count):
+            note_date = start_date + timedelta(days=i)
+            texts = []
+            for p in range(paragraphs):
+                if repeat_every and p % repeat_every == repeat_every - 1 and texts:
+                    texts.append(texts[-1])
+                else:
+                    texts.append(''.join(rng.choice(_CHARS) for _ in range(paragraph_chars)))
+            self.notes.append({
+                'title': f'{note_date:%Y%m%d}-模拟笔记{i + 1}',
+                'file_date': f'{note_date.year}.{note_date.month}.{note_date.day}',
+                'paragraphs': texts,
+            })
+        self._server = None
+        self._thread = None
+
+    def index_html(self):
+        items = '\n'.join(
+            f'<li class="list-li file-item" data-index="{i}" data-title="{html.escape(note["title"])}">'
+            f'<span class="file-name">{html.escape(note["title"])}</span> '
+            f'<span class="file-date">{note["file_date"]}</span></li>'
+            for i, note in enumerate(self.notes))
+        return _INDEX_TEMPLATE.format(items=items)
+
+    def note_html(self, index):
+        note = self.notes[index]
+        if self.virtual_rows:
+            return self._virtual_note_html(index)
+        blocks = []
+        for p, text in enumerate(note['paragraphs']):
+            blocks.append(f'<p><span data-bulb-node-id="n{index}-{p}">{html.escape(text)}</span></p>')
+        for k in range(self.images):
+            blocks.append(f'<p><img src="/asset/{(index + k) % 10}.png"></p>')
+        return ('<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>'
+                + ''.join(blocks) + '</body></html>')
+
+    def _virtual_note_html(self, index):
+        note = self.notes[index]
+        images = ''.join(f'<p><img src="/asset/{(index + k) % 10}.png"></p>' for k in range(self.images))
+        rows = json.dumps([[f'n{index}-{p}', text] for p, text in enumerate(note['paragraphs'])], ensure_ascii=False)
+        return _VIRTUAL_NOTE_TEMPLATE.format(rows=rows.replace('</', '<\\/'), window=self.virtual_rows, images=images)
+
+    def asset_bytes(self, asset_id):
+        return _PNG + f'#{asset_id}'.encode('ascii')
+
+    def start(self, host='127.0.0.1', port=0):
+        """
+        在后台线程中启动站点，返回入口URL
+        """
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                if path in ('/', '/web', '/web/'):
+                    self._send(200, 'text/html; charset=utf-8', site.index_html().encode('utf-8'))
+                elif path.startswith('/note/') and path[6:].isdigit() and int(path[6:]) < site.note_count:
+                    if site.latency_ms:
+                        time.sleep(site.latency_ms / 1000)
+                    self._send(200, 'text/html; charset=utf-8', site.note_html(int(path[6:])).encode('utf-8'))
+                elif path.startswith('/asset/') and path.endswith('.png'):
+                    self._send(200, 'image/png', site.asset_bytes(path[7:-4]))
+                else:
+                    self._send(404, 'text/plain; charset=utf-8', b'not found')
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return f'http://{host}:{self._server.server_address[1]}/web/'
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='启动本地模拟有道云笔记站点')
+    parser.add_argument('--notes', type=int, default=100, help='笔记篇数')
+    parser.add_argument('--paragraphs', type=int, default=10, help='每篇笔记的段落数')
+    parser.add_argument('--paragraph-chars', type=int, default=60, help='每个段落的字符数')
+    parser.add_argument('--latency', type=int, default=0, help='打开笔记正文的人为延迟（毫秒）')
+    parser.add_argument('--images', type=int, default=0, help='每篇笔记的图片数')
+    parser.add_argument('--virtual-rows', type=int, default=0, help='正文只渲染这么多行（模拟虚拟列表），0表示全部渲染')
+    parser.add_argument('--repeat-every', type=int, default=0, help='每隔这么多段重复一次上一段的文字')
+    parser.add_argument('--port', type=int, default=8000, help='监听端口')
+    args = parser.parse_args()
+
+    mock_site = MockNoteSite(args.notes, args.paragraphs, args.paragraph_chars, args.latency, args.images,
+                             virtual_rows=args.virtual_rows, repeat_every=args.repeat_every)
+    url = mock_site.start(port=args.port)
+    print(f'模拟站点已启动: {url}（Ctrl+C 退出）')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock_site.stop()
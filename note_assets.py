@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+笔记图片与附件的并发下载
+
+功能：
+    1. 从笔记编辑器中收集图片和附件的资源地址
+    2. 通过已登录的 context.request 并发下载，连接数有上限
+    3. 按内容哈希（SHA-256）存储，多篇笔记共用的资源只保存一份
+    4. 生成笔记正文中引用本地文件的文本
+
+用法（可对本地静态文件服务器测试）：
+    python note_assets.py 输出目录 URL [URL ...]
+"""
+
+import asyncio
+import hashlib
+import mimetypes
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+# 默认最大并发连接数
+MAX_CONNECTIONS = 4
+
+# 在编辑器文档中收集图片和附件地址（按DOM顺序，去重），参数为要扫描的文档，页面内抓取脚本也内嵌此函数
+COLLECT_ASSET_URLS_JS = '''(document) => {
+    const seen = new Set();
+    const assets = [];
+    const add = (url, kind) => {
+        if (!url || url.startsWith('data:') || url.startsWith('javascript:') || seen.has(url)) return;
+        seen.add(url);
+        assets.push({url: url, kind: kind});
+    };
+    document.querySelectorAll('img').forEach(img => add(img.currentSrc || img.src || img.getAttribute('data-src'), '图片'));
+    document.querySelectorAll('a[download], a[href*="attach"], [data-attachment-url]').forEach(el =>
+        add(el.getAttribute('data-attachment-url') || el.href, '附件'));
+    return assets;
+}'''
+# 在 iframe 的 frame 上下文中直接 evaluate 的版本
+ASSET_URLS_JS = f'() => ({COLLECT_ASSET_URLS_JS})(document)'
+
+
+class AssetStore:
+    """
+    内容寻址的资源存储：文件保存在 根目录/<哈希前两位>/<哈希>.<扩展名>
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.stored_count = 0
+        self.dedup_count = 0
+        self.stored_bytes = 0
+        # 多个下载线程可能同时写入同一内容，串行化检查与写入
+        self._lock = threading.Lock()
+
+    def put(self, data: bytes, ext: str) -> Path:
+        """
+        保存资源内容，已存在相同内容时直接复用，返回文件路径
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        target = self.root_dir / digest[:2] / f'{digest}{ext}'
+        with self._lock:
+            if target.exists():
+                self.dedup_count += 1
+                return target
+            target.parent.mkdir(exist_ok=True)
+            # 先写临时文件再改名，避免中断时留下不完整的资源
+            tmp_path = target.with_name(target.name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, target)
+            self.stored_count += 1
+            self.stored_bytes += len(data)
+        return target
+
+
+def guess_extension(url: str, content_type: Optional[str]) -> str:
+    """
+    根据响应的Content-Type或URL路径推断扩展名
+    """
+    if content_type:
+        ext = mimetypes.guess_extension(content_type.split(';')[0].strip())
+        if ext:
+            return ext
+    suffix = Path(urlparse(url).path).suffix
+    if suffix and len(suffix) <= 6:
+        return suffix.lower()
+    return '.bin'
+
+
+class AssetDownloader:
+    """
+    有界连接池的资源下载器
+
+    Args:
+        request: Playwright的APIRequestContext（如 context.request，携带登录Cookie）
+        store: AssetStore实例
+        max_connections: 最大并发连接数
+    """
+
+    def __init__(self, request, store: AssetStore, max_connections: int = MAX_CONNECTIONS):
+        self.request = request
+        self.store = store
+        self._semaphore = asyncio.Semaphore(max_connections)
+        # 同一URL只下载一次，后续笔记直接复用下载任务的结果（失败的任务会被移除，下次引用时重新下载）
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.failed_count = 0
+
+    async def _download(self, url: str) -> Optional[Path]:
+        async with self._semaphore:
+            try:
+                response = await self.request.get(url, timeout=30000)
+                if not response.ok:
+                    print(f'⚠️  资源下载失败（HTTP {response.status}）: {url}')
+                    self.failed_count += 1
+                    return None
+                data = await response.body()
+                ext = guess_extension(url, response.headers.get('content-type'))
+            except Exception as err:
+                print(f'⚠️  资源下载出错: {url}: {err}')
+                self.failed_count += 1
+                return None
+        return await asyncio.to_thread(self.store.put, data, ext)
+
+    async def fetch(self, url: str) -> Optional[Path]:
+        task = self._tasks.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._download(url))
+            self._tasks[url] = task
+            task.add_done_callback(lambda done, url=url: self._forget_failed(url, done))
+        return await task
+
+    def _forget_failed(self, url: str, task: asyncio.Task):
+        # 下载失败（返回None或抛出异常）时不缓存结果，之后引用该URL的笔记会重新下载
+        if task.cancelled() or task.exception() is not None or task.result() is None:
+            if self._tasks.get(url) is task:
+                del self._tasks[url]
+
+    async def fetch_all(self, urls: List[str]) -> List[Optional[Path]]:
+        """
+        并发下载一组资源，返回与urls一一对应的本地路径（失败为None）
+        """
+        return list(await asyncio.gather(*(self.fetch(url) for url in urls)))
+
+    def summary(self) -> str:
+        return (f'新保存 {self.store.stored_count} 个（{self.store.stored_bytes // 1024} KB），'
+                f'内容去重 {self.store.dedup_count} 个，失败 {self.failed_count} 个')
+
+
+def format_asset_references(assets: List[Dict[str, str]], paths: List[Optional[Path]], base_dir) -> str:
+    """
+    生成追加到笔记正文末尾的本地资源引用，路径相对于导出目录
+
+    Returns:
+        形如 "[图片: 附件/ab/ab12....png]" 的多行文本，无资源时返回空字符串
+    """
+    lines = []
+    for asset, path in zip(assets, paths):
+        if path is None:
+            lines.append(f'[{asset["kind"]}下载失败: {asset["url"]}]')
+        else:
+            lines.append(f'[{asset["kind"]}: {Path(os.path.relpath(path, base_dir)).as_posix()}]')
+    return '\n'.join(lines) + '\n\n' if lines else ''
+
+
+async def _download_urls(output_dir: str, urls: List[str]):
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as playwright:
+        request = await playwright.request.new_context()
+        downloader = AssetDownloader(request, AssetStore(output_dir))
+        paths = await downloader.fetch_all(urls)
+        for url, path in zip(urls, paths):
+            print(f'{url} -> {path}')
+        print(downloader.summary())
+        await request.dispose()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print('用法: python note_assets.py 输出目录 URL [URL ...]')
+        sys.exit(1)
+    asyncio.run(_download_urls(sys.argv[1], sys.argv[2:]))
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+笔记正文的单遍清洗引擎
+
+功能：
+    1. JS脚本中的 filterYoudaoContent / isValidContent / removeDuplicateParagraphs
+       对整段全文逐个关键词、逐条规则各跑一遍正则，规则越多遍数越多
+    2. 本模块把界面文字、脚本残留、系统关键词三类规则各合并成一个预编译的交替正则，
+       对逐段流入的段落只扫描一次：先用一个"可疑字符"正则快速放行绝大多数正常段落，
+       命中时才统计关键词、标签和括号密度并删除脚本残留，最后做精确+模糊去重
+    3. 规则按段落生效（正文来自编辑器的段落，不再需要JS版按行删除包含关键词的整行），
+       界面文字只在整段恰好是导航/菜单文字时才丢弃，不会误删正文中出现的"工作""学习"等词
+    4. 脚本残留、系统关键词和括号密度规则是为整页文本写的，对编辑器正文会误伤技术笔记
+       （如"两个<Struct>标签"、含 const 的代码行），因此默认只启用界面文字和去重，
+       script_filters=True 时才启用这些规则；提取器使用默认设置
+    5. MultiPassCleaner 按JS的方式逐条规则对全部段落各做一遍，作为对照；
+       命令行对 笔记导出/ 下的合集启用全部规则比较两者的耗时，核对结果是否一致，
+       并统计被丢弃和被改动的段落，列出改动示例，便于发现规则误伤
+
+用法：
+    python note_cleaner.py                                   # 比较 笔记导出/ 下所有合集
+    python note_cleaner.py 笔记导出/日记合集.txt --rounds 5 --json 清洗基准.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import time
+
+from fuzzy_dedup import FuzzyDeduper
+from split_notes_by_title import iter_notes
+
+# 有道云笔记页面上的导航、菜单和页脚文字（filterYoudaoContent 与 parseDiaryEntriesFromPageText 的关键词）
+UI_TEXTS = [
+    '我的文件夹', '最近', '工作', '生活', '学习', '收藏', '回收站',
+    '新建笔记', '导入', '导出', '分享', '协作', '设置',
+    '编辑', '查看', '格式', '插入', '帮助',
+    '网易', '有道云笔记', '用户协议', '隐私政策',
+    '功能介绍', '使用教程', '帮助中心', '意见反馈',
+    '每周回顾', '我的资源', '写作', '行动', '杂事', '照片',
+    '与我分享', '加星', '标签', '云协作', '官网', '客户端下载', '新建', '到期',
+]
+# 列表头部的"总共 N 项"
+UI_PATTERNS = [r'总共\s*\d+\s*项']
+
+# 页面脚本、模板和HTML的残留，按顺序删除
+RESIDUE_PATTERNS = [
+    r'<[^>]*>',
+    r'\{\{[^}]*\}\}',
+    r'function\s+\w+\s*\([^)]*\)\s*\{[^}]*\}',
+    r'const\s+\w+\s*=\s*[^;]*;',
+]
+
+# 系统关键词：同一段中出现超过 SYSTEM_KEYWORD_LIMIT 种即视为脚本文本（不区分大小写）
+SYSTEM_KEYWORDS = ['function', 'window', 'document', 'console', 'Object', 'Array', 'JSON']
+SYSTEM_KEYWORD_LIMIT = 3
+# HTML标签超过该数量的段落视为页面代码
+TAG_LIMIT = 10
+# 括号占比超过该比例的段落视为代码；短段落（如"(完)"）不做该检查
+BRACKET_RATIO = 0.1
+BRACKET_MIN_LENGTH = 20
+
+TAG_PATTERN = r'<[^>]*>'
+BRACKET_PATTERN = r'[{}()\[\]]'
+
+# 段落被丢弃的原因
+DROP_EMPTY = 'empty'
+DROP_UI = 'ui_text'
+DROP_SYSTEM = 'system_keywords'
+DROP_TAGS = 'html_tags'
+DROP_BRACKETS = 'brackets'
+DROP_RESIDUE = 'residue_only'
+DROP_DUPLICATE = 'duplicate'
+DROP_REASONS = [DROP_EMPTY, DROP_UI, DROP_SYSTEM, DROP_TAGS, DROP_BRACKETS, DROP_RESIDUE, DROP_DUPLICATE]
+
+# 单遍引擎使用的预编译正则
+UI_RE = re.compile('|'.join([re.escape(text) for text in UI_TEXTS] + UI_PATTERNS))
+RESIDUE_RE = re.compile('|'.join(RESIDUE_PATTERNS))
+SYSTEM_RE = re.compile('|'.join(re.escape(keyword) for keyword in SYSTEM_KEYWORDS), re.IGNORECASE)
+TAG_RE = re.compile(TAG_PATTERN)
+BRACKET_RE = re.compile(BRACKET_PATTERN)
+# 关键词、const 和残留规则都需要括号或连续4个以上的英文字母，两者都不含的段落直接放行
+SUSPECT_RE = re.compile(r'[<{}()\[\]]|[A-Za-z]{4}')
+
+
+class NoteCleaner:
+    """
+    单篇笔记的段落清洗器，每篇笔记新建一个（去重状态按笔记隔离）
+
+    Args:
+        fuzzy_threshold: 相似度超过该值的段落视为近似重复，0表示只做精确去重
+        dedupe: 是否按文本去重；段落已按节点ID去重时为False，保留正文中合法重复的行
+        script_filters: 是否启用脚本残留、系统关键词、标签数和括号密度规则（只适用于整页抓取的文本）
+    """
+
+    def __init__(self, fuzzy_threshold=0.9, dedupe=True, script_filters=False):
+        self.deduper = FuzzyDeduper(fuzzy_threshold) if dedupe else None
+        self.script_filters = script_filters
+        self.dropped = dict.fromkeys(DROP_REASONS, 0)
+        # 保留下来但内容被规则改动的段落数
+        self.modified = 0
+
+    def _check(self, paragraph):
+        if UI_RE.fullmatch(paragraph):
+            return None, DROP_UI
+        if not self.script_filters or not SUSPECT_RE.search(paragraph):
+            return paragraph, None
+        keywords = set()
+        for match in SYSTEM_RE.finditer(paragraph):
+            keywords.add(match.group().lower())
+            if len(keywords) > SYSTEM_KEYWORD_LIMIT:
+                return None, DROP_SYSTEM
+        if len(TAG_RE.findall(paragraph)) > TAG_LIMIT:
+            return None, DROP_TAGS
+        length = len(paragraph)
+        if length >= BRACKET_MIN_LENGTH and len(BRACKET_RE.findall(paragraph)) > length * BRACKET_RATIO:
+            return None, DROP_BRACKETS
+        cleaned = RESIDUE_RE.sub('', paragraph).strip()
+        if not cleaned:
+            return None, DROP_RESIDUE
+        return cleaned, None
+
+    def clean_paragraph(self, text):
+        """
+        清洗一个段落
+
+        Returns:
+            tuple: (清洗后的段落, None)，或段落被丢弃时 (None, 原因)
+        """
+        original = text.strip() if text else ''
+        if not original or original == '.':
+            paragraph, reason = None, DROP_EMPTY
+        else:
+            paragraph, reason = self._check(original)
+            if reason is None and self.deduper is not None and self.deduper.is_duplicate(paragraph):
+                reason = DROP_DUPLICATE
+        if reason is not None:
+            self.dropped[reason] += 1
+            return None, reason
+        if paragraph != original:
+            self.modified += 1
+        return paragraph, None
+
+    def clean(self, paragraphs):
+        """
+        逐段清洗，产出保留下来的段落
+        """
+        for text in paragraphs:
+            paragraph, _ = self.clean_paragraph(text)
+            if paragraph is not None:
+                yield paragraph
+
+
+class MultiPassCleaner:
+    """
+    按JS脚本的方式逐条规则各做一遍的对照实现，规则与 NoteCleaner(script_filters=True) 相同
+    """
+
+    def __init__(self, fuzzy_threshold=0.9):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.ui_res = ([re.compile(re.escape(text)) for text in UI_TEXTS]
+                       + [re.compile(pattern) for pattern in UI_PATTERNS])
+        self.residue_res = [re.compile(pattern) for pattern in RESIDUE_PATTERNS]
+        self.keyword_res = [re.compile(re.escape(keyword), re.IGNORECASE) for keyword in SYSTEM_KEYWORDS]
+        self.tag_re = re.compile(TAG_PATTERN)
+        self.bracket_re = re.compile(BRACKET_PATTERN)
+
+    def clean(self, paragraphs):
+        paragraphs = [text.strip() for text in paragraphs if text]
+        paragraphs = [p for p in paragraphs if p and p != '.']
+        for pattern in self.ui_res:
+            paragraphs = [p for p in paragraphs if not pattern.fullmatch(p)]
+        hits = [0] * len(paragraphs)
+        for pattern in self.keyword_res:
+            hits = [count + (pattern.search(p) is not None) for count, p in zip(hits, paragraphs)]
+        paragraphs = [p for count, p in zip(hits, paragraphs) if count <= SYSTEM_KEYWORD_LIMIT]
+        paragraphs = [p for p in paragraphs if len(self.tag_re.findall(p)) <= TAG_LIMIT]
+        paragraphs = [p for p in paragraphs if len(p) < BRACKET_MIN_LENGTH
+                      or len(self.bracket_re.findall(p)) <= len(p) * BRACKET_RATIO]
+        for pattern in self.residue_res:
+            paragraphs = [pattern.sub('', p) for p in paragraphs]
+        paragraphs = [p.strip() for p in paragraphs]
+        paragraphs = [p for p in paragraphs if p]
+        deduper = FuzzyDeduper(self.fuzzy_threshold)
+        return [p for p in paragraphs if not deduper.is_duplicate(p)]
+
+
+def _collection_notes(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for brackets, body in iter_notes(f):
+            yield brackets, body.split('\n')
+
+
+def run_single_pass(path, fuzzy_threshold):
+    """
+    启用全部规则清洗一个合集，返回 (每篇保留的段落, 丢弃原因计数, 改动的段落数)
+    """
+    results = []
+    dropped = dict.fromkeys(DROP_REASONS, 0)
+    modified = 0
+    for brackets, lines in _collection_notes(path):
+        cleaner = NoteCleaner(fuzzy_threshold, script_filters=True)
+        results.append(list(cleaner.clean(lines)))
+        for reason, count in cleaner.dropped.items():
+            dropped[reason] += count
+        modified += cleaner.modified
+    return results, dropped, modified
+
+
+def modified_examples(path, limit):
+    """
+    返回最多limit个被规则改动或丢弃的非空段落：(原文, 清洗后的段落或丢弃原因)
+    """
+    examples = []
+    for brackets, lines in _collection_notes(path):
+        cleaner = NoteCleaner(0, dedupe=False, script_filters=True)
+        for line in lines:
+            original = line.strip()
+            paragraph, reason = cleaner.clean_paragraph(line)
+            if reason == DROP_EMPTY or paragraph == original:
+                continue
+            examples.append((original, paragraph if reason is None else f'（丢弃: {reason}）'))
+            if len(examples) >= limit:
+                return examples
+    return examples
+
+
+def run_multi_pass(path, fuzzy_threshold):
+    cleaner = MultiPassCleaner(fuzzy_threshold)
+    return [cleaner.clean(lines) for brackets, lines in _collection_notes(path)]
+
+
+def benchmark_file(path, rounds, fuzzy_threshold, examples=5):
+    """
+    对一个合集分别运行单遍和多遍清洗，返回最快一轮的耗时、结果核对以及丢弃/改动统计
+    """
+    single_times = []
+    multi_times = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        single, dropped, modified = run_single_pass(path, fuzzy_threshold)
+        single_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        multi = run_multi_pass(path, fuzzy_threshold)
+        multi_times.append(time.perf_counter() - started)
+    mismatched = sum(1 for a, b in zip(single, multi) if a != b) + abs(len(single) - len(multi))
+    paragraphs = sum(len(lines) for _, lines in _collection_notes(path))
+    return {
+        'file': path,
+        'notes': len(single),
+        'paragraphs': paragraphs,
+        'kept': sum(len(note) for note in single),
+        'dropped': dropped,
+        'modified': modified,
+        'examples': modified_examples(path, examples),
+        'single_pass_seconds': min(single_times),
+        'multi_pass_seconds': min(multi_times),
+        'speedup': min(multi_times) / min(single_times) if min(single_times) else 0.0,
+        'mismatched_notes': mismatched,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="单遍清洗引擎与逐条规则多遍清洗的对比基准")
+    parser.add_argument("files", nargs="*", help="合集文件，默认 笔记导出/ 下所有 *合集.txt")
+    parser.add_argument("--rounds", type=int, default=3, help="每个文件运行的轮数，取最快一轮")
+    parser.add_argument("--fuzzy-threshold", type=float, default=0.0,
+                        help="去重的相似度阈值，默认0只做精确去重，使比较集中在过滤规则上")
+    parser.add_argument("--examples", type=int, default=5, help="每个合集列出的被改动/丢弃段落示例数")
+    parser.add_argument("--json", help="将结果写入该JSON文件")
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join('笔记导出', '*合集.txt')))
+    if not files:
+        parser.error('未找到合集文件')
+
+    results = []
+    print(f"{'合集':<20} {'笔记':>6} {'段落':>8} {'丢弃':>6} {'改动':>6} {'单遍(秒)':>10} {'多遍(秒)':>10} {'加速':>7} {'结果'}")
+    for path in files:
+        result = benchmark_file(path, args.rounds, args.fuzzy_threshold, args.examples)
+        results.append(result)
+        status = '一致' if result['mismatched_notes'] == 0 else f"⚠️ {result['mismatched_notes']} 篇不一致"
+        dropped = sum(result['dropped'].values()) - result['dropped'][DROP_EMPTY]
+        print(f"{os.path.basename(path):<20} {result['notes']:>6} {result['paragraphs']:>8} {dropped:>6} {result['modified']:>6} "
+              f"{result['single_pass_seconds']:>10.4f} {result['multi_pass_seconds']:>10.4f} "
+              f"{result['speedup']:>6.1f}x {status}")
+
+    single_total = sum(r['single_pass_seconds'] for r in results)
+    multi_total = sum(r['multi_pass_seconds'] for r in results)
+    print("-" * 90)
+    print(f"合计: 单遍 {single_total:.4f} 秒，多遍 {multi_total:.4f} 秒，"
+          f"加速 {multi_total / single_total if single_total else 0:.1f} 倍")
+    totals = dict.fromkeys(DROP_REASONS, 0)
+    for result in results:
+        for reason, count in result['dropped'].items():
+            totals[reason] += count
+    print("丢弃原因: " + "，".join(f"{reason} {count}" for reason, count in totals.items()))
+    print(f"改动段落: {sum(r['modified'] for r in results)}")
+    for result in results:
+        for original, cleaned in result['examples']:
+            print(f"  ✂️  {os.path.basename(result['file'])}: {original[:60]}  ->  {cleaned[:60]}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'rounds': args.rounds, 'fuzzy_threshold': args.fuzzy_threshold, 'files': results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json}")
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可随机访问的压缩合集格式（.ncz）
+
+功能：
+    1. 将合集/导出文本按笔记边界切成若干帧，每帧包含若干篇完整笔记，单独压缩
+       （安装了zstandard时使用zstd，否则使用zlib）
+    2. 文件末尾保存帧偏移表和笔记索引，读取单篇笔记时只解压它所在的帧
+    3. 所有帧按顺序解压拼接即为原始文本，逐字节一致
+    4. open_collection() 对 .txt 和 .ncz 提供一致的文本读取接口，
+       导出、分割、统计等工具无需关心文件格式
+
+文件结构：
+    MAGIC(4) 编码(1) | 帧0 | 帧1 | ... | 索引(zlib压缩的JSON) | 索引偏移(8) 索引长度(4) MAGIC(4)
+
+用法：
+    python note_collection.py compress 合集.txt [合集.ncz]
+    python note_collection.py decompress 合集.ncz [合集.txt]
+    python note_collection.py show 合集.ncz 标题关键字
+"""
+
+import json
+import os
+import struct
+import sys
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b'NCZ1'
+TRAILER = struct.Struct('<QI4s')
+CODEC_ZLIB = 0
+CODEC_ZSTD = 1
+# 每帧的笔记篇数，以及帧的字节数上限（超过后在下一篇笔记开始处切帧）
+NOTES_PER_FRAME = 8
+FRAME_BYTES = 256 * 1024
+# 标题行前缀
+TITLE_LINE_PREFIX = '###标题###['
+COLLECTION_SUFFIX = '.ncz'
+
+
+def _compressor(codec):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=10).compress
+    return lambda data: zlib.compress(data, 9)
+
+
+def _decompressor(codec):
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError('该合集使用zstd压缩，需要先安装 zstandard')
+        return zstandard.ZstdDecompressor().decompress
+    return zlib.decompress
+
+
+def _title_of(line):
+    # 标题行的第一个方括号内容
+    end = line.find(']', len(TITLE_LINE_PREFIX))
+    return line[len(TITLE_LINE_PREFIX):end] if end >= 0 else line[len(TITLE_LINE_PREFIX):].strip()
+
+
+class CollectionWriter:
+    """
+    流式写出.ncz合集：write()可接收任意切分的文本片段
+
+    Args:
+        path: 输出文件路径
+        notes_per_frame: 每帧笔记篇数
+        codec: CODEC_ZLIB 或 CODEC_ZSTD，默认有zstandard时用zstd
+    """
+
+    def __init__(self, path, notes_per_frame=NOTES_PER_FRAME, codec=None):
+        if codec is None:
+            codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+        self.path = path
+        self.codec = codec
+        self.notes_per_frame = notes_per_frame
+        self._compress = _compressor(codec)
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC + bytes([codec]))
+        self._pending = ''
+        self._frame_parts = []
+        self._frame_size = 0
+        # 当前帧中的笔记：[标题, 帧内起始字节]
+        self._frame_notes = []
+        self._frames = []
+        self._notes = []
+        self.raw_bytes = 0
+
+    def write(self, text):
+        data = self._pending + text
+        lines = data.split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            self._add_line(line + '\n')
+
+    def _add_line(self, line):
+        if line.startswith(TITLE_LINE_PREFIX):
+            # 新笔记开始：当前帧已满时先写出，保证每篇笔记完整地落在一个帧内
+            if self._frame_notes and (len(self._frame_notes) >= self.notes_per_frame
+                                      or self._frame_size >= FRAME_BYTES):
+                self._flush_frame()
+            self._frame_notes.append([_title_of(line), self._frame_size])
+        data = line.encode('utf-8')
+        self._frame_parts.append(data)
+        self._frame_size += len(data)
+
+    def _flush_frame(self):
+        if not self._frame_parts:
+            return
+        raw = b''.join(self._frame_parts)
+        compressed = self._compress(raw)
+        frame_index = len(self._frames)
+        self._frames.append([self._file.tell(), len(compressed), len(raw)])
+        self._file.write(compressed)
+        starts = [start for _, start in self._frame_notes] + [len(raw)]
+        for i, (title, start) in enumerate(self._frame_notes):
+            self._notes.append([title, frame_index, start, starts[i + 1] - start])
+        self.raw_bytes += len(raw)
+        self._frame_parts = []
+        self._frame_size = 0
+        self._frame_notes = []
+
+    def close(self):
+        if self._pending:
+            self._add_line(self._pending)
+            self._pending = ''
+        self._flush_frame()
+        index = zlib.compress(json.dumps(
+            {'frames': self._frames, 'notes': self._notes}, ensure_ascii=False).encode('utf-8'))
+        index_offset = self._file.tell()
+        self._file.write(index)
+        self._file.write(TRAILER.pack(index_offset, len(index), MAGIC))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CollectionReader:
+    """
+    读取.ncz合集，只解压被访问到的帧
+
+    属性：
+        notes: [[标题, 帧序号, 帧内起始字节, 字节长度], ...]，与合集中的笔记顺序一致
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        head = self._file.read(len(MAGIC) + 1)
+        if head[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'不是.ncz合集文件: {path}')
+        self._decompress = _decompressor(head[len(MAGIC)])
+        self._file.seek(-TRAILER.size, os.SEEK_END)
+        index_offset, index_length, magic = TRAILER.unpack(self._file.read(TRAILER.size))
+        if magic != MAGIC:
+            raise ValueError(f'合集文件不完整: {path}')
+        self._file.seek(index_offset)
+        index = json.loads(zlib.decompress(self._file.read(index_length)).decode('utf-8'))
+        self.frames = index['frames']
+        self.notes = index['notes']
+        self._cached_frame = (None, b'')
+
+    def frame_bytes(self, frame_index):
+        if self._cached_frame[0] == frame_index:
+            return self._cached_frame[1]
+        offset, length, _ = self.frames[frame_index]
+        self._file.seek(offset)
+        data = self._decompress(self._file.read(length))
+        self._cached_frame = (frame_index, data)
+        return data
+
+    def note_text(self, note_index):
+        """
+        返回第note_index篇笔记的完整文本（含标题行）
+        """
+        _, frame_index, start, length = self.notes[note_index]
+        return self.frame_bytes(frame_index)[start:start + length].decode('utf-8')
+
+    def find(self, keyword):
+        """
+        返回标题包含关键字的笔记序号列表
+        """
+        return [i for i, note in enumerate(self.notes) if keyword in note[0]]
+
+    def iter_text(self):
+        """
+        按顺序逐帧产出解压后的文本
+        """
+        for frame_index in range(len(self.frames)):
+            yield self.frame_bytes(frame_index).decode('utf-8')
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _universal_newlines(text):
+    # 与文本模式open()的换行处理保持一致
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+class CollectionTextFile:
+    """
+    以只读文本文件的方式读取.ncz合集，支持逐行迭代、readlines()和read([size])
+    """
+
+    def __init__(self, path):
+        self._reader = CollectionReader(path)
+        # 帧总在行边界处切分，逐帧做换行转换不会拆开\r\n
+        self._texts = (_universal_newlines(text) for text in self._reader.iter_text())
+        self._buffer = ''
+
+    def __iter__(self):
+        pending = self._buffer
+        self._buffer = ''
+        for text in self._texts:
+            lines = (pending + text).split('\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line + '\n'
+        if pending:
+            yield pending
+
+    def readlines(self):
+        return list(self)
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = self._buffer + ''.join(self._texts)
+            self._buffer = ''
+            return data
+        parts = [self._buffer]
+        length = len(self._buffer)
+        while length < size:
+            text = next(self._texts, None)
+            if text is None:
+                break
+            parts.append(text)
+            length += len(text)
+        buffer = ''.join(parts)
+        data, self._buffer = buffer[:size], buffer[size:]
+        return data
+
+    def close(self):
+        self._reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def is_compressed_collection(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def collection_name(path):
+    """
+    由合集文件名得到分类名：日记合集.txt -> 日记，有道云笔记_日记_<时间戳>.txt -> 日记
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if stem.startswith('有道云笔记_'):
+        parts = stem.split('_')
+        if len(parts) >= 3:
+            return parts[1]
+    return stem[:-2] if stem.endswith('合集') and len(stem) > 2 else stem
+
+
+def list_collection_files(directory):
+    """
+    列出目录下所有 *合集.txt / *合集.ncz 的路径（按文件名排序）；
+    同一合集两种格式都存在时（compress 会保留原文件）只取修改时间较新的一个，避免重复统计
+    """
+    chosen = {}
+    for name in sorted(os.listdir(directory)):
+        if not (name.endswith('合集.txt') or name.endswith('合集' + COLLECTION_SUFFIX)):
+            continue
+        path = os.path.join(directory, name)
+        stem = os.path.splitext(name)[0]
+        if stem not in chosen or os.path.getmtime(path) > os.path.getmtime(chosen[stem]):
+            chosen[stem] = path
+    return sorted(chosen.values())
+
+
+def open_collection(path):
+    """
+    打开合集用于读取：.ncz返回CollectionTextFile，其他按UTF-8文本文件打开
+    """
+    if is_compressed_collection(path):
+        return CollectionTextFile(path)
+    return open(path, 'r', encoding='utf-8')
+
+
+def compress_collection(input_path, output_path=None, notes_per_frame=NOTES_PER_FRAME):
+    """
+    将文本合集流式转换为.ncz，返回输出路径
+    """
+    if output_path is None:
+        output_path = os.path.splitext(input_path)[0] + COLLECTION_SUFFIX
+    with open(input_path, 'r', encoding='utf-8', newline='') as src, \
+            CollectionWriter(output_path, notes_per_frame) as writer:
+        for line in src:
+            writer.write(line)
+    return output_path
+
+
+def decompress_collection(input_path, output_path=None):
+    """
+    将.ncz还原为文本合集，返回输出路径
+    """
+    if output_path is None:
+        output_path = os.path.splitext(input_path)[0] + '.txt'
+    with CollectionReader(input_path) as reader, open(output_path, 'wb') as out:
+        for frame_index in range(len(reader.frames)):
+            out.write(reader.frame_bytes(frame_index))
+    return output_path
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] not in ('compress', 'decompress', 'show'):
+        print('用法: python note_collection.py compress|decompress 输入 [输出]')
+        print('      python note_collection.py show 合集.ncz 标题关键字')
+        sys.exit(1)
+    command, source = sys.argv[1], sys.argv[2]
+    if command == 'compress':
+        target = compress_collection(source, sys.argv[3] if len(sys.argv) > 3 else None)
+        print(f'{source} ({os.path.getsize(source) // 1024} KB) -> {target} ({os.path.getsize(target) // 1024} KB)')
+    elif command == 'decompress':
+        target = decompress_collection(source, sys.argv[3] if len(sys.argv) > 3 else None)
+        print(f'{source} -> {target}')
+    else:
+        keyword = sys.argv[3] if len(sys.argv) > 3 else ''
+        with CollectionReader(source) as reader:
+            for note_index in reader.find(keyword):
+                print(reader.note_text(note_index))
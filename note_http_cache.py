@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提取过程中的磁盘HTTP响应缓存
+
+功能：
+    1. 通过 context.route 拦截笔记正文接口和静态资源请求
+    2. 响应体保存在磁盘上，按请求索引（GET按URL；正文接口可能用POST，POST按URL加请求体哈希）
+       并记录ETag/Last-Modified
+    3. 缓存仍新鲜时直接返回；过期后带条件头重新请求，服务器回复304时返回缓存内容
+    4. 缓存总大小超过上限时按最近最少使用（LRU）淘汰
+"""
+
+import asyncio
+import email.utils
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# 默认缓存容量上限（字节）
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+# 需要缓存的请求：笔记正文接口和静态资源
+CACHEABLE_URL_PATTERN = re.compile(
+    r'(/yws/api/personal/(file|sync)\b.*method=(download|getContent))'
+    r'|(\.(js|css|png|jpe?g|gif|webp|svg|ico|woff2?|ttf)(\?|$))'
+)
+# 会被缓存的请求方法
+CACHEABLE_METHODS = ('GET', 'POST')
+# 回放缓存时不能照搬的响应头（缓存中保存的是解码后的正文）
+_SKIPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+def _cache_key(request) -> str:
+    """
+    请求的缓存键：GET为URL，其他方法为 方法 + URL + 请求体哈希（同一接口不同参数的响应分开缓存）
+    """
+    if request.method == 'GET':
+        return request.url
+    body = request.post_data_buffer or b''
+    return f'{request.method} {request.url} {hashlib.sha1(body).hexdigest()}'
+
+
+def _freshness_deadline(headers: Dict[str, str], now: float) -> float:
+    """
+    根据Cache-Control/Expires计算缓存的过期时间戳，无法缓存时返回0
+    """
+    cache_control = headers.get('cache-control', '').lower()
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return 0
+    match = re.search(r'max-age=(\d+)', cache_control)
+    if match:
+        return now + int(match.group(1))
+    expires = headers.get('expires')
+    if expires:
+        try:
+            return email.utils.parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            return 0
+    return 0
+
+
+class HttpCache:
+    """
+    基于磁盘的HTTP响应缓存
+
+    Args:
+        cache_dir: 缓存目录，响应体和索引文件index.json都保存在这里
+        max_bytes: 缓存容量上限（字节）
+    """
+
+    def __init__(self, cache_dir, max_bytes: int = MAX_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / 'index.json'
+        self.max_bytes = max_bytes
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as err:
+                print(f'⚠️  缓存索引读取失败，将重新建立: {err}')
+        self.total_bytes = sum(entry['size'] for entry in self.entries.values())
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.saved_bytes = 0
+
+    def _body_path(self, key: str) -> Path:
+        return self.cache_dir / hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def _load_body(self, key: str) -> Optional[bytes]:
+        try:
+            return self._body_path(key).read_bytes()
+        except OSError:
+            return None
+
+    async def _cached_body(self, key: str) -> Optional[bytes]:
+        body = await asyncio.to_thread(self._load_body, key)
+        if body is None:
+            # 响应体文件丢失时视为未缓存
+            self._remove(key)
+        return body
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry:
+            self.total_bytes -= entry['size']
+            self._body_path(key).unlink(missing_ok=True)
+
+    def _write_body(self, key: str, body: bytes):
+        # 临时文件名唯一，同一请求并发写入时互不覆盖
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix='.tmp', delete=False) as f:
+            f.write(body)
+        os.replace(f.name, self._body_path(key))
+
+    def _record(self, key: str, status: int, headers: Dict[str, str], body: bytes):
+        now = time.time()
+        old_entry = self.entries.pop(key, None)
+        if old_entry:
+            self.total_bytes -= old_entry['size']
+        self.entries[key] = {
+            'status': status,
+            'headers': {k: v for k, v in headers.items() if k.lower() not in _SKIPPED_HEADERS},
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'fresh_until': _freshness_deadline(headers, now),
+            'size': len(body),
+            'last_access': now,
+        }
+        self.total_bytes += len(body)
+        self._evict()
+
+    def _evict(self):
+        # 按最近访问时间从旧到新淘汰，直到总大小回到上限以内
+        if self.total_bytes <= self.max_bytes:
+            return
+        for key in sorted(self.entries, key=lambda k: self.entries[k]['last_access']):
+            if self.total_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+
+    async def attach(self, context):
+        """
+        在浏览器上下文上注册缓存路由
+        """
+        await context.route(CACHEABLE_URL_PATTERN, self.handle_route)
+
+    async def handle_route(self, route):
+        request = route.request
+        if request.method not in CACHEABLE_METHODS:
+            await route.continue_()
+            return
+        url = request.url
+        key = _cache_key(request)
+        entry = self.entries.get(key)
+        now = time.time()
+
+        if entry and entry['fresh_until'] > now:
+            body = await self._cached_body(key)
+            if body is not None:
+                entry['last_access'] = now
+                self.hits += 1
+                self.saved_bytes += len(body)
+                await route.fulfill(status=entry['status'], headers=entry['headers'], body=body)
+                return
+
+        # 带上条件请求头向服务器确认缓存是否仍然有效
+        headers = dict(request.headers)
+        if entry:
+            if entry['etag']:
+                headers['if-none-match'] = entry['etag']
+            if entry['last_modified']:
+                headers['if-modified-since'] = entry['last_modified']
+        try:
+            response = await route.fetch(headers=headers)
+        except Exception as err:
+            print(f'⚠️  缓存路由请求失败，交回浏览器处理: {url}: {err}')
+            await route.continue_()
+            return
+
+        if response.status == 304 and entry:
+            body = await self._cached_body(key)
+            if body is not None:
+                entry['last_access'] = now
+                entry['fresh_until'] = _freshness_deadline(response.headers, now)
+                self.revalidated += 1
+                self.saved_bytes += len(body)
+                await route.fulfill(status=entry['status'], headers=entry['headers'], body=body)
+                return
+            # 条件请求得到304但本地内容已丢失，改为普通请求
+            response = await route.fetch()
+
+        self.misses += 1
+        body = await response.body()
+        cacheable = (response.status == 200 and 'no-store' not in response.headers.get('cache-control', '')
+                     and (response.headers.get('etag') or response.headers.get('last-modified')
+                          or _freshness_deadline(response.headers, now) > now))
+        if cacheable:
+            # 磁盘写入放到线程中，索引只在事件循环中修改
+            await asyncio.to_thread(self._write_body, key, body)
+            self._record(key, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+
+    def save(self):
+        """
+        保存缓存索引
+        """
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def summary(self) -> str:
+        return (f'命中 {self.hits} 次，304复用 {self.revalidated} 次，未命中 {self.misses} 次，'
+                f'节省传输 {self.saved_bytes // 1024} KB，缓存占用 {self.total_bytes // 1024} KB')
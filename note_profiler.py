@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文本处理工具的内存与耗时分析（--profile）
+
+功能：
+    1. tracemalloc：整次运行的内存峰值，以及各阶段结束时占用最多内存的分配位置
+    2. cProfile：按自身耗时排序的热点函数
+    3. 分阶段计时：代码中用 with phase('阶段名'): 标出阶段，同名阶段的耗时和次数累加，
+       并记录每个阶段内的内存峰值（支持嵌套）
+    4. 报告写为JSON；指定基线报告时与之比较，内存峰值或阶段峰值超出容差即视为回归，
+       同时列出增长最多的分配位置，便于定位原因
+
+用法（在各工具中）：
+    from note_profiler import add_profile_arguments, phase, profiled_run
+
+    parser = argparse.ArgumentParser(...)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    with profiled_run(args, '工具名'):
+        with phase('读取'):
+            ...
+
+    命令行：python 工具.py --profile 报告.json [--profile-baseline 基线.json --profile-tolerance 0.2]
+"""
+
+import contextlib
+import cProfile
+import json
+import linecache
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+# 报告格式版本
+REPORT_VERSION = 1
+# 默认列出的热点函数/分配位置数量
+DEFAULT_TOP = 15
+# tracemalloc保存的调用栈深度
+TRACE_FRAMES = 1
+# 阶段峰值比上次快照时高出该比例才重新快照，重复执行的小阶段只会快照少数几次
+SNAPSHOT_GROWTH = 1.1
+
+# 热点函数中排除的分析器自身文件
+_PROFILER_FILES = {__file__, tracemalloc.__file__, linecache.__file__}
+
+# 当前正在运行的分析器，phase() 据此记录阶段；未启用分析时为None
+_active = None
+
+
+def phase(name):
+    """
+    标出一个处理阶段；未启用分析时不做任何事
+    """
+    if _active is None:
+        return contextlib.nullcontext()
+    return _active.phase(name)
+
+
+def _top_allocations(snapshot, top):
+    """
+    按分配位置汇总的前top条：位置、大小、块数（源码在停止跟踪后由 _fill_code 补上，避免读源码的内存计入峰值）
+    """
+    result = []
+    for stat in snapshot.statistics('lineno'):
+        frame = stat.traceback[0]
+        if frame.filename in _PROFILER_FILES or frame.filename.startswith('<frozen importlib'):
+            continue
+        result.append({
+            'site': f'{frame.filename}:{frame.lineno}',
+            'size': stat.size,
+            'count': stat.count,
+        })
+        if len(result) >= top:
+            break
+    return result
+
+
+def _fill_code(sites):
+    for site in sites:
+        filename, _, lineno = site['site'].rpartition(':')
+        site['code'] = linecache.getline(filename, int(lineno)).strip()
+
+
+def _hotspots(profile, top):
+    """
+    cProfile结果中按自身耗时排序的前top个函数（排除分析器自身；累计耗时含快照时间，仅供参考）
+    """
+    stats = pstats.Stats(profile)
+    rows = []
+    for (filename, lineno, func), (_, ncalls, tottime, cumtime, callers) in stats.stats.items():
+        # 分析器自身的函数，以及只被分析器调用的内置函数（快照时的排序、哈希等）
+        if filename in _PROFILER_FILES or (callers and all(caller[0] in _PROFILER_FILES for caller in callers)):
+            continue
+        rows.append({
+            'function': f'{os.path.basename(filename)}:{lineno}({func})',
+            'calls': ncalls,
+            'tottime': tottime,
+            'cumtime': cumtime,
+        })
+    rows.sort(key=lambda row: row['tottime'], reverse=True)
+    return rows[:top]
+
+
+class _Phase:
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.count = 0
+        self.peak_bytes = 0
+        self.allocated_bytes = 0
+        self.top_allocations = []
+        self.snapshot_peak = 0
+
+
+class Profiler:
+    """
+    一次运行的分析器，作为上下文管理器使用，退出时写出报告
+
+    Args:
+        tool: 工具名，写入报告
+        report_path: 报告JSON路径
+        top: 热点函数和分配位置的数量
+        baseline_path: 基线报告路径，为空时不比较
+        tolerance: 允许超出基线的比例（0.2表示20%）
+        argv: 写入报告的命令行参数
+    """
+
+    def __init__(self, tool, report_path, top=DEFAULT_TOP, baseline_path=None, tolerance=0.2, argv=None):
+        self.tool = tool
+        self.report_path = report_path
+        self.top = top
+        self.baseline_path = baseline_path
+        self.tolerance = tolerance
+        self.argv = list(sys.argv if argv is None else argv)
+        self.phases = {}
+        self.report = None
+        self.regressions = []
+        self._stack = []
+        self._profile = None
+        self._started = None
+        # 快照本身的耗时，从阶段耗时和总耗时中扣除
+        self._overhead = 0.0
+
+    def __enter__(self):
+        global _active
+        tracemalloc.start(TRACE_FRAMES)
+        self._profile = cProfile.Profile()
+        # 栈底为整次运行，记录各阶段之外的峰值
+        self._stack = [[None, 0]]
+        self._started = time.perf_counter()
+        _active = self
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _active
+        self._profile.disable()
+        elapsed = time.perf_counter() - self._started - self._overhead
+        _active = None
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, self._stack[0][1])
+        top_allocations = _top_allocations(tracemalloc.take_snapshot(), self.top)
+        tracemalloc.stop()
+        _fill_code(top_allocations)
+        for p in self.phases.values():
+            _fill_code(p.top_allocations)
+        self.report = {
+            'version': REPORT_VERSION,
+            'tool': self.tool,
+            'argv': self.argv,
+            'python': platform.python_version(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'failed': exc_type is not None,
+            'elapsed_seconds': elapsed,
+            'snapshot_seconds': self._overhead,
+            'peak_bytes': peak,
+            'final_bytes': current,
+            'phases': [{
+                'name': p.name,
+                'count': p.count,
+                'seconds': p.seconds,
+                'peak_bytes': p.peak_bytes,
+                'allocated_bytes': p.allocated_bytes,
+                'top_allocations': p.top_allocations,
+            } for p in self.phases.values()],
+            'top_allocations': top_allocations,
+            'hotspots': _hotspots(self._profile, self.top),
+        }
+        if self.baseline_path:
+            self.regressions = compare_reports(self.report, load_report(self.baseline_path), self.tolerance)
+            self.report['baseline'] = self.baseline_path
+            self.report['regressions'] = self.regressions
+        with open(self.report_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report, f, ensure_ascii=False, indent=2)
+        print_report(self.report)
+        print(f'分析报告已保存到: {self.report_path}')
+        return False
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        record = self.phases.get(name)
+        if record is None:
+            record = self.phases[name] = _Phase(name)
+        # 进入阶段前把外层阶段目前为止的峰值记下，再重置峰值，只统计本阶段
+        current, peak = tracemalloc.get_traced_memory()
+        self._stack[-1][1] = max(self._stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        frame = [record, 0]
+        self._stack.append(frame)
+        started = time.perf_counter()
+        overhead = self._overhead
+        try:
+            yield record
+        finally:
+            record.seconds += time.perf_counter() - started - (self._overhead - overhead)
+            record.count += 1
+            end_current, end_peak = tracemalloc.get_traced_memory()
+            phase_peak = max(frame[1], end_peak)
+            record.allocated_bytes += max(0, end_current - current)
+            record.peak_bytes = max(record.peak_bytes, phase_peak)
+            if phase_peak > record.snapshot_peak * SNAPSHOT_GROWTH:
+                record.snapshot_peak = phase_peak
+                snapshot_started = time.perf_counter()
+                record.top_allocations = _top_allocations(tracemalloc.take_snapshot(), self.top)
+                self._overhead += time.perf_counter() - snapshot_started
+            self._stack.pop()
+            self._stack[-1][1] = max(self._stack[-1][1], phase_peak)
+
+
+def load_report(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_reports(report, baseline, tolerance=0.2):
+    """
+    与基线报告比较，返回回归列表：整体峰值或同名阶段峰值超过基线的(1+tolerance)倍，
+    附上增长最多的分配位置
+    """
+    regressions = []
+    limit = 1 + tolerance
+
+    def check(name, value, base_value, current_sites, base_sites):
+        if not base_value or value <= base_value * limit:
+            return
+        base_sizes = {site['site']: site['size'] for site in base_sites}
+        growth = sorted(({'site': site['site'], 'code': site['code'],
+                          'growth_bytes': site['size'] - base_sizes.get(site['site'], 0)}
+                         for site in current_sites), key=lambda item: item['growth_bytes'], reverse=True)
+        regressions.append({
+            'name': name,
+            'peak_bytes': value,
+            'baseline_peak_bytes': base_value,
+            'ratio': value / base_value,
+            'growth_sites': [item for item in growth if item['growth_bytes'] > 0][:5],
+        })
+
+    check('整体', report['peak_bytes'], baseline.get('peak_bytes'),
+          report['top_allocations'], baseline.get('top_allocations', []))
+    base_phases = {p['name']: p for p in baseline.get('phases', [])}
+    for current in report['phases']:
+        base = base_phases.get(current['name'])
+        if base:
+            check(current['name'], current['peak_bytes'], base.get('peak_bytes'),
+                  current['top_allocations'], base.get('top_allocations', []))
+    return regressions
+
+
+def _mb(size):
+    return f'{size / 1024 / 1024:.2f} MB'
+
+
+def print_report(report, top=5):
+    print('=' * 80)
+    print(f"[分析] {report['tool']}: 耗时 {report['elapsed_seconds']:.2f} 秒，"
+          f"内存峰值 {_mb(report['peak_bytes'])}（tracemalloc）")
+    if report['phases']:
+        print(f"{'阶段':<16} {'次数':>8} {'耗时(秒)':>10} {'峰值':>12} {'净增':>12}")
+        for p in report['phases']:
+            print(f"{p['name']:<16} {p['count']:>8} {p['seconds']:>10.3f} "
+                  f"{_mb(p['peak_bytes']):>12} {_mb(p['allocated_bytes']):>12}")
+    print('内存占用最多的分配位置:')
+    for site in report['top_allocations'][:top]:
+        print(f"  {_mb(site['size']):>10}  {site['site']}  {site['code'][:60]}")
+    print('自身耗时最多的函数:')
+    for row in report['hotspots'][:top]:
+        print(f"  {row['tottime']:>8.3f}s  累计 {row['cumtime']:>8.3f}s  {row['calls']:>8} 次  {row['function']}")
+    for regression in report.get('regressions', []):
+        print(f"⚠️  内存回归: {regression['name']} 峰值 {_mb(regression['peak_bytes'])}，"
+              f"基线 {_mb(regression['baseline_peak_bytes'])}（{regression['ratio']:.2f} 倍）")
+        for site in regression['growth_sites']:
+            print(f"      +{_mb(site['growth_bytes'])}  {site['site']}  {site['code'][:60]}")
+    print('=' * 80)
+
+
+def add_profile_arguments(parser):
+    """
+    为工具的命令行添加 --profile 等选项
+    """
+    parser.add_argument('--profile', metavar='报告.json', help='记录内存峰值、分配位置、热点函数和阶段耗时，写入该JSON报告')
+    parser.add_argument('--profile-top', type=int, default=DEFAULT_TOP, help='报告中列出的热点函数/分配位置数量')
+    parser.add_argument('--profile-baseline', metavar='基线.json', help='与该基线报告比较，内存峰值超出容差时报告回归并以非零状态退出')
+    parser.add_argument('--profile-tolerance', type=float, default=0.2, help='允许超出基线内存峰值的比例')
+
+
+def profile_from_args(args, tool):
+    """
+    按命令行选项返回分析器；未指定 --profile 时返回空的上下文管理器
+    """
+    if not getattr(args, 'profile', None):
+        return contextlib.nullcontext()
+    return Profiler(tool, args.profile, args.profile_top, args.profile_baseline, args.profile_tolerance)
+
+
+@contextlib.contextmanager
+def profiled_run(args, tool):
+    """
+    profile_from_args 的包装：运行结束后若存在内存回归，以状态码2退出
+    """
+    profiler = profile_from_args(args, tool)
+    with profiler:
+        yield profiler
+    if isinstance(profiler, Profiler) and profiler.regressions:
+        sys.exit(2)
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+笔记时间线统计（NumPy向量化）
+
+功能：
+    1. 流式解析所有合集（.txt/.ncz），每篇笔记只保留 日期、所属合集、正文字数 三个数值，
+       不在内存中保留正文
+    2. 日期与分割脚本一致：由 resolve_note_date / normalize_title_and_date 从标题方括号中提取；
+       无法提取日期的笔记单独计数，不计入时间线（不使用文件修改时间，以免扭曲时间线）
+    3. 用NumPy数组计算按日/月/年的篇数和字数、写作间隔、星期分布以及各合集的分项统计
+    4. 结果可写出为CSV和JSON，并可在终端输出纯文本直方图
+
+用法：
+    python note_timeline.py [合集.txt ...] [--csv-dir 统计] [--json 统计.json] [--histogram month]
+    不指定文件时统计 笔记导出/ 下所有 *合集.txt / *合集.ncz（同一合集两种格式都存在时只统计较新的一个）
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from note_collection import collection_name, list_collection_files, open_collection
+from split_notes_by_title import BRACKET_CONTENT_PATTERN, TITLE_MARK, count_note_chars, resolve_note_date
+
+# 标题以YYYYMMDD开头时，normalize_title_and_date直接取这8位作为日期，可走快速路径
+_DATE_PREFIX_PATTERN = re.compile(r'(20\d{2})(\d{2})(\d{2})')
+# 与 iter_notes 相同的标题行规则：行首的###标题###后跟若干方括号（不跨行）
+_TITLE_LINE_PATTERN = re.compile(r'^###标题###((?:\[.*?\][^\S\n]*)+)', re.M)
+# 每次读取的字符数
+CHUNK_CHARS = 1 << 22
+_WEEKDAYS = ('周一', '周二', '周三', '周四', '周五', '周六', '周日')
+# 直方图粒度 -> (统计结果中的序列名, 显示名称)
+HISTOGRAM_UNITS = {'day': ('daily', '日'), 'month': ('monthly', '月'), 'year': ('yearly', '年'),
+                   'weekday': ('weekday', '星期')}
+
+
+def note_date_number(brackets):
+    """
+    返回笔记日期的YYYYMMDD整数，无法提取时返回0
+    """
+    if not brackets:
+        return 0
+    match = _DATE_PREFIX_PATTERN.match(brackets[0])
+    if match is None:
+        # 其他格式交给分割脚本的完整规则处理，不打印其逐步日志
+        date_str, _ = resolve_note_date(brackets, verbose=False)
+        if not date_str:
+            return 0
+        match = _DATE_PREFIX_PATTERN.match(date_str)
+        if match is None:
+            return 0
+    return int(match.group(0))
+
+
+def iter_note_batches(f, chunk_chars=CHUNK_CHARS):
+    """
+    流式解析合集，按批产出 (标题方括号组文本列表, 正文字数列表)，逐篇结果与 iter_notes 一致
+
+    每次读取一大块文本，用 re.split 在C层一次切出其中所有完整的笔记，避免逐行逐篇的Python循环；
+    最后一个标题之后的内容（可能未结束，或标题行被截断）留到下一批，内存中最多保留约一块文本
+    """
+    carry = ''
+    while True:
+        batch = f.read(chunk_chars)
+        text = carry + batch
+        if batch:
+            start = _last_title_start(text)
+            if start < 0:
+                # 还没有遇到任何标题：之前的完整行不属于任何笔记，只保留可能是标题开头的最后一行
+                carry = text[text.rfind('\n') + 1:]
+                continue
+            text, carry = text[:start], text[start:]
+        parts = _TITLE_LINE_PATTERN.split(text)
+        if len(parts) > 1:
+            yield parts[1::2], list(map(count_note_chars, parts[2::2]))
+        if not batch:
+            return
+
+
+def _last_title_start(text):
+    """
+    返回文本中最后一个标题行的起始位置，没有时返回-1
+    """
+    pos = len(text)
+    while True:
+        pos = text.rfind(TITLE_MARK, 0, pos)
+        if pos < 0 or _TITLE_LINE_PATTERN.match(text, pos):
+            return pos
+
+
+def batch_date_numbers(groups):
+    """
+    将一批标题方括号组文本转换为YYYYMMDD整数数组，无法提取日期的为0
+
+    绝大多数标题以YYYYMMDD开头，按 normalize_title_and_date 的前两条规则直接取前8位，
+    在NumPy中批量转换；其余标题逐个交给 note_date_number 处理
+    """
+    # 取每个标题的前8个字符，按UCS-4码点视为 (篇数, 8) 的整数矩阵做批量判断和换算
+    codes = np.array([group[1:9] for group in groups], dtype='U8').view(np.uint32).reshape(len(groups), 8)
+    digits = codes.astype(np.int64) - ord('0')
+    fast = ((digits >= 0) & (digits <= 9)).all(axis=1) & (digits[:, 0] == 2) & (digits[:, 1] == 0)
+    dates = np.where(fast, digits @ (10 ** np.arange(7, -1, -1, dtype=np.int64)), 0)
+    for i in np.flatnonzero(~fast):
+        dates[i] = note_date_number(BRACKET_CONTENT_PATTERN.findall(groups[i]))
+    return dates
+
+
+def scan_collections(file_paths):
+    """
+    流式扫描合集，返回 (日期YYYYMMDD数组, 合集序号数组, 字数数组, 合集名列表)
+    """
+    dates = []
+    folders = []
+    chars = []
+    folder_names = []
+    for file_path in file_paths:
+        name = collection_name(file_path)
+        if name not in folder_names:
+            folder_names.append(name)
+        folder_index = folder_names.index(name)
+        with open_collection(file_path) as f:
+            for groups, lengths in iter_note_batches(f):
+                dates.append(batch_date_numbers(groups))
+                folders.append(np.full(len(groups), folder_index, dtype=np.int32))
+                chars.append(np.array(lengths, dtype=np.int64))
+    if not dates:
+        return (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32),
+                np.zeros(0, dtype=np.int64), folder_names)
+    return np.concatenate(dates), np.concatenate(folders), np.concatenate(chars), folder_names
+
+
+def to_datetime64(date_numbers):
+    """
+    将YYYYMMDD整数数组转换为datetime64[D]，并返回日期是否有效的掩码
+    """
+    years = date_numbers // 10000
+    months = date_numbers // 100 % 100
+    days = date_numbers % 100
+    valid = (months >= 1) & (months <= 12) & (days >= 1) & (days <= 31)
+    years = np.where(valid, years, 1970)
+    months = np.where(valid, months, 1)
+    days = np.where(valid, days, 1)
+    month_start = (years - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (months - 1)
+    result = month_start.astype('datetime64[D]') + (days - 1)
+    # 2月30日之类的日期会溢出到下个月，视为无效
+    valid &= result.astype('datetime64[M]') == month_start
+    return result, valid
+
+
+def _group(keys, counts, volumes):
+    """
+    将已按时间排序的日序列按更粗的粒度（月、年、星期）汇总
+    """
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    group_counts = np.bincount(inverse, weights=counts, minlength=len(unique_keys)).astype(np.int64)
+    group_volumes = np.bincount(inverse, weights=volumes, minlength=len(unique_keys)).astype(np.int64)
+    return unique_keys, inverse, group_counts, group_volumes
+
+
+def analyze_timeline(date_numbers, folders, chars, folder_names):
+    """
+    计算时间线统计
+
+    只对全部笔记做一次按日分组（一次排序），月、年、星期、各合集的统计都由日序列汇总得到
+
+    Returns:
+        dict: 篇数/字数汇总，daily / monthly / yearly / weekday 序列，gaps 写作间隔，
+              folders 各合集汇总，folder_yearly 各合集按年的篇数
+    """
+    dates, valid = to_datetime64(date_numbers)
+    dates = dates[valid]
+    folders = folders[valid]
+    chars = chars[valid]
+    result = {
+        'total_notes': int(len(date_numbers)),
+        'dated_notes': int(len(dates)),
+        'undated_notes': int(len(date_numbers) - len(dates)),
+        'total_chars': int(chars.sum()),
+    }
+    if len(dates) == 0:
+        return result
+
+    days, day_index = np.unique(dates, return_inverse=True)
+    day_counts = np.bincount(day_index, minlength=len(days))
+    day_chars = np.bincount(day_index, weights=chars, minlength=len(days)).astype(np.int64)
+    result['daily'] = {'keys': [str(d) for d in days], 'notes': day_counts.tolist(), 'chars': day_chars.tolist()}
+    months, _, month_counts, month_chars = _group(days.astype('datetime64[M]'), day_counts, day_chars)
+    result['monthly'] = {'keys': [str(m) for m in months], 'notes': month_counts.tolist(),
+                         'chars': month_chars.tolist()}
+    years, year_of_day, year_counts, year_chars = _group(days.astype('datetime64[Y]'), day_counts, day_chars)
+    result['yearly'] = {'keys': [str(y) for y in years], 'notes': year_counts.tolist(),
+                        'chars': year_chars.tolist()}
+
+    # 1970-01-01是周四，偏移3后0对应周一
+    weekdays = (days.astype(np.int64) + 3) % 7
+    result['weekday'] = {
+        'keys': list(_WEEKDAYS),
+        'notes': np.bincount(weekdays, weights=day_counts, minlength=7).astype(np.int64).tolist(),
+        'chars': np.bincount(weekdays, weights=day_chars, minlength=7).astype(np.int64).tolist(),
+    }
+
+    # 写作间隔：相邻两个有笔记的日期之间相差的天数
+    gaps = np.diff(days).astype(np.int64)
+    gap_info = {'active_days': int(len(days)), 'first': str(days[0]), 'last': str(days[-1])}
+    if len(gaps):
+        longest = int(np.argmax(gaps))
+        gap_lengths, gap_counts = np.unique(gaps, return_counts=True)
+        gap_info.update({
+            'mean': float(gaps.mean()),
+            'median': float(np.median(gaps)),
+            'p90': float(np.percentile(gaps, 90)),
+            'max': int(gaps[longest]),
+            'max_from': str(days[longest]),
+            'max_to': str(days[longest + 1]),
+            'distribution': {int(k): int(v) for k, v in zip(gap_lengths, gap_counts)},
+        })
+    result['gaps'] = gap_info
+
+    # 各合集：以 合集序号 * 天数 + 日序号 为键一次bincount得到 (合集, 日) 篇数矩阵
+    folder_count = len(folder_names)
+    folder_day = np.bincount(folders.astype(np.int64) * len(days) + day_index,
+                             minlength=folder_count * len(days)).reshape(folder_count, len(days))
+    folder_chars = np.bincount(folders, weights=chars, minlength=folder_count).astype(np.int64)
+    folder_stats = []
+    for index, name in enumerate(folder_names):
+        active = np.flatnonzero(folder_day[index])
+        if len(active) == 0:
+            continue
+        notes = int(folder_day[index].sum())
+        folder_stats.append({
+            'folder': name,
+            'notes': notes,
+            'chars': int(folder_chars[index]),
+            'mean_chars': round(float(folder_chars[index] / notes), 1),
+            'active_days': int(len(active)),
+            'first': str(days[active[0]]),
+            'last': str(days[active[-1]]),
+        })
+    result['folders'] = folder_stats
+
+    # 各合集按年的篇数：把 (合集, 日) 矩阵的列按年份汇总
+    folder_year = np.zeros((folder_count, len(years)), dtype=np.int64)
+    np.add.at(folder_year.T, year_of_day, folder_day.T)
+    result['folder_yearly'] = {
+        'years': [str(y) for y in years],
+        'folders': list(folder_names),
+        'notes': folder_year.T.tolist(),
+    }
+    return result
+
+
+def write_csv_reports(result, csv_dir):
+    """
+    将各时间序列和合集统计分别写为CSV文件，返回写出的文件列表
+    """
+    os.makedirs(csv_dir, exist_ok=True)
+    written = []
+    for name in ('daily', 'monthly', 'yearly', 'weekday'):
+        if name not in result:
+            continue
+        series = result[name]
+        path = os.path.join(csv_dir, f'{name}.csv')
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['period', 'notes', 'chars'])
+            writer.writerows(zip(series['keys'], series['notes'], series['chars']))
+        written.append(path)
+    if 'gaps' in result and 'distribution' in result['gaps']:
+        path = os.path.join(csv_dir, 'gaps.csv')
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['gap_days', 'occurrences'])
+            writer.writerows(result['gaps']['distribution'].items())
+        written.append(path)
+    if 'folders' in result:
+        path = os.path.join(csv_dir, 'folders.csv')
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(result['folders'][0].keys()))
+            writer.writeheader()
+            writer.writerows(result['folders'])
+        written.append(path)
+        table = result['folder_yearly']
+        path = os.path.join(csv_dir, 'folder_yearly.csv')
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['year'] + table['folders'])
+            for year, row in zip(table['years'], table['notes']):
+                writer.writerow([year] + row)
+        written.append(path)
+    return written
+
+
+def print_histogram(result, unit='month', width=50, measure='notes'):
+    """
+    输出纯文本直方图
+    """
+    series_name, unit_label = HISTOGRAM_UNITS[unit]
+    series = result.get(series_name)
+    if not series:
+        print('没有可绘制的数据')
+        return
+    values = series[measure]
+    peak = max(values) or 1
+    label_width = max(len(str(k)) for k in series['keys'])
+    print(f"按{unit_label}统计{'篇数' if measure == 'notes' else '字数'}:")
+    for key, value in zip(series['keys'], values):
+        bar = '█' * int(round(value / peak * width))
+        print(f"{str(key):<{label_width}} {bar} {value}")
+
+
+def print_summary(result):
+    print(f"笔记 {result['total_notes']} 篇（有日期 {result['dated_notes']} 篇，无日期 {result['undated_notes']} 篇），"
+          f"正文共 {result['total_chars']:,} 字")
+    gaps = result.get('gaps')
+    if gaps:
+        print(f"时间跨度 {gaps['first']} ~ {gaps['last']}，有笔记的日期 {gaps['active_days']} 天")
+        if 'max' in gaps:
+            print(f"写作间隔：平均 {gaps['mean']:.1f} 天，中位数 {gaps['median']:.0f} 天，90分位 {gaps['p90']:.0f} 天，"
+                  f"最长 {gaps['max']} 天（{gaps['max_from']} ~ {gaps['max_to']}）")
+    for folder in result.get('folders', []):
+        print(f"  {folder['folder']:<10} {folder['notes']:>7} 篇 {folder['chars']:>10,} 字 "
+              f"平均 {folder['mean_chars']:.0f} 字  {folder['first']} ~ {folder['last']}")
+
+
+def default_collection_files():
+    notes_dir = os.path.join(os.getcwd(), "笔记导出")
+    if not os.path.isdir(notes_dir):
+        return []
+    return list_collection_files(notes_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="统计笔记的时间线：按日/月/年的篇数与字数、写作间隔、各合集分项")
+    parser.add_argument("files", nargs="*", help="合集或导出文件，默认统计 笔记导出/ 下所有合集")
+    parser.add_argument("--csv-dir", help="将统计结果写为CSV文件的目录")
+    parser.add_argument("--json", help="将统计结果写入该JSON文件")
+    parser.add_argument("--histogram", choices=list(HISTOGRAM_UNITS), help="输出纯文本直方图的时间粒度")
+    parser.add_argument("--measure", choices=("notes", "chars"), default="notes", help="直方图统计篇数还是字数")
+    parser.add_argument("--width", type=int, default=50, help="直方图最长条的宽度")
+    args = parser.parse_args()
+
+    files = args.files or default_collection_files()
+    if not files:
+        print("[警告] 未找到任何合集文件")
+        exit(0)
+
+    start = time.perf_counter()
+    date_numbers, folders, chars, folder_names = scan_collections(files)
+    parsed = time.perf_counter()
+    result = analyze_timeline(date_numbers, folders, chars, folder_names)
+    analyzed = time.perf_counter()
+
+    print_summary(result)
+    if args.histogram:
+        print()
+        print_histogram(result, args.histogram, args.width, args.measure)
+    if args.csv_dir:
+        for path in write_csv_reports(result, args.csv_dir):
+            print(f"CSV已保存到: {path}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"统计结果已保存到: {args.json}")
+    print(f"解析 {len(files)} 个文件耗时 {parsed - start:.3f} 秒，统计耗时 {analyzed - parsed:.3f} 秒")
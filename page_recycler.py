@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器页面回收
+
+功能：
+    1. 长时间导出时，同一页面反复在 #bulb-editor iframe 中打开笔记，浏览器内存持续上涨、越来越慢
+    2. 每隔若干篇笔记采样一次浏览器内存（安装了psutil时为浏览器全部进程的RSS之和，
+       否则为当前页面的JS堆大小），超过水位线即回收页面
+    3. 同时跟踪每篇笔记的打开延迟：近期延迟中位数超过回收后基线的若干倍时也回收页面
+    4. 回收时在同一上下文中新建页面（登录状态不变）并关闭旧页面，释放其渲染进程，
+       由调用方提供的 restore 回调回到原来的笔记列表
+"""
+
+import statistics
+import time
+from typing import Awaitable, Callable, List, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 默认内存水位线（MB）
+DEFAULT_MEMORY_LIMIT_MB = 1500
+# 默认延迟倍数：近期延迟中位数超过基线的该倍数即回收
+DEFAULT_LATENCY_FACTOR = 3.0
+# 浏览器进程名（小写）中包含这些片段即计入内存
+BROWSER_PROCESS_NAMES = ('chrome', 'chromium', 'headless_shell', 'msedge')
+
+
+def browser_rss_bytes() -> Optional[int]:
+    """
+    本进程启动的浏览器进程（经由Playwright驱动）的RSS之和，未安装psutil或找不到浏览器进程时返回None
+    """
+    if psutil is None:
+        return None
+    total = 0
+    found = False
+    for child in psutil.Process().children(recursive=True):
+        try:
+            name = child.name().lower()
+            if any(part in name for part in BROWSER_PROCESS_NAMES):
+                total += child.memory_info().rss
+                found = True
+        except psutil.Error:
+            continue
+    return total if found else None
+
+
+async def page_heap_bytes(page) -> Optional[int]:
+    """
+    通过CDP读取页面（含iframe）的JS堆大小，非Chromium浏览器返回None
+    """
+    try:
+        session = await page.context.new_cdp_session(page)
+    except Exception:
+        return None
+    try:
+        await session.send('Performance.enable')
+        metrics = await session.send('Performance.getMetrics')
+        for metric in metrics.get('metrics', []):
+            if metric.get('name') == 'JSHeapTotalSize':
+                return int(metric['value'])
+        return None
+    except Exception:
+        return None
+    finally:
+        try:
+            await session.detach()
+        except Exception:
+            pass
+
+
+class MemoryWatermark:
+    """
+    内存水位线，可由多个页面共享（整本抓取时浏览器内存是所有页面共用的）
+
+    浏览器RSS按 sample_interval 秒缓存；某个页面因内存回收后，
+    其他页面在下一次重新采样前不会随之回收，避免所有页面同时重建
+
+    Args:
+        limit_mb: 水位线（MB），0表示不按内存回收
+        sample_interval: 浏览器RSS的最短采样间隔（秒）
+    """
+
+    def __init__(self, limit_mb: float = DEFAULT_MEMORY_LIMIT_MB, sample_interval: float = 5.0):
+        self.limit_bytes = int(limit_mb * 1024 * 1024)
+        self.sample_interval = sample_interval
+        self.source = 'RSS' if psutil is not None else 'JS堆'
+        self.last_bytes: Optional[int] = None
+        self.peak_bytes = 0
+        self._sampled_at = 0.0
+
+    async def measure(self, page) -> Optional[int]:
+        now = time.monotonic()
+        if self.source == 'RSS':
+            if now - self._sampled_at >= self.sample_interval:
+                self.last_bytes = browser_rss_bytes()
+                self._sampled_at = now
+            if self.last_bytes is not None:
+                self.peak_bytes = max(self.peak_bytes, self.last_bytes)
+                return self.last_bytes
+        # 没有psutil或找不到浏览器进程时，退回到页面自身的JS堆
+        value = await page_heap_bytes(page)
+        if value is not None:
+            self.peak_bytes = max(self.peak_bytes, value)
+        return value
+
+    async def exceeded(self, page) -> Optional[int]:
+        """
+        超过水位线时返回当前内存（字节），否则返回None
+        """
+        if self.limit_bytes <= 0:
+            return None
+        value = await self.measure(page)
+        if value is not None and value > self.limit_bytes:
+            return value
+        return None
+
+    def settle(self):
+        """
+        某个页面回收后调用：丢弃缓存的采样值，等下一个采样周期再判断
+        """
+        self.last_bytes = None
+        self._sampled_at = time.monotonic()
+
+    def summary(self) -> str:
+        limit = f'{self.limit_bytes / 1024 / 1024:.0f} MB' if self.limit_bytes > 0 else '不限'
+        return f'内存水位线 {limit}（{self.source}），峰值 {self.peak_bytes / 1024 / 1024:.0f} MB'
+
+
+class PageRecycler:
+    """
+    管理一个导出页面的回收，回收后 self.page 指向新页面
+
+    Args:
+        page: 当前页面
+        watermark: 内存水位线（可共享），None表示不按内存回收
+        latency_factor: 近期延迟中位数超过基线的该倍数时回收，0表示不按延迟回收
+        check_every: 每导出多少篇笔记检查一次
+        min_notes: 回收后至少再导出多少篇才允许下一次回收，防止反复重建
+        max_notes: 每个页面最多导出多少篇即定期回收，0表示不限
+        window: 计算基线和近期延迟所用的笔记篇数
+    """
+
+    def __init__(self, page, watermark: Optional[MemoryWatermark] = None,
+                 latency_factor: float = DEFAULT_LATENCY_FACTOR, check_every: int = 10,
+                 min_notes: int = 50, max_notes: int = 0, window: int = 10):
+        self.page = page
+        self.watermark = watermark
+        self.latency_factor = latency_factor
+        self.check_every = max(check_every, 1)
+        self.min_notes = min_notes
+        self.max_notes = max_notes
+        self.window = window
+        self.recycles: List[str] = []
+        self._reset()
+
+    def _reset(self):
+        self.notes_since = 0
+        self.baseline: Optional[float] = None
+        self._latencies: List[float] = []
+
+    def record(self, latency: Optional[float]):
+        """
+        记录一篇笔记的打开延迟（秒），前 window 篇的中位数作为本页面的基线
+        """
+        self.notes_since += 1
+        if latency is None:
+            return
+        self._latencies.append(latency)
+        if self.baseline is None and len(self._latencies) >= self.window:
+            self.baseline = statistics.median(self._latencies)
+        if len(self._latencies) > self.window:
+            del self._latencies[0]
+
+    async def check(self) -> Optional[str]:
+        """
+        判断是否需要回收，需要时返回原因
+        """
+        if self.max_notes and self.notes_since >= self.max_notes:
+            return f'已导出 {self.notes_since} 篇，定期回收'
+        if self.notes_since < self.min_notes or self.notes_since % self.check_every:
+            return None
+        if self.watermark is not None:
+            value = await self.watermark.exceeded(self.page)
+            if value is not None:
+                return f'内存 {value / 1024 / 1024:.0f} MB 超过水位线'
+        if self.latency_factor and self.baseline and len(self._latencies) >= self.window:
+            recent = statistics.median(self._latencies)
+            if recent > self.baseline * self.latency_factor:
+                return f'延迟 {recent:.2f}s 超过基线 {self.baseline:.2f}s 的 {self.latency_factor:g} 倍'
+        return None
+
+    async def recycle(self, reason: str, restore: Callable[[object], Awaitable[None]]):
+        """
+        在同一上下文中新建页面并用 restore 回到原来的列表，然后关闭旧页面，返回新页面
+        """
+        old_page = self.page
+        print(f'♻️  回收页面（{reason}）')
+        new_page = await old_page.context.new_page()
+        try:
+            await restore(new_page)
+        except Exception:
+            await new_page.close()
+            raise
+        try:
+            await old_page.close()
+        except Exception as err:
+            print(f'⚠️  关闭旧页面失败: {err}')
+        self.page = new_page
+        self.recycles.append(reason)
+        if self.watermark is not None:
+            self.watermark.settle()
+        self._reset()
+        return new_page
+
+    def summary(self) -> str:
+        text = f'页面回收 {len(self.recycles)} 次'
+        if self.watermark is not None:
+            text += f'，{self.watermark.summary()}'
+        return text
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+从提取到分割、统计、索引的流式处理
+
+功能：
+    1. 每篇笔记以记录（dict）的形式依次流经各处理阶段，不再先写出整份合集再由各脚本重新解析
+    2. 内置阶段：normalize（规范化日期和文件名）、split（写出单篇笔记文件）、
+       stats（增量统计字数/空笔记/空行）、index（逐条写入笔记索引 JSONL，结束时替换旧索引）
+    3. 阶段可插拔：--stages 选择内置阶段，--stage 模块名:类名 追加自定义阶段
+       （类需提供 name 属性、async process(record) 方法，可选 close()/summary()）
+    4. 每个阶段单独计时，并统计每篇笔记从浏览器读取完成到写入磁盘的延迟
+    5. 输入可以是实时提取（--extract，复用 click_and_extract_diary 的浏览器流程），
+       也可以是已有的合集文件（离线重放）
+
+用法：
+    python pipeline_runner.py --extract [--crawl --pages 3] [--output-mode sharded]
+    python pipeline_runner.py 笔记导出/日记合集.txt 笔记导出/读书笔记合集.txt --stages normalize,split,stats
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+
+from note_collection import collection_name, open_collection
+from split_notes_by_title import (OUTPUT_MODES, build_note_file_name, count_note_chars, get_file_modification_date,
+                                  iter_notes, open_note_writer, resolve_note_date)
+
+DEFAULT_STAGES = ('normalize', 'split', 'stats', 'index')
+
+
+class NormalizeDateStage:
+    """
+    按分割脚本的规则从标题方括号中确定日期和规范化标题，并生成单篇笔记的文件名
+
+    找不到日期时依次使用记录自带的备选日期（合集文件的修改时间）、当天日期
+    """
+
+    name = 'normalize'
+
+    async def process(self, record):
+        brackets = record.get('brackets')
+        if brackets is None:
+            # 实时提取的笔记：与导出合集中的标题行 [标题] [最后修改时间YYYYMMDD] 保持一致
+            brackets = [record['title']]
+            if record.get('file_date'):
+                brackets.append(f"最后修改时间{record['file_date']}")
+            record['brackets'] = brackets
+        date_str, title = resolve_note_date(brackets, verbose=False)
+        date_str = (date_str or record.get('fallback_date')
+                    or datetime.now().strftime('%Y%m%d'))
+        record['file_name'] = build_note_file_name(date_str, title, verbose=False)
+        record['date'] = date_str
+        record['normalized_title'] = title
+        return record
+
+
+class SplitStage:
+    """
+    将笔记写为单篇文件（支持 split_notes_by_title 的全部输出方式），写入在线程中进行
+    """
+
+    name = 'split'
+
+    def __init__(self, output_dir, output_mode='files'):
+        self.writer = open_note_writer(output_dir, output_mode, verbose=False)
+        self.written = 0
+
+    async def process(self, record):
+        if 'file_name' not in record:
+            raise ValueError('split 阶段需要先经过 normalize 阶段')
+        record['path'] = await asyncio.to_thread(
+            self.writer.write, record['date'], record['file_name'], record['body'])
+        self.written += 1
+        return record
+
+    async def close(self):
+        await asyncio.to_thread(self.writer.close)
+
+    def summary(self):
+        return f'写出 {self.written} 篇到 {self.writer.location}'
+
+
+class StatsStage:
+    """
+    增量统计：与 count_characters_between_titles / count_empty_lines_between_titles 的口径一致，
+    字数为正文各非空行去除首尾空白后的字符数之和
+    """
+
+    name = 'stats'
+
+    def __init__(self, json_path=None):
+        self.json_path = json_path
+        self.notes = 0
+        self.total_chars = 0
+        self.empty_lines = 0
+        self.empty_notes = []
+        self.folders = {}
+
+    async def process(self, record):
+        chars = count_note_chars(record['body'])
+        empty_lines = sum(1 for line in record['body'].split('\n') if not line.strip())
+        record['chars'] = chars
+        self.notes += 1
+        self.total_chars += chars
+        self.empty_lines += empty_lines
+        if chars == 0:
+            self.empty_notes.append(record.get('normalized_title') or record.get('title') or '')
+        folder = self.folders.setdefault(record.get('folder') or '', {'notes': 0, 'chars': 0, 'empty_notes': 0})
+        folder['notes'] += 1
+        folder['chars'] += chars
+        folder['empty_notes'] += chars == 0
+        return record
+
+    def result(self):
+        return {
+            'notes': self.notes,
+            'total_chars': self.total_chars,
+            'empty_lines': self.empty_lines,
+            'empty_notes': self.empty_notes,
+            'folders': self.folders,
+        }
+
+    async def close(self):
+        if self.json_path:
+            with open(self.json_path, 'w', encoding='utf-8') as f:
+                json.dump(self.result(), f, ensure_ascii=False, indent=2)
+
+    def summary(self):
+        ratio = len(self.empty_notes) / self.notes * 100 if self.notes else 0
+        return f'{self.notes} 篇，{self.total_chars:,} 字，空笔记 {len(self.empty_notes)} 篇（{ratio:.1f}%）'
+
+
+class IndexStage:
+    """
+    每篇笔记写出后立即向临时索引文件追加一行JSON（分类、日期、标题、文件位置、字数），
+    结束时替换旧索引，重复运行不会累积重复条目
+    """
+
+    name = 'index'
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self._tmp_path = f'{index_path}.tmp'
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+        self.count = 0
+
+    async def process(self, record):
+        entry = {
+            'folder': record.get('folder'),
+            'date': record.get('date'),
+            'title': record.get('normalized_title', record.get('title')),
+            'path': record.get('path'),
+            'chars': record.get('chars'),
+        }
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.count += 1
+        return record
+
+    async def close(self):
+        self._file.close()
+        os.replace(self._tmp_path, self.index_path)
+
+    def summary(self):
+        return f'写入 {self.count} 条到 {self.index_path}'
+
+
+class StreamPipeline:
+    """
+    按顺序把每条记录交给各阶段处理，某阶段返回None时丢弃该记录
+
+    feed() 可被多个提取页面并发调用，记录逐条串行通过全部阶段
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.stage_seconds = {stage.name: 0.0 for stage in stages}
+        self.stage_errors = {stage.name: 0 for stage in stages}
+        self.latencies = []
+        self.completed = 0
+        self.dropped = 0
+        self._lock = asyncio.Lock()
+        self._started = time.perf_counter()
+
+    async def feed(self, record):
+        async with self._lock:
+            for stage in self.stages:
+                started = time.perf_counter()
+                try:
+                    record = await stage.process(record)
+                except Exception as err:
+                    self.stage_errors[stage.name] += 1
+                    print(f'⚠️  [{stage.name}] 处理笔记 {record.get("title")!r} 出错: {err}')
+                    record = None
+                self.stage_seconds[stage.name] += time.perf_counter() - started
+                if record is None:
+                    self.dropped += 1
+                    return
+            self.completed += 1
+            if record.get('captured_at') is not None:
+                self.latencies.append(time.monotonic() - record['captured_at'])
+
+    async def run(self, records):
+        """
+        处理一个可迭代（同步或异步）的记录来源，结束后关闭各阶段
+        """
+        if hasattr(records, '__aiter__'):
+            async for record in records:
+                await self.feed(record)
+        else:
+            for record in records:
+                await self.feed(record)
+        await self.close()
+
+    async def close(self):
+        for stage in self.stages:
+            close = getattr(stage, 'close', None)
+            if close:
+                await close()
+
+    def report(self):
+        elapsed = time.perf_counter() - self._started
+        result = {
+            'completed': self.completed,
+            'dropped': self.dropped,
+            'elapsed_seconds': elapsed,
+            'stages': {name: {'seconds': seconds, 'errors': self.stage_errors[name]}
+                       for name, seconds in self.stage_seconds.items()},
+        }
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            result['capture_to_disk_ms'] = {
+                'median': statistics.median(ordered) * 1000,
+                'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                'max': ordered[-1] * 1000,
+            }
+        return result
+
+    def print_report(self):
+        result = self.report()
+        print('=' * 60)
+        print(f"完成 {result['completed']} 篇，丢弃 {result['dropped']} 篇，总耗时 {result['elapsed_seconds']:.2f} 秒")
+        for stage in self.stages:
+            info = result['stages'][stage.name]
+            line = f"  {stage.name:<10} {info['seconds'] * 1000:>9.1f} ms"
+            if info['errors']:
+                line += f"  出错 {info['errors']} 次"
+            summary = getattr(stage, 'summary', None)
+            if summary:
+                line += f'  {summary()}'
+            print(line)
+        latency = result.get('capture_to_disk_ms')
+        if latency:
+            print(f"读取完成到写入磁盘的延迟: 中位数 {latency['median']:.1f} ms，"
+                  f"P95 {latency['p95']:.1f} ms，最大 {latency['max']:.1f} ms")
+        print('=' * 60)
+
+
+def collection_records(file_path):
+    """
+    从已有合集中逐篇产出记录（离线重放），找不到日期时以合集文件的修改时间为准，与分割脚本一致
+    """
+    fallback_date = get_file_modification_date(file_path, verbose=False)
+    folder = collection_name(file_path)
+    with open_collection(file_path) as f:
+        for index, (brackets, body) in enumerate(iter_notes(f)):
+            yield {
+                'index': index,
+                'folder': folder,
+                'title': brackets[0] if brackets else '',
+                'brackets': brackets,
+                'body': body,
+                'fallback_date': fallback_date,
+            }
+
+
+def load_stage(spec):
+    """
+    加载自定义阶段：模块名:类名，类以无参数方式实例化
+    """
+    module_name, _, class_name = spec.partition(':')
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def build_stages(names, output_dir, output_mode='files', stats_json=None, index_path=None, extra=()):
+    stages = []
+    for name in names:
+        if name == 'normalize':
+            stages.append(NormalizeDateStage())
+        elif name == 'split':
+            stages.append(SplitStage(output_dir, output_mode))
+        elif name == 'stats':
+            stages.append(StatsStage(stats_json))
+        elif name == 'index':
+            stages.append(IndexStage(index_path or os.path.join(output_dir, '笔记索引.jsonl')))
+        else:
+            raise ValueError(f'未知的阶段: {name}，可选: {", ".join(DEFAULT_STAGES)}')
+    stages.extend(load_stage(spec) for spec in extra)
+    return stages
+
+
+async def run_extract(pipeline, args):
+    from click_and_extract_diary import extract_notes
+
+    try:
+        await extract_notes(crawl=args.crawl, crawl_pages=args.pages, folders=args.folders,
+                            assets=args.assets,
+                            http_cache=args.http_cache, sink=pipeline.feed, write_export=args.keep_export,
+                            in_page=args.in_page)
+    finally:
+        await pipeline.close()
+
+
+async def run_collections(pipeline, files):
+    try:
+        for file_path in files:
+            for record in collection_records(file_path):
+                await pipeline.feed(record)
+    finally:
+        await pipeline.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="流式处理笔记：提取/合集 -> 规范化日期 -> 分割 -> 统计 -> 索引")
+    parser.add_argument("files", nargs="*", help="离线重放的合集文件（与 --extract 二选一）")
+    parser.add_argument("--extract", action="store_true", help="实时提取：浏览器读取的每篇笔记直接流入各阶段")
+    parser.add_argument("--stages", default=','.join(DEFAULT_STAGES), help="依次执行的内置阶段，逗号分隔")
+    parser.add_argument("--stage", action="append", default=[], help="追加自定义阶段（模块名:类名），可重复")
+    parser.add_argument("--output-dir", default="笔记导出", help="分割结果与索引所在目录")
+    parser.add_argument("--output-mode", choices=OUTPUT_MODES, default="files", help="split 阶段的输出方式")
+    parser.add_argument("--stats-json", help="将统计结果写入该JSON文件")
+    parser.add_argument("--index", help="索引文件路径，默认 <output-dir>/笔记索引.jsonl")
+    parser.add_argument("--report-json", help="将各阶段耗时和延迟写入该JSON文件")
+    # 以下选项只在 --extract 时使用，与 click_and_extract_diary.py 相同
+    parser.add_argument("--crawl", action="store_true", help="整本抓取所有文件夹")
+    parser.add_argument("--pages", type=int, default=3, help="整本抓取时同时使用的页面数")
+    parser.add_argument("--folders", nargs="*", help="整本抓取时只导出这些顶层文件夹")
+    parser.add_argument("--assets", action="store_true", help="同时下载笔记中的图片和附件")
+    parser.add_argument("--http-cache", action="store_true", help="启用磁盘HTTP响应缓存")
+    parser.add_argument("--in-page", action="store_true", help="页面内批量抓取")
+    parser.add_argument("--keep-export", action="store_true", help="仍然额外生成整份合集导出文件")
+    args = parser.parse_args()
+
+    if args.extract == bool(args.files):
+        parser.error("请指定合集文件，或使用 --extract 实时提取（二者选一）")
+    os.makedirs(args.output_dir, exist_ok=True)
+    stages = build_stages([name for name in args.stages.split(',') if name], args.output_dir, args.output_mode,
+                          args.stats_json, args.index, args.stage)
+    pipeline = StreamPipeline(stages)
+    if args.extract:
+        asyncio.run(run_extract(pipeline, args))
+    else:
+        asyncio.run(run_collections(pipeline, args.files))
+    pipeline.print_report()
+    if args.report_json:
+        with open(args.report_json, 'w', encoding='utf-8') as f:
+            json.dump(pipeline.report(), f, ensure_ascii=False, indent=2)
+        print(f"报告已保存到: {args.report_json}")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应速率控制器
+
+功能：
+    1. 控制连续操作（如点击笔记）之间的最小间隔
+    2. 操作成功且延迟正常时逐步缩短间隔（加性减少）
+    3. 出错或延迟明显升高时成倍拉长间隔（乘性增加）
+    4. 为失败重试提供带抖动的指数退避时间
+"""
+
+import asyncio
+import random
+import time
+
+
+class RateController:
+    """
+    AIMD（加性减少/乘性增加）速率控制器
+
+    Args:
+        initial_interval: 初始操作间隔（秒）
+        min_interval: 最小操作间隔（秒）
+        max_interval: 最大操作间隔（秒）
+        decrease_step: 每次正常成功后缩短的间隔（秒）
+        increase_factor: 出错或变慢时间隔的放大倍数
+        slow_ratio: 单次延迟超过平均延迟的该倍数即视为变慢
+        backoff_base: 重试退避的基础时间（秒）
+    """
+
+    def __init__(self, initial_interval=1.0, min_interval=0.2, max_interval=10.0,
+                 decrease_step=0.05, increase_factor=1.5, slow_ratio=2.0, backoff_base=1.0):
+        self.interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.decrease_step = decrease_step
+        self.increase_factor = increase_factor
+        self.slow_ratio = slow_ratio
+        self.backoff_base = backoff_base
+        # 延迟的指数加权移动平均（秒）
+        self.avg_latency = None
+        self.successes = 0
+        self.failures = 0
+        self._last_acquire = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        等待到下一个允许操作的时间点，多个任务共享时按顺序放行
+        """
+        async with self._lock:
+            wait = self._last_acquire + self.interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_acquire = time.monotonic()
+
+    def record_success(self, latency):
+        """
+        记录一次成功操作及其延迟（秒），据此调整间隔
+        """
+        self.successes += 1
+        if self.avg_latency is not None and latency > self.avg_latency * self.slow_ratio:
+            # 延迟突增，说明站点开始吃力，放慢速度
+            self._increase()
+        else:
+            self.interval = max(self.min_interval, self.interval - self.decrease_step)
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency = self.avg_latency * 0.8 + latency * 0.2
+
+    def record_failure(self):
+        """
+        记录一次失败操作，成倍拉长间隔
+        """
+        self.failures += 1
+        self._increase()
+
+    def _increase(self):
+        self.interval = min(self.max_interval, self.interval * self.increase_factor)
+
+    def backoff(self, attempt):
+        """
+        第attempt次重试（从1开始）前应等待的时间（秒），带随机抖动
+        """
+        delay = min(self.max_interval, self.backoff_base * (2 ** (attempt - 1)))
+        return delay * (0.5 + random.random() / 2)
+
+    def summary(self):
+        """
+        返回当前状态的简要描述，便于写入日志
+        """
+        avg = f'{self.avg_latency:.2f}s' if self.avg_latency is not None else '-'
+        return (f'间隔 {self.interval:.2f}s，平均延迟 {avg}，'
+                f'成功 {self.successes} 次，失败 {self.failures} 次')
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导出快照的去重存储
+
+功能：
+    1. 每天的 有道云笔记_日记_*.txt 导出与前一次几乎相同，完整保存每份副本很浪费
+    2. 将导出按内容定义的边界切块：只在段落/笔记边界（连续空行之后）切分，
+       是否切分由边界前一小段字节的哈希决定（即在边界处取样的滚动哈希），
+       插入或修改一篇笔记只影响附近一两个块，其余块与上一份快照完全相同
+    3. 每个块按内容哈希只存一份（压缩保存），每份快照只保存一个很小的清单（块哈希列表）
+    4. 任意快照都能按清单流式拼回，与原文件逐字节一致（清单中记录整份文件的SHA-256用于校验）
+
+目录结构：
+    快照库/chunks/<哈希前两位>/<哈希>      压缩后的块（首字节为压缩方式）
+    快照库/snapshots/<快照名>.json         快照清单
+
+用法：
+    python snapshot_store.py add [导出文件...]            # 默认加入 笔记导出/ 下所有 有道云笔记_*.txt
+    python snapshot_store.py add 笔记导出/有道云笔记_日记_*.txt --delete-source
+    python snapshot_store.py list
+    python snapshot_store.py restore 有道云笔记_日记_2025-10-25T20-52-22-972116 [输出文件]
+    python snapshot_store.py verify
+    python snapshot_store.py remove 快照名... && python snapshot_store.py gc
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from note_collection import CODEC_ZLIB, CODEC_ZSTD
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_STORE = os.path.join('笔记导出', '快照库')
+MANIFEST_VERSION = 1
+# 块大小：不足MIN_CHUNK不切；超过MAX_CHUNK在下一个边界（或换行处）强制切分；
+# 其余边界按 边界间距/TARGET_CHUNK 的概率切分，平均块大小约为 MIN_CHUNK + TARGET_CHUNK
+MIN_CHUNK = 2 * 1024
+TARGET_CHUNK = 8 * 1024
+MAX_CHUNK = 64 * 1024
+# 计算边界哈希时使用的边界前字节数
+WINDOW = 48
+# 笔记开头的边界更容易被选为切点，使块尽量与笔记对齐
+TITLE_BOOST = 4
+TITLE_MARK = '###标题###'.encode('utf-8')
+# 段落/笔记边界：连续空行之后（兼容Windows下文本模式写出的CRLF换行）
+EDGE_PATTERN = re.compile(rb'(?:\r?\n){2,}')
+READ_BLOCK = 1 << 20
+# 读取损坏块（缺失、为空、解压失败）时可能抛出的异常
+CHUNK_ERRORS = (OSError, zlib.error, ValueError) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+def iter_chunks(stream, read_block=READ_BLOCK):
+    """
+    从二进制流中按内容定义的边界逐块产出字节串，所有块按顺序拼接即为原始内容
+    """
+    buffer = bytearray()
+    chunk_start = 0
+    prev_edge = 0
+    scan_pos = 0
+    eof = False
+    while not eof:
+        block = stream.read(read_block)
+        eof = not block
+        buffer += block
+        # 未读完时留出余量：空行可能延续到下一块，边界后也需要看到是否为标题
+        limit = len(buffer) if eof else len(buffer) - len(TITLE_MARK) - 1
+        for match in EDGE_PATTERN.finditer(buffer, scan_pos):
+            edge = match.end()
+            if edge >= limit and not eof:
+                scan_pos = match.start()
+                break
+            scan_pos = edge
+            # 很长的一段没有边界时，在换行处（没有换行则直接）强制切分
+            while edge - chunk_start > MAX_CHUNK:
+                cut = buffer.rfind(b'\n', chunk_start + MIN_CHUNK, chunk_start + MAX_CHUNK) + 1 \
+                    or chunk_start + MAX_CHUNK
+                yield bytes(buffer[chunk_start:cut])
+                chunk_start = cut
+            gap = edge - max(prev_edge, chunk_start)
+            prev_edge = edge
+            size = edge - chunk_start
+            if size < MIN_CHUNK or edge == len(buffer):
+                continue
+            probability = gap / TARGET_CHUNK
+            if buffer.startswith(TITLE_MARK, edge):
+                probability *= TITLE_BOOST
+            if size >= MAX_CHUNK or zlib.crc32(buffer[edge - WINDOW:edge]) < probability * 0x100000000:
+                yield bytes(buffer[chunk_start:edge])
+                chunk_start = edge
+        else:
+            scan_pos = max(scan_pos, limit, chunk_start)
+        while not eof and limit - chunk_start > MAX_CHUNK and scan_pos >= limit:
+            cut = buffer.rfind(b'\n', chunk_start + MIN_CHUNK, chunk_start + MAX_CHUNK) + 1 \
+                or chunk_start + MAX_CHUNK
+            yield bytes(buffer[chunk_start:cut])
+            chunk_start = cut
+        # 丢弃已产出的部分，偏移随之平移
+        if chunk_start:
+            del buffer[:chunk_start]
+            scan_pos -= chunk_start
+            prev_edge = max(prev_edge - chunk_start, 0)
+            chunk_start = 0
+    if len(buffer) > chunk_start:
+        yield bytes(buffer[chunk_start:])
+
+
+def chunk_digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class SnapshotStore:
+    """
+    快照库
+
+    Args:
+        root: 快照库目录，不存在时自动创建
+    """
+
+    def __init__(self, root=DEFAULT_STORE):
+        self.root = Path(root)
+        self.chunk_dir = self.root / 'chunks'
+        self.snapshot_dir = self.root / 'snapshots'
+        self.chunk_dir.mkdir(parents=True, exist_ok=True)
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        self.codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+    def chunk_path(self, digest):
+        return self.chunk_dir / digest[:2] / digest
+
+    def manifest_path(self, name):
+        return self.snapshot_dir / f'{name}.json'
+
+    def put_chunk(self, digest, data):
+        """
+        保存一个块，已存在时跳过；返回新写入的字节数（已存在为0）
+        """
+        path = self.chunk_path(digest)
+        if path.exists():
+            return 0
+        if self.codec == CODEC_ZSTD:
+            payload = zstandard.ZstdCompressor(level=10).compress(data)
+        else:
+            payload = zlib.compress(data, 9)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(bytes([self.codec]))
+            f.write(payload)
+        os.replace(tmp_path, path)
+        return len(payload) + 1
+
+    def get_chunk(self, digest):
+        with open(self.chunk_path(digest), 'rb') as f:
+            header = f.read(1)
+            payload = f.read()
+        if not header:
+            raise ValueError(f'块 {digest} 为空文件')
+        codec = header[0]
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError('该块使用zstd压缩，需要先安装 zstandard')
+            return zstandard.ZstdDecompressor().decompress(payload)
+        return zlib.decompress(payload)
+
+    def add(self, file_path, name=None):
+        """
+        将文件加入快照库，返回清单；同名快照内容相同时直接返回已有清单
+        """
+        name = name or Path(file_path).stem
+        if self.manifest_path(name).exists():
+            # 先比较整份文件的哈希，内容不同时不写入任何块，避免留下孤立块
+            existing = self.load_manifest(name)
+            file_hash = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(READ_BLOCK), b''):
+                    file_hash.update(block)
+            if existing['sha256'] == file_hash.hexdigest():
+                return existing
+            raise ValueError(f'快照 {name} 已存在且内容不同')
+        file_hash = hashlib.sha256()
+        digests = []
+        lengths = []
+        new_chunks = 0
+        new_bytes = 0
+        with open(file_path, 'rb') as f:
+            for data in iter_chunks(f):
+                file_hash.update(data)
+                digest = chunk_digest(data)
+                written = self.put_chunk(digest, data)
+                if written:
+                    new_chunks += 1
+                    new_bytes += written
+                digests.append(digest)
+                lengths.append(len(data))
+        sha256 = file_hash.hexdigest()
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'name': name,
+            'source': str(file_path),
+            'source_mtime': datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat(timespec='seconds'),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'size': sum(lengths),
+            'sha256': sha256,
+            'new_chunks': new_chunks,
+            'new_bytes': new_bytes,
+            'chunks': digests,
+            'lengths': lengths,
+        }
+        tmp_path = self.manifest_path(name).with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.manifest_path(name))
+        return manifest
+
+    def load_manifest(self, name):
+        with open(self.manifest_path(name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def names(self):
+        return sorted(path.stem for path in self.snapshot_dir.glob('*.json'))
+
+    def iter_snapshot(self, name):
+        """
+        按顺序逐块产出快照内容（字节串）
+        """
+        for digest in self.load_manifest(name)['chunks']:
+            yield self.get_chunk(digest)
+
+    def restore(self, name, output_path):
+        """
+        将快照流式还原到文件，校验SHA-256后返回输出路径
+        """
+        manifest = self.load_manifest(name)
+        file_hash = hashlib.sha256()
+        tmp_path = f'{output_path}.part'
+        with open(tmp_path, 'wb') as out:
+            for data in self.iter_snapshot(name):
+                file_hash.update(data)
+                out.write(data)
+        if file_hash.hexdigest() != manifest['sha256']:
+            os.remove(tmp_path)
+            raise ValueError(f'快照 {name} 还原后校验失败')
+        os.replace(tmp_path, output_path)
+        return output_path
+
+    def verify(self, name):
+        """
+        不写文件，仅按清单拼接并校验，返回是否一致
+        """
+        manifest = self.load_manifest(name)
+        file_hash = hashlib.sha256()
+        try:
+            for digest, data in zip(manifest['chunks'], self.iter_snapshot(name)):
+                if chunk_digest(data) != digest:
+                    return False
+                file_hash.update(data)
+        except CHUNK_ERRORS:
+            return False
+        return file_hash.hexdigest() == manifest['sha256']
+
+    def remove(self, name):
+        self.manifest_path(name).unlink()
+
+    def gc(self):
+        """
+        删除不再被任何快照引用的块，返回 (删除块数, 释放字节数)
+        """
+        referenced = set()
+        for name in self.names():
+            referenced.update(self.load_manifest(name)['chunks'])
+        removed = 0
+        freed = 0
+        for path in self.chunk_dir.glob('*/*'):
+            if path.name not in referenced:
+                freed += path.stat().st_size
+                path.unlink()
+                removed += 1
+        return removed, freed
+
+    def stored_bytes(self):
+        chunk_bytes = sum(path.stat().st_size for path in self.chunk_dir.glob('*/*'))
+        manifest_bytes = sum(path.stat().st_size for path in self.snapshot_dir.glob('*.json'))
+        return chunk_bytes, manifest_bytes
+
+
+def _kb(size):
+    return f'{size / 1024:,.1f} KB'
+
+
+def print_listing(store):
+    names = store.names()
+    print(f"{'快照':<50} {'大小':>12} {'块数':>6} {'新增块':>6} {'新增存储':>12}")
+    logical = 0
+    for name in names:
+        manifest = store.load_manifest(name)
+        logical += manifest['size']
+        print(f"{name:<50} {_kb(manifest['size']):>12} {len(manifest['chunks']):>6} "
+              f"{manifest['new_chunks']:>6} {_kb(manifest['new_bytes']):>12}")
+    chunk_bytes, manifest_bytes = store.stored_bytes()
+    print('-' * 92)
+    print(f'共 {len(names)} 份快照，原始大小 {_kb(logical)}，实际占用 {_kb(chunk_bytes)}（块）+ {_kb(manifest_bytes)}（清单）')
+    if chunk_bytes + manifest_bytes:
+        print(f'压缩去重比: {logical / (chunk_bytes + manifest_bytes):.1f} 倍')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='导出快照的内容定义分块去重存储')
+    parser.add_argument('--store', default=DEFAULT_STORE, help='快照库目录')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    add_parser = subparsers.add_parser('add', help='加入快照')
+    add_parser.add_argument('files', nargs='*', help='导出文件，默认 笔记导出/ 下所有 有道云笔记_*.txt')
+    add_parser.add_argument('--delete-source', action='store_true', help='加入并校验成功后删除原文件')
+    subparsers.add_parser('list', help='列出快照及占用空间')
+    restore_parser = subparsers.add_parser('restore', help='还原快照')
+    restore_parser.add_argument('name', help='快照名')
+    restore_parser.add_argument('output', nargs='?', help='输出文件，默认 <快照名>.txt')
+    verify_parser = subparsers.add_parser('verify', help='校验快照能否完整还原')
+    verify_parser.add_argument('names', nargs='*', help='快照名，默认全部')
+    remove_parser = subparsers.add_parser('remove', help='删除快照清单（块由 gc 回收）')
+    remove_parser.add_argument('names', nargs='+', help='快照名')
+    subparsers.add_parser('gc', help='删除不再被引用的块')
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.store)
+    if args.command == 'add':
+        files = args.files or sorted(glob.glob(os.path.join('笔记导出', '有道云笔记_*.txt')))
+        if not files:
+            print('未找到要加入的导出文件')
+            sys.exit(1)
+        for file_path in files:
+            manifest = store.add(file_path)
+            print(f"➕ {manifest['name']}: {_kb(manifest['size'])}，{len(manifest['chunks'])} 块，"
+                  f"新增 {manifest['new_chunks']} 块 / {_kb(manifest['new_bytes'])}")
+            if args.delete_source:
+                if store.verify(manifest['name']):
+                    os.remove(file_path)
+                    print(f'🗑️  已校验并删除: {file_path}')
+                else:
+                    print(f'❌ 校验失败，保留原文件: {file_path}')
+        print_listing(store)
+    elif args.command == 'list':
+        print_listing(store)
+    elif args.command == 'restore':
+        output = store.restore(args.name, args.output or f'{args.name}.txt')
+        print(f'📄 已还原: {output}')
+    elif args.command == 'verify':
+        failed = [name for name in (args.names or store.names()) if not store.verify(name)]
+        for name in failed:
+            print(f'❌ 校验失败: {name}')
+        print(f'校验完成：{len(args.names or store.names()) - len(failed)} 份通过，{len(failed)} 份失败')
+        sys.exit(1 if failed else 0)
+    elif args.command == 'remove':
+        for name in args.names:
+            store.remove(name)
+            print(f'🗑️  已删除快照: {name}')
+    elif args.command == 'gc':
+        removed, freed = store.gc()
+        print(f'回收 {removed} 个块，释放 {_kb(freed)}')
@@ -8,30 +8,90 @@
     2. 按###标题###标记分割文件内容
     3. 为每个标题创建对应的txt文件，文件名以日期前缀开头
     4. 将正文内容写入对应的文件中
+    5. 支持多种输出方式：单目录散文件、按年/月分片目录、zip/tar单一归档
 """
 
+import argparse
+import io
 import os
 import re
+import tarfile
+import time
+import zipfile
 from datetime import datetime
 
-def extract_date_from_text(text):
+from note_collection import list_collection_files, open_collection
+from note_profiler import add_profile_arguments, phase, profiled_run
+
+# 支持的输出方式
+OUTPUT_MODES = ("files", "sharded", "zip", "tar")
+
+# 标题标记及其后的方括号组
+TITLE_MARK = "###标题###"
+TITLE_BRACKETS_PATTERN = re.compile(r'###标题###((?:\[.*?\]\s*)+)')
+BRACKET_CONTENT_PATTERN = re.compile(r'\[(.*?)\]')
+
+
+def _silent(*args, **kwargs):
+    """
+    verbose=False 时代替 print，丢弃逐步日志
+    """
+
+
+def iter_notes(lines):
+    """
+    流式解析合集内容，逐篇产出笔记，无需一次性读入整个文件
+    
+    Args:
+        lines: 可迭代的文本行（如打开的文件对象）
+    
+    Yields:
+        tuple: (方括号内容列表, 正文文本)，正文已去除首尾空白，与分割结果一致
+    """
+    brackets = None
+    body_lines = []
+    for line in lines:
+        if line.startswith(TITLE_MARK):
+            match = TITLE_BRACKETS_PATTERN.match(line)
+            if match:
+                if brackets is not None:
+                    yield brackets, ''.join(body_lines).strip()
+                brackets = BRACKET_CONTENT_PATTERN.findall(match.group(1))
+                body_lines = [line[match.end():]]
+                continue
+        if brackets is not None:
+            body_lines.append(line)
+    if brackets is not None:
+        yield brackets, ''.join(body_lines).strip()
+
+
+def count_note_chars(body):
+    """
+    笔记正文字数：各行去除首尾空白后的字符数之和（空行不计），
+    与 count_characters_between_titles 口径一致，时间线统计和流式统计共用
+    """
+    return sum(len(line.strip()) for line in body.split('\n'))
+
+def extract_date_from_text(text, verbose=True):
     """
     从文本中提取日期格式（YYYYMMDD格式）
     
     Args:
         text: 待检查的文本
+        verbose: 为False时不打印逐步的[日志]输出
     
     Returns:
         提取到的日期字符串，如"20251025"，如果未找到则返回None
     """
-    print(f"[日志] 开始从文本提取日期: {text[:30]}...")
+    log = print if verbose else _silent
+    log(f"[日志] 开始从文本提取日期: {text[:30]}...")
     
     # 优先匹配最后修改时间格式：[最后修改时间YYYYMMDD]
     last_modified_pattern = re.compile(r'最后修改时间(20\d{6})')
     match = last_modified_pattern.search(text)
     if match:
         date_str = match.group(1)
-        print(f"[日志] 匹配到最后修改时间格式: {date_str}")
+        log(f"[日志] 匹配到最后修改时间格式: {date_str}")
         return date_str
     
     # 匹配YYYYMMDD格式的日期
@@ -39,7 +99,7 @@ def extract_date_from_text(text):
     match = yyyymmdd_pattern.search(text)
     if match:
         date_str = f"{match.group(1)}{match.group(2)}{match.group(3)}"
-        print(f"[日志] 匹配到YYYYMMDD格式: {date_str}")
+        log(f"[日志] 匹配到YYYYMMDD格式: {date_str}")
         return date_str
     
     # 匹配YYYY-MM-DD格式
@@ -47,7 +107,7 @@ def extract_date_from_text(text):
     match = yyyymmdd_dash_pattern.search(text)
     if match:
         date_str = f"{match.group(1)}{match.group(2)}{match.group(3)}"
-        print(f"[日志] 匹配到YYYY-MM-DD格式: {date_str}")
+        log(f"[日志] 匹配到YYYY-MM-DD格式: {date_str}")
         return date_str
     
     # 匹配YYYY.MM.DD格式
@@ -55,7 +115,7 @@ def extract_date_from_text(text):
     match = yyyymmdd_dot_pattern.search(text)
     if match:
         date_str = f"{match.group(1)}{match.group(2)}{match.group(3)}"
-        print(f"[日志] 匹配到YYYY.MM.DD格式: {date_str}")
+        log(f"[日志] 匹配到YYYY.MM.DD格式: {date_str}")
         return date_str
     
     # 匹配YYYY年MM月DD日格式
@@ -63,23 +123,25 @@ def extract_date_from_text(text):
     match = chinese_date_pattern.search(text)
     if match:
         date_str = f"{match.group(1)}{match.group(2)}{match.group(3)}"
-        print(f"[日志] 匹配到中文日期格式: {date_str}")
+        log(f"[日志] 匹配到中文日期格式: {date_str}")
         return date_str
     
-    print(f"[日志] 未在文本中找到日期格式")
+    log(f"[日志] 未在文本中找到日期格式")
     return None
 
-def get_file_modification_date(file_path):
+def get_file_modification_date(file_path, verbose=True):
     """
     获取文件的最后修改时间并格式化为YYYYMMDD格式
     
     Args:
         file_path: 文件路径
+        verbose: 为False时不打印逐步的[日志]输出
     
     Returns:
         格式化的日期字符串，如"20251025"
     """
-    print(f"[日志] 获取文件修改时间: {file_path}")
+    log = print if verbose else _silent
+    log(f"[日志] 获取文件修改时间: {file_path}")
     try:
         # 获取文件修改时间
         mtime = os.path.getmtime(file_path)
@@ -87,16 +149,16 @@ def get_file_modification_date(file_path):
         dt = datetime.fromtimestamp(mtime)
         # 格式化为YYYYMMDD
         date_str = dt.strftime('%Y%m%d')
-        print(f"[日志] 文件修改时间为: {date_str}")
+        log(f"[日志] 文件修改时间为: {date_str}")
         return date_str
     except Exception as e:
-        print(f"[日志] 获取文件修改时间失败: {e}")
+        log(f"[日志] 获取文件修改时间失败: {e}")
         # 如果失败，返回当前日期
         date_str = datetime.now().strftime('%Y%m%d')
-        print(f"[日志] 使用当前日期作为备选: {date_str}")
+        log(f"[日志] 使用当前日期作为备选: {date_str}")
         return date_str
 
-def normalize_title_and_date(title_text):
+def normalize_title_and_date(title_text, verbose=True):
     """
     规范化标题和日期格式，处理标题中已有的日期格式
     1. 如果标题已有YYYYMMDD-格式前缀，则保留该日期
@@ -107,11 +169,13 @@ def normalize_title_and_date(title_text):
     
     Args:
         title_text: 原始标题文本
+        verbose: 为False时不打印逐步的[日志]输出
     
     Returns:
         tuple: (date_str, normalized_title) - 提取的日期和规范化后的标题
     """
-    print(f"[日志] 开始规范化标题和日期: {title_text}")
+    log = print if verbose else _silent
+    log(f"[日志] 开始规范化标题和日期: {title_text}")
     
     # 首先检查标题是否已经包含 "YYYYMMDD-" 格式前缀
     date_prefix_match = re.match(r'(20\d{6})-(.+)', title_text)
@@ -119,7 +183,7 @@ def normalize_title_and_date(title_text):
         # 已经包含正确的日期前缀格式，直接返回
         date_str = date_prefix_match.group(1)
         normalized_title = date_prefix_match.group(2).strip()
-        print(f"[日志] 标题已包含正确日期前缀: {date_str}-{normalized_title}")
+        log(f"[日志] 标题已包含正确日期前缀: {date_str}-{normalized_title}")
         return date_str, normalized_title
     
     # 检查标题是否以 "YYYYMMDD" 开头但没有连字符
@@ -128,7 +192,7 @@ def normalize_title_and_date(title_text):
         # 有日期但没有连字符，需要添加连字符
         date_str = date_no_dash_match.group(1)
         normalized_title = date_no_dash_match.group(2).strip()
-        print(f"[日志] 标题包含日期但无连字符，添加连字符: {date_str}-{normalized_title}")
+        log(f"[日志] 标题包含日期但无连字符，添加连字符: {date_str}-{normalized_title}")
         return date_str, normalized_title
     
     # 检查标题中是否包含 "YYYY年MM月DD日" 格式
@@ -139,7 +203,7 @@ def normalize_title_and_date(title_text):
         date_str = f"{year}{month}{day}"
         # 从标题中移除中文日期
         normalized_title = re.sub(r'(20\d{2})年(0[1-9]|1[0-2])月(0[1-9]|[12]\d|3[01])日', '', title_text, count=1).strip()
-        print(f"[日志] 处理中文日期格式: {date_str}-{normalized_title}")
+        log(f"[日志] 处理中文日期格式: {date_str}-{normalized_title}")
         return date_str, normalized_title
     
     # 检查标题中是否包含 "YYYY-MM-DD" 格式
@@ -149,7 +213,7 @@ def normalize_title_and_date(title_text):
         date_str = f"{year}{month}{day}"
         # 从标题中移除YYYY-MM-DD格式
         normalized_title = re.sub(r'(20\d{2})-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])', '', title_text, count=1).strip()
-        print(f"[日志] 处理YYYY-MM-DD格式: {date_str}-{normalized_title}")
+        log(f"[日志] 处理YYYY-MM-DD格式: {date_str}-{normalized_title}")
         return date_str, normalized_title
     
     # 检查标题中是否包含 "YYYY.MM.DD" 格式
@@ -159,7 +223,7 @@ def normalize_title_and_date(title_text):
         date_str = f"{year}{month}{day}"
         # 从标题中移除YYYY.MM.DD格式
         normalized_title = re.sub(r'(20\d{2})\.(0[1-9]|1[0-2])\.(0[1-9]|[12]\d|3[01])', '', title_text, count=1).strip()
-        print(f"[日志] 处理YYYY.MM.DD格式: {date_str}-{normalized_title}")
+        log(f"[日志] 处理YYYY.MM.DD格式: {date_str}-{normalized_title}")
         return date_str, normalized_title
     
     # 检查标题中是否包含 "最后修改时间YYYYMMDD" 格式
@@ -169,11 +233,11 @@ def normalize_title_and_date(title_text):
         date_str = last_modified_match.group(1)
         # 从标题中移除"最后修改时间"和日期
         normalized_title = re.sub(r'最后修改时间(20\d{6})', '', title_text, count=1).strip()
-        print(f"[日志] 处理'最后修改时间'格式: {date_str}-{normalized_title}")
+        log(f"[日志] 处理'最后修改时间'格式: {date_str}-{normalized_title}")
         return date_str, normalized_title
     
     # 尝试从标题中提取其他日期格式
-    extracted_date = extract_date_from_text(title_text)
+    extracted_date = extract_date_from_text(title_text, verbose)
     if extracted_date:
         # 创建一个清理后的标题，移除所有可能的日期格式
         clean_title = title_text.strip()
@@ -189,22 +253,264 @@ def normalize_title_and_date(title_text):
         for pattern in date_patterns:
             if pattern.search(clean_title):
                 clean_title = pattern.sub('', clean_title, count=1).strip()
-                print(f"[日志] 清理标题中的日期格式: {clean_title}")
+                log(f"[日志] 清理标题中的日期格式: {clean_title}")
                 break  # 只移除第一个匹配的日期
         
-        print(f"[日志] 提取到其他日期格式: {extracted_date}-{clean_title}")
+        log(f"[日志] 提取到其他日期格式: {extracted_date}-{clean_title}")
         return extracted_date, clean_title
     
     # 没有找到日期，返回None和原始标题
-    print(f"[日志] 标题中未找到日期，返回原始标题")
+    log(f"[日志] 标题中未找到日期，返回原始标题")
     return None, title_text.strip()
 
-def split_notes_by_title(input_file_path):
+class DirectoryNoteWriter:
+    """
+    将每篇笔记写为输出目录下的单独txt文件（默认方式）
+    """
+
+    def __init__(self, output_dir, verbose=True):
+        self.output_dir = output_dir
+        self.location = output_dir
+        self._log = print if verbose else _silent
+        self._log(f"[日志] 创建输出目录: {output_dir}")
+        os.makedirs(output_dir, exist_ok=True)
+
+    def note_path(self, date_str, file_name):
+        return os.path.join(self.output_dir, file_name)
+
+    def write(self, date_str, file_name, text):
+        file_path = self.note_path(date_str, file_name)
+        self._log(f"[日志] 创建文件路径: {file_path}")
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return file_path
+
+    def close(self):
+        pass
+
+
+class ShardedNoteWriter(DirectoryNoteWriter):
+    """
+    按笔记日期分片写入 输出目录/YYYY/MM/ 子目录，避免单目录下文件过多
+    """
+
+    def __init__(self, output_dir, verbose=True):
+        super().__init__(output_dir, verbose)
+        # 记录已创建的分片目录，避免对每篇笔记重复调用makedirs
+        self._created_dirs = set()
+
+    def note_path(self, date_str, file_name):
+        if date_str and len(date_str) >= 6 and date_str[:6].isdigit():
+            shard_dir = os.path.join(self.output_dir, date_str[:4], date_str[4:6])
+        else:
+            shard_dir = os.path.join(self.output_dir, "未知日期")
+        if shard_dir not in self._created_dirs:
+            os.makedirs(shard_dir, exist_ok=True)
+            self._created_dirs.add(shard_dir)
+        return os.path.join(shard_dir, file_name)
+
+
+class ZipNoteWriter:
+    """
+    将所有笔记单遍流式写入一个zip归档，成员名与散文件方式的文件名一致
+    """
+
+    def __init__(self, archive_path, verbose=True):
+        self.archive_path = archive_path
+        self.location = archive_path
+        self._log = print if verbose else _silent
+        self._log(f"[日志] 创建zip归档: {archive_path}")
+        self._archive = zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED)
+        self._names = set()
+
+    def write(self, date_str, file_name, text):
+        if file_name in self._names:
+            # 与散文件方式一致：同名笔记以后写入者为准（zip读取时取最后一个同名成员）
+            print(f"[警告] 归档中已存在同名笔记，将以后写入者为准: {file_name}")
+        self._names.add(file_name)
+        info = zipfile.ZipInfo(file_name, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self._archive.writestr(info, text.encode('utf-8'))
+        return f"{self.archive_path}:{file_name}"
+
+    def close(self):
+        self._archive.close()
+
+
+class TarNoteWriter:
+    """
+    将所有笔记单遍流式写入一个tar.gz归档，成员名与散文件方式的文件名一致
+    """
+
+    def __init__(self, archive_path, verbose=True):
+        self.archive_path = archive_path
+        self.location = archive_path
+        self._log = print if verbose else _silent
+        self._log(f"[日志] 创建tar归档: {archive_path}")
+        self._archive = tarfile.open(archive_path, 'w:gz')
+        self._mtime = time.time()
+
+    def write(self, date_str, file_name, text):
+        data = text.encode('utf-8')
+        info = tarfile.TarInfo(file_name)
+        info.size = len(data)
+        info.mtime = self._mtime
+        self._archive.addfile(info, io.BytesIO(data))
+        return f"{self.archive_path}:{file_name}"
+
+    def close(self):
+        self._archive.close()
+
+
+def open_note_writer(base_dir, output_mode="files", verbose=True):
+    """
+    按输出方式创建笔记写出器
+
+    Args:
+        base_dir: 输出位置所在目录（通常为合集文件所在目录）
+        output_mode: files | sharded | zip | tar
+        verbose: 为False时不打印逐篇的[日志]输出（流式处理时使用）
+
+    Returns:
+        具有 write(date_str, file_name, text) 和 close() 方法的写出器
+    """
+    if output_mode == "files":
+        return DirectoryNoteWriter(os.path.join(base_dir, "分割后的笔记"), verbose)
+    if output_mode == "sharded":
+        return ShardedNoteWriter(os.path.join(base_dir, "分割后的笔记"), verbose)
+    if output_mode == "zip":
+        return ZipNoteWriter(os.path.join(base_dir, "分割后的笔记.zip"), verbose)
+    if output_mode == "tar":
+        return TarNoteWriter(os.path.join(base_dir, "分割后的笔记.tar.gz"), verbose)
+    raise ValueError(f"不支持的输出方式: {output_mode}，可选: {', '.join(OUTPUT_MODES)}")
+
+
+def iter_split_notes(path):
+    """
+    读取split_notes_by_title的任一种输出（目录、分片目录、zip或tar归档）
+
+    Args:
+        path: 输出目录或归档文件路径
+
+    Yields:
+        tuple: (相对文件名, 正文文本)
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if not name.endswith(".txt"):
+                    continue
+                file_path = os.path.join(root, name)
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    yield os.path.relpath(file_path, path), f.read()
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                yield info.filename, archive.read(info).decode('utf-8')
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path, 'r:*') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                yield member.name, archive.extractfile(member).read().decode('utf-8')
+    else:
+        raise ValueError(f"无法识别的分割笔记输出: {path}")
+
+
+def resolve_note_date(bracket_contents, verbose=True):
+    """
+    从标题行的方括号内容中确定笔记日期和标题
+    
+    依次尝试：第一个方括号（规范化标题和日期）、后续各方括号、所有方括号联合提取
+    
+    Args:
+        bracket_contents: 标题行中各方括号内的内容列表
+        verbose: 为False时不打印逐步的[日志]输出
+    
+    Returns:
+        tuple: (date_str, title_str)，未找到日期时date_str为None
+    """
+    log = print if verbose else _silent
+    # 初始化日期和标题
+    date_str = None
+    title_str = ""
+    
+    if bracket_contents:
+        # 第一个方括号内容作为候选标题
+        first_content = bracket_contents[0]
+        log(f"[日志] 第一个方括号内容(候选标题): {first_content}")
+        
+        # 使用新的规范化函数处理标题和日期
+        extracted_date, normalized_title = normalize_title_and_date(first_content, verbose)
+        
+        if extracted_date:
+            # 如果从标题中提取到了日期
+            date_str = extracted_date
+            title_str = normalized_title
+            log(f"[日志] 从标题中提取到日期: {date_str}, 规范化标题: {title_str}")
+        else:
+            # 如果没有从标题中提取到日期，继续搜索其他方括号内容
+            title_str = first_content
+            log(f"[日志] 从第一个方括号内容未提取到日期，使用原始内容作为标题: {title_str}")
+            
+            # 检查其他方括号内容是否包含日期
+            log(f"[日志] 检查后续方括号内容 ({len(bracket_contents) - 1} 个) 是否包含日期")
+            for j, bracket_content in enumerate(bracket_contents[1:], 2):
+                log(f"[日志] 检查第 {j} 个方括号内容: {bracket_content}")
+                # 也使用规范化函数处理其他方括号内容
+                temp_date, _ = normalize_title_and_date(bracket_content, verbose)
+                if temp_date:
+                    date_str = temp_date
+                    log(f"[日志] 从第 {j} 个方括号内容中提取到日期: {date_str}")
+                    break
+            
+            # 如果仍然没有找到日期，尝试从所有方括号内容中联合提取
+            if not date_str and len(bracket_contents) > 1:
+                combined_content = ' '.join(bracket_contents)
+                log(f"[日志] 从单个方括号内容未提取到日期，尝试联合提取: {combined_content[:50]}...")
+                combined_date, _ = normalize_title_and_date(combined_content, verbose)
+                if combined_date:
+                    date_str = combined_date
+                    log(f"[日志] 从联合方括号内容中提取到日期: {date_str}")
+    
+    return date_str, title_str
+
+def build_note_file_name(date_str, title_str, verbose=True):
+    """
+    构建笔记文件名：日期-标题.txt，清理非法字符并限制长度
+
+    Args:
+        date_str: 日期字符串，如"20251025"
+        title_str: 标题
+        verbose: 为False时不打印逐步的[日志]输出
+
+    Returns:
+        可用作文件名的字符串（含.txt后缀）
+    """
+    log = print if verbose else _silent
+    file_name = f"{date_str}-{title_str}"
+    log(f"[日志] 构建文件名: {file_name}")
+    # 清理文件名中的非法字符
+    valid_file_name = re.sub(r'[\\/:*?\"<>|]', '_', file_name)
+    log(f"[日志] 清理非法字符后的文件名: {valid_file_name}")
+    # 限制文件名长度，避免操作系统限制
+    if len(valid_file_name) > 200:
+        valid_file_name = valid_file_name[:197] + "..."
+        log(f"[日志] 文件名过长，截断为: {valid_file_name}")
+    return f"{valid_file_name}.txt"
+
+def split_notes_by_title(input_file_path, output_mode="files", writer=None):
     """
     按标题分割笔记内容并生成单独的文件
     
     Args:
         input_file_path: 输入文件路径
+        output_mode: 输出方式，files(默认) | sharded | zip | tar，仅在未传入writer时生效
+        writer: 可选的共享写出器（见open_note_writer），由调用方负责关闭，
+            用于将多个合集写入同一个归档
     """
     print(f"[日志] 开始分割笔记：{input_file_path}")
     
@@ -213,11 +519,23 @@ def split_notes_by_title(input_file_path):
         print(f"[错误] 找不到输入文件 {input_file_path}")
         return
     
-    # 获取输入文件所在目录，并创建输出目录
+    # 获取输入文件所在目录，并创建输出写出器
     input_dir = os.path.dirname(input_file_path)
-    output_dir = os.path.join(input_dir, "分割后的笔记")
-    print(f"[日志] 创建输出目录: {output_dir}")
-    os.makedirs(output_dir, exist_ok=True)
+    owns_writer = writer is None
+    if owns_writer:
+        writer = open_note_writer(input_dir, output_mode)
+    try:
+        _split_notes_with_writer(input_file_path, writer)
+    finally:
+        if owns_writer:
+            writer.close()
+
+
+def _split_notes_with_writer(input_file_path, writer):
+    """
+    split_notes_by_title的主体：解析合集并将每篇笔记交给写出器
+    """
+    output_dir = writer.location
     
     # 获取文件的最后修改时间作为备选日期
     file_mod_date = get_file_modification_date(input_file_path)
@@ -225,16 +543,17 @@ def split_notes_by_title(input_file_path):
     print(f"[日志] 输出目录：{output_dir}")
     print(f"[日志] 文件最后修改时间：{file_mod_date}")
     
-    # 读取文件内容
+    # 读取文件内容（.ncz压缩合集会被透明解压）
     print(f"[日志] 读取文件内容")
-    with open(input_file_path, 'r', encoding='utf-8') as f:
+    with phase('读取合集'), open_collection(input_file_path) as f:
         content = f.read()
     print(f"[日志] 文件读取完成，共 {len(content)} 字符")
     
     # 使用正则表达式分割标题和内容
     print(f"[日志] 使用正则表达式分割标题和内容")
     pattern = r'###标题###((?:\[.*?\]\s*)+)\s*'
-    matches = list(re.finditer(pattern, content))
+    with phase('匹配标题'):
+        matches = list(re.finditer(pattern, content))
     print(f"[日志] 找到 {len(matches)} 个标题标记")
     
     if not matches:
@@ -254,47 +573,8 @@ def split_notes_by_title(input_file_path):
         bracket_contents = re.findall(r'\[(.*?)\]', brackets_content)
         print(f"[日志] 提取到 {len(bracket_contents)} 个方括号内的内容")
         
-        # 初始化日期和标题
-        date_str = None
-        title_str = ""
-        
-        if bracket_contents:
-            # 第一个方括号内容作为候选标题
-            first_content = bracket_contents[0]
-            print(f"[日志] 第一个方括号内容(候选标题): {first_content}")
-            
-            # 使用新的规范化函数处理标题和日期
-            extracted_date, normalized_title = normalize_title_and_date(first_content)
-            
-            if extracted_date:
-                # 如果从标题中提取到了日期
-                date_str = extracted_date
-                title_str = normalized_title
-                print(f"[日志] 从标题中提取到日期: {date_str}, 规范化标题: {title_str}")
-            else:
-                # 如果没有从标题中提取到日期，继续搜索其他方括号内容
-                title_str = first_content
-                print(f"[日志] 从第一个方括号内容未提取到日期，使用原始内容作为标题: {title_str}")
-                
-                # 检查其他方括号内容是否包含日期
-                print(f"[日志] 检查后续方括号内容 ({len(bracket_contents) - 1} 个) 是否包含日期")
-                for j, bracket_content in enumerate(bracket_contents[1:], 2):
-                    print(f"[日志] 检查第 {j} 个方括号内容: {bracket_content}")
-                    # 也使用规范化函数处理其他方括号内容
-                    temp_date, _ = normalize_title_and_date(bracket_content)
-                    if temp_date:
-                        date_str = temp_date
-                        print(f"[日志] 从第 {j} 个方括号内容中提取到日期: {date_str}")
-                        break
-                
-                # 如果仍然没有找到日期，尝试从所有方括号内容中联合提取
-                if not date_str and len(bracket_contents) > 1:
-                    combined_content = ' '.join(bracket_contents)
-                    print(f"[日志] 从单个方括号内容未提取到日期，尝试联合提取: {combined_content[:50]}...")
-                    combined_date, _ = normalize_title_and_date(combined_content)
-                    if combined_date:
-                        date_str = combined_date
-                        print(f"[日志] 从联合方括号内容中提取到日期: {date_str}")
+        with phase('解析日期'):
+            date_str, title_str = resolve_note_date(bracket_contents)
         
         # 如果仍然没有找到日期，使用文件的最后修改时间
         if not date_str:
@@ -306,33 +586,22 @@ def split_notes_by_title(input_file_path):
         # 获取下一个标题的开始位置，如果是最后一个则到文件末尾
         end_pos = matches[i + 1].start() if i < len(matches) - 1 else len(content)
         # 提取正文内容，去除首尾空白
-        text = content[start_pos:end_pos].strip()
+        with phase('切分正文'):
+            text = content[start_pos:end_pos].strip()
         print(f"[日志] 提取正文内容，长度: {len(text)} 字符")
         
         # 构建文件名：日期-标题.txt
-        file_name = f"{date_str}-{title_str}"
-        print(f"[日志] 构建文件名: {file_name}")
-        # 清理文件名中的非法字符
-        valid_file_name = re.sub(r'[\\/:*?\"<>|]', '_', file_name)
-        print(f"[日志] 清理非法字符后的文件名: {valid_file_name}")
-        # 限制文件名长度，避免操作系统限制
-        if len(valid_file_name) > 200:
-            valid_file_name = valid_file_name[:197] + "..."
-            print(f"[日志] 文件名过长，截断为: {valid_file_name}")
-        
-        # 创建文件路径
-        file_path = os.path.join(output_dir, f"{valid_file_name}.txt")
-        print(f"[日志] 创建文件路径: {file_path}")
+        note_file_name = build_note_file_name(date_str, title_str)
         
         # 写入文件
         try:
             print(f"[日志] 写入文件内容")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(text)
+            with phase('写出笔记'):
+                writer.write(date_str, note_file_name, text)
             file_count += 1
-            print(f"[日志] 创建文件成功: {i+1}/{len(matches)}: {valid_file_name}.txt")
+            print(f"[日志] 创建文件成功: {i+1}/{len(matches)}: {note_file_name}")
         except Exception as e:
-            print(f"[错误] 创建文件 {valid_file_name}.txt 失败: {e}")
+            print(f"[错误] 创建文件 {note_file_name} 失败: {e}")
     
     print(f"\n[日志] 处理完成！")
     print(f"[日志] 成功创建 {file_count} 个文件")
@@ -340,6 +609,12 @@ def split_notes_by_title(input_file_path):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="按###标题###分割笔记导出目录下的所有合集文件")
+    parser.add_argument("--output-mode", choices=OUTPUT_MODES, default="files",
+                        help="输出方式：files=单目录散文件，sharded=按年/月分片目录，zip/tar=写入单一归档")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
     print("[日志] 开始执行笔记分割脚本")
     # 设置笔记导出目录
     notes_dir = os.path.join(os.getcwd(), "笔记导出")
@@ -351,8 +626,8 @@ if __name__ == "__main__":
         print(f"[日志] 脚本执行失败")
         exit(1)
     
-    # 获取目录下所有以"合集.txt"结尾的文件
-    collection_files = [f for f in os.listdir(notes_dir) if f.endswith("合集.txt")]
+    # 获取目录下所有以"合集.txt"或"合集.ncz"结尾的文件（同一合集两种格式都存在时只取较新的一个）
+    collection_files = [os.path.basename(path) for path in list_collection_files(notes_dir)]
     print(f"[日志] 找到 {len(collection_files)} 个合集文件")
     
     if not collection_files:
@@ -360,18 +635,26 @@ if __name__ == "__main__":
         print(f"[日志] 脚本执行完毕")
         exit(0)
     
+    # 所有合集共用一个写出器，归档方式下全部笔记写入同一个归档文件
+    print(f"[日志] 输出方式: {args.output_mode}")
+    note_writer = open_note_writer(notes_dir, args.output_mode)
+    
     # 依次处理每个合集文件
     total_processed = 0
-    for i, file_name in enumerate(collection_files, 1):
-        input_file = os.path.join(notes_dir, file_name)
-        print(f"\n[日志] ============= 开始处理文件 {i}/{len(collection_files)}: {file_name} =============")
-        print(f"[日志] 目标输入文件: {input_file}")
-        
-        # 执行分割操作
-        print(f"[日志] 开始执行分割操作")
-        split_notes_by_title(input_file)
-        total_processed += 1
-        print(f"[日志] 文件 {file_name} 处理完成")
+    with profiled_run(args, "split_notes_by_title"):
+        try:
+            for i, file_name in enumerate(collection_files, 1):
+                input_file = os.path.join(notes_dir, file_name)
+                print(f"\n[日志] ============= 开始处理文件 {i}/{len(collection_files)}: {file_name} =============")
+                print(f"[日志] 目标输入文件: {input_file}")
+            
+                # 执行分割操作
+                print(f"[日志] 开始执行分割操作")
+                split_notes_by_title(input_file, writer=note_writer)
+                total_processed += 1
+                print(f"[日志] 文件 {file_name} 处理完成")
+        finally:
+            note_writer.close()
     
     print(f"\n[日志] ============= 所有文件处理完毕 =============")
     print(f"[日志] 成功处理 {total_processed} 个合集文件")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fuzzy_dedup 的回归测试：去重结果必须与按 similarity() 逐对比较的定义（相似度 > 阈值）一致
+
+用法：
+    python -m pytest test_fuzzy_dedup.py
+"""
+
+import random
+
+from fuzzy_dedup import FuzzyDeduper, dedupe_paragraphs, levenshtein, similarity
+
+
+def brute_force(paragraphs, threshold):
+    kept = []
+    for paragraph in paragraphs:
+        if not any(paragraph == other or similarity(paragraph, other) > threshold for other in kept):
+            kept.append(paragraph)
+    return kept
+
+
+def mutate(rng, text, edits):
+    chars = list(text)
+    for _ in range(edits):
+        op = rng.randrange(3)
+        pos = rng.randrange(len(chars) + 1)
+        if op == 0 or not chars:
+            chars.insert(pos, rng.choice('abcd'))
+        elif op == 1:
+            del chars[min(pos, len(chars) - 1)]
+        else:
+            chars[min(pos, len(chars) - 1)] = rng.choice('abcd')
+    return ''.join(chars)
+
+
+def test_similarity_equal_to_threshold_is_not_duplicate():
+    # 长度20、距离6：相似度恰好为0.7，不大于阈值，两段都应保留
+    a = 'a' * 20
+    b = 'b' * 6 + 'a' * 14
+    assert levenshtein(a, b) == 6
+    assert similarity(a, b) == 0.7
+    assert dedupe_paragraphs([a, b], threshold=0.7) == [a, b]
+    # 距离5时相似度0.75 > 0.7，视为重复
+    assert dedupe_paragraphs([a, 'b' * 5 + 'a' * 15], threshold=0.7) == [a]
+
+
+def test_matches_brute_force():
+    rng = random.Random(0)
+    for threshold in (0.5, 0.7, 0.8, 0.9):
+        for _ in range(500):
+            base = ''.join(rng.choice('abcd') for _ in range(rng.randrange(1, 30)))
+            paragraphs = [base] + [mutate(rng, base, rng.randrange(0, 8)) for _ in range(3)]
+            assert dedupe_paragraphs(paragraphs, threshold) == brute_force(paragraphs, threshold), \
+                (threshold, paragraphs)
+
+
+def test_max_distance_is_exact():
+    for threshold in (0.5, 0.7, 0.8, 0.9, 0.95):
+        deduper = FuzzyDeduper(threshold)
+        for longer in range(1, 200):
+            max_distance = deduper._max_distance(longer)
+            assert max_distance == -1 or (longer - max_distance) / longer > threshold
+            assert not (longer - max_distance - 1) / longer > threshold